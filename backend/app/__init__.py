@@ -4,47 +4,109 @@ import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from flask_session import Session
 from .config import Config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Expone db y app a nivel de módulo para que routes.py pueda: from . import app, db
+# db a nivel de módulo para que models.py y utils puedan: from . import db
 db = SQLAlchemy()
-app = None  # se asignará dentro de create_app()
 
-def create_app():
-    global app
+
+def create_app(config: dict | None = None):
+    """
+    Crea y configura una app nueva; se puede llamar varias veces (tests, CLI, scheduler).
+
+    Importar el paquete no tiene efectos: las rutas viven en blueprints y las librerías
+    de extracción (pandas, pdfplumber, lxml, magic) se cargan en el primer uso.
+
+    Args:
+        config: valores que sustituyen a los de Config (p. ej. {"TESTING": True}).
+    """
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
 
     # CORS
     CORS(app, supports_credentials=True, origins=["http://localhost:8000"])
 
-    # Sessions
-    Session(app)
-
     # uploads/
     basedir = os.path.abspath(os.path.dirname(__file__))
     upload_folder = os.path.join(basedir, '..', 'uploads')
-    app.config['UPLOAD_FOLDER'] = upload_folder
-    app.config.setdefault("MAX_CONTENT_LENGTH", 25 * 1024 * 1024)
-    os.makedirs(upload_folder, exist_ok=True)
+    app.config['UPLOAD_FOLDER'] = (config or {}).get('UPLOAD_FOLDER', upload_folder)
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    # OCR de PDFs escaneados
+    from .utils.ocr import configurar_ocr
+    configurar_ocr(habilitado=app.config['OCR_HABILITADO'],
+                   dpi=app.config['OCR_DPI'],
+                   idioma=app.config['OCR_IDIOMA'],
+                   procesos=app.config['OCR_PROCESOS'],
+                   directorio_cache=app.config['OCR_CACHE_DIR'] or os.path.join(app.instance_path, 'ocr_cache'))
+
+    # Extracción aislada (procesos con límite de tiempo/memoria)
+    from .utils import extraccion_aislada
+    extraccion_aislada.configurar(habilitada=app.config['EXTRACCION_AISLADA'],
+                                  procesos=app.config['EXTRACCION_PROCESOS'],
+                                  timeout=app.config['EXTRACCION_TIMEOUT'],
+                                  max_memoria_mb=app.config['EXTRACCION_MAX_MEMORIA_MB'],
+                                  max_paginas=app.config['EXTRACCION_MAX_PAGINAS'],
+                                  max_filas=app.config['EXTRACCION_MAX_FILAS'])
+
+    app.config['FRONTEND_COMPILADO_DIR'] = (app.config['FRONTEND_COMPILADO_DIR']
+                                           or os.path.join(app.instance_path, 'frontend'))
+    app.config['VISTAS_PREVIAS_DIR'] = (app.config['VISTAS_PREVIAS_DIR']
+                                       or os.path.join(app.instance_path, 'vistas_previas'))
+    app.config['SUBIDAS_DIR'] = (app.config['SUBIDAS_DIR']
+                                or os.path.join(app.instance_path, 'subidas'))
+
+    app.config['CLASIFICADOR_RUTA'] = (app.config['CLASIFICADOR_RUTA']
+                                       or os.path.join(app.instance_path, 'clasificador.npz'))
 
     # DB
+    from .utils.base_datos import normalizar_url, opciones_motor, registrar_pragmas_sqlite
+    app.config['SQLALCHEMY_DATABASE_URI'] = normalizar_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', opciones_motor(app.config))
     db.init_app(app)
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        with app.app_context():
+            registrar_pragmas_sqlite(db.engine, app.config)
+
+    # Sessions (el backend sqlalchemy necesita la BD ya inicializada)
+    from .utils.sesiones import configurar_sesiones
+    configurar_sesiones(app, db)
 
     # Importa modelos / blueprints / rutas DESPUÉS de crear app
     from . import models  # noqa: F401
     from .auth_routes import auth_bp
     app.register_blueprint(auth_bp)
 
-    # Importa routes: aquí se ejecutan los @app.route y el handler 404
-    from . import routes  # noqa: F401
+    # Rutas principales, handler 404 y protección global (blueprint de routes.py)
+    from .routes import principal_bp, FRONTEND_DIR
+    app.register_blueprint(principal_bp)
+
+    # frontend/ compilado (huellas + gzip/brotli); sin él se sirve frontend/ tal cual
+    from .utils import recursos_frontend
+    if app.config['FRONTEND_COMPILAR']:
+        app.extensions['recursos_frontend'] = recursos_frontend.construir_recursos(
+            FRONTEND_DIR, app.config['FRONTEND_COMPILADO_DIR'])
+
+    from .utils.migraciones import asegurar_esquema
+    from .utils import estadisticas
 
     with app.app_context():
         db.create_all()
+        asegurar_esquema(db)
+        estadisticas.asegurar_inicializadas()
+
+    # Comandos CLI: flask reconstruir-estadisticas / entrenar-clasificador / recategorizar / construir-frontend
+    # / reindexar-entidades
+    from .utils import categorize, entidades
+    estadisticas.registrar_comandos(app)
+    categorize.registrar_comandos(app)
+    entidades.registrar_comandos(app)
+    recursos_frontend.registrar_comandos(app, FRONTEND_DIR)
 
     logger.info("Aplicación Flask inicializada correctamente")
     return app
@@ -19,6 +19,18 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def admin_required(f):
+    """Protege rutas reservadas al administrador."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({'error': 'No autorizado', 'error_code': 'UNAUTHORIZED'}), 401
+        usuario = Usuario.query.get(session.get('user_id'))
+        if not usuario or not usuario.is_admin:
+            return jsonify({'error': 'Solo el administrador puede acceder', 'error_code': 'ONLY_ADMIN'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
 def json_required(*fields):
     """Valida que el request tenga JSON con campos requeridos."""
     def decorator(f):
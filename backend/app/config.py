@@ -5,16 +5,118 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', '4f3c2a5d6b7e9f1234567890abcdef1234567890abcdef1234567890abcdef12')
     PERMANENT_SESSION_LIFETIME = timedelta(minutes=15)
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///documentos.db'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///documentos.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pool de conexiones (ver utils/base_datos.py)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+
+    # Pragmas SQLite (solo si la URL es sqlite)
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_FOREIGN_KEYS = os.environ.get('SQLITE_FOREIGN_KEYS', 'false').lower() in ('1', 'true', 'yes')
     
     # Configuración de sesión para cookies
     SESSION_COOKIE_SAMESITE = 'Lax'  
     SESSION_COOKIE_SECURE = False  
     SESSION_COOKIE_HTTPONLY = True
-    SESSION_TYPE = 'filesystem'
+    # 'sqlalchemy' (tabla en la BD), 'filesystem' (anterior) o 'cookie' (firmada, sin estado)
+    SESSION_TYPE = os.environ.get('SESSION_TYPE', 'sqlalchemy')
+    SESSION_SQLALCHEMY_TABLE = 'sessions'
+    SESSION_CACHE_TTL = float(os.environ.get('SESSION_CACHE_TTL', 0))      # segundos en caché de lectura por proceso (0 = siempre del almacén)
+    SESSION_CACHE_MAX = int(os.environ.get('SESSION_CACHE_MAX', 1024))     # sesiones en caché por proceso
+    SESSION_REFRESH_MIN = float(os.environ.get('SESSION_REFRESH_MIN', 60))  # renovar expiración como mucho 1 vez/min
+
+    # Tamaño máximo de cada petición (/upload y cada parte de /api/subidas)
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 25 * 1024 * 1024))
+
+    # Subidas de varios archivos: hilos para hash + extracción en paralelo
+    UPLOAD_HILOS = int(os.environ.get('UPLOAD_HILOS', 4))
+
+    # Subidas reanudables por partes (/api/subidas) para archivos mayores que MAX_CONTENT_LENGTH
+    SUBIDAS_DIR = os.environ.get('SUBIDAS_DIR')  # por defecto <instance>/subidas
+    SUBIDAS_TAMANO_PARTE = int(os.environ.get('SUBIDAS_TAMANO_PARTE', 8 * 1024 * 1024))  # < MAX_CONTENT_LENGTH
+    # El archivo ensamblado se ingiere en memoria (hash, extracción): no subir mucho este límite
+    SUBIDAS_MAX_BYTES = int(os.environ.get('SUBIDAS_MAX_BYTES', 100 * 1024 * 1024))
+    SUBIDAS_EXPIRA_HORAS = float(os.environ.get('SUBIDAS_EXPIRA_HORAS', 24))  # sin partes nuevas
+
+    # Archivos de documentos: borrados diferidos por lotes y recorrido completo de uploads/ como comprobación
+    BORRADOS_INTERVALO_S = int(os.environ.get('BORRADOS_INTERVALO_S', 60))
+    BORRADOS_LOTE = int(os.environ.get('BORRADOS_LOTE', 500))
+    LIMPIEZA_COMPLETA_DIAS = int(os.environ.get('LIMPIEZA_COMPLETA_DIAS', 30))
+    LIMPIEZA_GRACIA_HORAS = float(os.environ.get('LIMPIEZA_GRACIA_HORAS', 1))  # archivos más recientes no se tocan
+
+    # Versiones guardadas como delta del texto anterior; una versión completa cada N
+    DELTA_KEYFRAME_CADA = int(os.environ.get('DELTA_KEYFRAME_CADA', 10))
+
+    # Diferencias entre versiones (/api/grupos/<grupo>/diff): memoizadas por par de hashes, LRU
+    DIFERENCIAS_AL_SUBIR = os.environ.get('DIFERENCIAS_AL_SUBIR', '1').lower() in ('1', 'true', 'si')
+    DIFERENCIAS_MAX_MB = int(os.environ.get('DIFERENCIAS_MAX_MB', 64))
+
+    # Caché de extracción por hash (tabla cache_extraccion, LRU)
+    CACHE_EXTRACCION = os.environ.get('CACHE_EXTRACCION', '1').lower() in ('1', 'true', 'si')
+    CACHE_EXTRACCION_MAX_MB = int(os.environ.get('CACHE_EXTRACCION_MAX_MB', 512))
+
+    # OCR (Tesseract) para páginas de PDF sin capa de texto
+    OCR_HABILITADO = os.environ.get('OCR_HABILITADO', '1').lower() in ('1', 'true', 'si')
+    OCR_DPI = int(os.environ.get('OCR_DPI', 200))
+    OCR_IDIOMA = os.environ.get('OCR_IDIOMA', 'spa+eng')
+    OCR_PROCESOS = int(os.environ.get('OCR_PROCESOS', 2))
+    OCR_CACHE_DIR = os.environ.get('OCR_CACHE_DIR')  # por defecto <instance>/ocr_cache
+
+    # Extracción en procesos aislados con presupuesto por archivo
+    EXTRACCION_AISLADA = os.environ.get('EXTRACCION_AISLADA', '1').lower() in ('1', 'true', 'si')
+    EXTRACCION_PROCESOS = int(os.environ.get('EXTRACCION_PROCESOS', 2))
+    EXTRACCION_TIMEOUT = float(os.environ.get('EXTRACCION_TIMEOUT', 120))         # segundos por archivo
+    EXTRACCION_MAX_MEMORIA_MB = int(os.environ.get('EXTRACCION_MAX_MEMORIA_MB', 2048))
+    EXTRACCION_MAX_PAGINAS = int(os.environ.get('EXTRACCION_MAX_PAGINAS', 2000))
+    EXTRACCION_MAX_FILAS = int(os.environ.get('EXTRACCION_MAX_FILAS', 500000))
+
+    # /validar_graficable decide con las primeras N filas de cada hoja (0 = hoja completa)
+    GRAFICABLE_MUESTRA_FILAS = int(os.environ.get('GRAFICABLE_MUESTRA_FILAS', 1000))
+
+    # /api/graficos-multiples: archivos leídos en paralelo (pool de procesos) y tiempo máximo por petición
+    GRAFICOS_PROCESOS = int(os.environ.get('GRAFICOS_PROCESOS', min(4, os.cpu_count() or 1)))
+    GRAFICOS_TIEMPO_MAX = float(os.environ.get('GRAFICOS_TIEMPO_MAX', 20))  # segundos
+
+    # Frontend compilado al arrancar: nombres con huella + gzip/brotli, Cache-Control immutable
+    FRONTEND_COMPILAR = os.environ.get('FRONTEND_COMPILAR', '1').lower() in ('1', 'true', 'si')
+    FRONTEND_COMPILADO_DIR = os.environ.get('FRONTEND_COMPILADO_DIR')  # por defecto <instance>/frontend
+
+    # Control de admisión (por proceso): peticiones en curso + cola por clase de endpoint
+    ADMISION_HABILITADA = os.environ.get('ADMISION_HABILITADA', '1').lower() in ('1', 'true', 'si')
+    ADMISION_SUBIDA_CONCURRENCIA = int(os.environ.get('ADMISION_SUBIDA_CONCURRENCIA', 2))
+    ADMISION_SUBIDA_COLA = int(os.environ.get('ADMISION_SUBIDA_COLA', 8))
+    ADMISION_GRAFICOS_CONCURRENCIA = int(os.environ.get('ADMISION_GRAFICOS_CONCURRENCIA', 4))
+    ADMISION_GRAFICOS_COLA = int(os.environ.get('ADMISION_GRAFICOS_COLA', 16))
+    ADMISION_EXPORTAR_CONCURRENCIA = int(os.environ.get('ADMISION_EXPORTAR_CONCURRENCIA', 2))
+    ADMISION_EXPORTAR_COLA = int(os.environ.get('ADMISION_EXPORTAR_COLA', 4))
+    ADMISION_ESPERA_MAX = float(os.environ.get('ADMISION_ESPERA_MAX', 10))                 # segundos en cola
+    ADMISION_USUARIO_CONCURRENCIA = int(os.environ.get('ADMISION_USUARIO_CONCURRENCIA', 2))  # 0 = sin límite
+    ADMISION_USUARIO_MB_POR_MIN = float(os.environ.get('ADMISION_USUARIO_MB_POR_MIN', 200))  # 0 = sin límite
+
+    # Categorización: "palabras" (reglas de categorize.py) o "modelo" (TF-IDF + lineal, ver clasificador.py)
+    CATEGORIZACION_MOTOR = os.environ.get('CATEGORIZACION_MOTOR', 'palabras')
+    CLASIFICADOR_RUTA = os.environ.get('CLASIFICADOR_RUTA')  # por defecto <instance>/clasificador.npz
+    CLASIFICADOR_UMBRAL = float(os.environ.get('CLASIFICADOR_UMBRAL', 0.6))  # por debajo, palabras clave
+
+    # Vistas previas por hash de contenido: miniaturas de páginas de PDF y DOCX como HTML
+    VISTAS_PREVIAS_DIR = os.environ.get('VISTAS_PREVIAS_DIR')  # por defecto <instance>/vistas_previas
+    VISTAS_PREVIAS_ANCHOS = tuple(int(a) for a in os.environ.get('VISTAS_PREVIAS_ANCHOS', '200,800').split(','))
+    VISTAS_PREVIAS_PAGINAS = int(os.environ.get('VISTAS_PREVIAS_PAGINAS', 3))  # generadas al subir; el resto al pedirlas
+    VISTAS_PREVIAS_AL_SUBIR = os.environ.get('VISTAS_PREVIAS_AL_SUBIR', '1').lower() in ('1', 'true', 'si')
+    VISTAS_PREVIAS_HILOS = int(os.environ.get('VISTAS_PREVIAS_HILOS', 1))
+
+    # POST /api/exportar: máximo de documentos por ZIP
+    EXPORTAR_MAX_DOCUMENTOS = int(os.environ.get('EXPORTAR_MAX_DOCUMENTOS', 5000))
+
+    # Perfilado bajo demanda (cabecera X-Perfilar / ?perfilar=1, solo admin)
+    PERFILES_DIR = os.environ.get('PERFILES_DIR')  # por defecto <instance>/perfiles
+    PERFILES_MAX = int(os.environ.get('PERFILES_MAX', 20))
 
 
 
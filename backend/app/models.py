@@ -7,26 +7,73 @@ class Documento(db.Model):
     Soporta control de versiones, categorización y almacenamiento de hash para evitar duplicados.
     """
     __tablename__ = 'documentos'
+    __table_args__ = (
+        db.Index('ix_documentos_grupo_version', 'grupo', 'version'),  # historial de un grupo
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(120), nullable=False, comment="Nombre del archivo original")
     tipo = db.Column(db.String(20), nullable=False, comment="Extensión del archivo")
-    contenido = db.Column(db.Text, nullable=True, comment="Texto extraído del documento")
+    _contenido = db.Column("contenido", db.Text, nullable=True, comment="Texto extraído del documento (keyframe)")
     categoria = db.Column(db.String(50), nullable=False, comment="Categoría asignada")
     fecha_subida = db.Column(db.String(20), nullable=False, comment="Fecha de subida (ISO)")
     
     version = db.Column(db.Integer, nullable=False, default=1, comment="Número de versión del archivo")
     grupo = db.Column(db.String(120), nullable=False, comment="Grupo base para agrupar versiones")
-    hash_contenido = db.Column(db.String(64), nullable=True, comment="Hash SHA-256 del contenido")
+    hash_contenido = db.Column(db.String(64), nullable=True, index=True, comment="Hash SHA-256 del contenido")
+    tamano = db.Column(db.BigInteger, nullable=True, comment="Tamaño del archivo en bytes")
+
+    # Texto de versiones guardado como delta comprimido respecto a otra versión (ver utils/versiones_delta.py)
+    contenido_delta = db.Column(db.LargeBinary, nullable=True, comment="Delta comprimido respecto a delta_base_id")
+    delta_base_id = db.Column(db.Integer, db.ForeignKey('documentos.id'), nullable=True, index=True, comment="Versión base del delta")
+    delta_profundidad = db.Column(db.Integer, nullable=False, default=0, server_default="0", comment="Deltas hasta el keyframe")
 
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
 
     usuario = db.relationship('Usuario', backref=db.backref('documentos', lazy=True))
 
+    @property
+    def contenido(self):
+        """Texto extraído; si la versión está guardada como delta se reconstruye (y se memoiza)."""
+        if self.contenido_delta is None:
+            return self._contenido
+        texto = getattr(self, "_texto_cache", None)
+        if texto is None:
+            from .utils.versiones_delta import reconstruir_contenido
+            texto = reconstruir_contenido(self)
+            self._texto_cache = texto
+        return texto
+
+    @contenido.setter
+    def contenido(self, valor):
+        """Asignar el texto directamente guarda la versión completa (keyframe)."""
+        self._contenido = valor
+        self.contenido_delta = None
+        self.delta_base_id = None
+        self.delta_profundidad = 0
+        self._texto_cache = None
+
     def __repr__(self):
         return f"<Documento {self.nombre} v{self.version} ({self.categoria})>"
 
 
+class EstadisticaDocumentos(db.Model):
+    """
+    Contadores agregados de documentos (número y bytes) por dimensión:
+    'total', 'categoria', 'tipo', 'usuario' y 'fecha' (día de subida).
+    Se actualizan en la misma transacción que las altas, reemplazos y bajas.
+    """
+    __tablename__ = 'estadisticas_documentos'
+
+    dimension = db.Column(db.String(20), primary_key=True, comment="Dimensión agregada")
+    clave = db.Column(db.String(120), primary_key=True, comment="Valor de la dimensión")
+    documentos = db.Column(db.Integer, nullable=False, default=0, comment="Número de documentos")
+    bytes = db.Column(db.BigInteger, nullable=False, default=0, comment="Suma de tamaños en bytes")
+
+    def __repr__(self):
+        return f"<EstadisticaDocumentos {self.dimension}={self.clave}: {self.documentos}>"
+
+
 class Usuario(db.Model):
     __tablename__ = 'usuarios'
 
@@ -44,3 +91,134 @@ class Usuario(db.Model):
     def __repr__(self):
         return f"<Usuario {self.email} - Admin: {self.is_admin}>"
 
+
+
+class CacheExtraccion(db.Model):
+    """
+    Resultado de extracción (texto + patrones) por hash SHA-256 del archivo y versión del extractor.
+    El texto se guarda comprimido con zlib; las entradas menos usadas se expulsan al superar el tope.
+    """
+    __tablename__ = 'cache_extraccion'
+
+    hash_contenido = db.Column(db.String(64), primary_key=True, comment="Hash SHA-256 del archivo")
+    version_extractor = db.Column(db.String(20), primary_key=True, comment="Versión del extractor que generó el resultado")
+    contenido = db.Column(db.LargeBinary, nullable=True, comment="Texto extraído comprimido (zlib)")
+    patrones = db.Column(db.Text, nullable=True, comment="Patrones detectados (JSON)")
+    tamano = db.Column(db.Integer, nullable=False, default=0, comment="Bytes ocupados por la entrada")
+    ultimo_acceso = db.Column(db.Float, nullable=False, index=True, comment="Marca de tiempo del último uso (LRU)")
+
+    def __repr__(self):
+        return f"<CacheExtraccion {self.hash_contenido[:12]} {self.version_extractor}>"
+
+
+class SesionSubida(db.Model):
+    """
+    Subida por partes en curso (ver utils/subidas_fragmentadas.py): las partes recibidas
+    se van añadiendo a un archivo temporal hasta completar `tamano` bytes.
+    """
+    __tablename__ = 'sesiones_subida'
+
+    id = db.Column(db.String(32), primary_key=True, comment="Identificador aleatorio (hex)")
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=True, index=True)
+    nombre = db.Column(db.String(120), nullable=False, comment="Nombre original del archivo")
+    tipo = db.Column(db.String(20), nullable=False, comment="Extensión del archivo")
+    tamano = db.Column(db.BigInteger, nullable=False, comment="Tamaño total anunciado en bytes")
+    tamano_parte = db.Column(db.Integer, nullable=False, comment="Bytes de cada parte (salvo la última)")
+    recibido = db.Column(db.BigInteger, nullable=False, default=0, comment="Bytes ya escritos (offset siguiente)")
+    partes = db.Column(db.Text, nullable=False, default="[]", comment="SHA-256 de cada parte recibida (JSON)")
+    creada = db.Column(db.Float, nullable=False, comment="Marca de tiempo de creación")
+    actualizada = db.Column(db.Float, nullable=False, index=True, comment="Última parte recibida (caducidad)")
+
+    def __repr__(self):
+        return f"<SesionSubida {self.id[:8]} {self.nombre} {self.recibido}/{self.tamano}>"
+
+
+class ArchivoPendienteBorrado(db.Model):
+    """
+    Lápida de un archivo de documento ya eliminado en la BD, pendiente de borrar del
+    disco (ver utils/archivos_documentos.py).
+    """
+    __tablename__ = 'archivos_pendientes_borrado'
+
+    id = db.Column(db.Integer, primary_key=True)
+    ruta = db.Column(db.String(400), nullable=False, comment="Ruta relativa a UPLOAD_FOLDER (con /)")
+    creado = db.Column(db.Float, nullable=False, comment="Marca de tiempo del borrado en la BD")
+
+    def __repr__(self):
+        return f"<ArchivoPendienteBorrado {self.ruta}>"
+
+
+class DiferenciaVersiones(db.Model):
+    """
+    Diferencia calculada entre dos contenidos (versión anterior -> siguiente de un grupo),
+    comprimida con zlib; expulsión LRU al superar DIFERENCIAS_MAX_MB.
+    """
+    __tablename__ = 'diferencias_versiones'
+
+    hash_origen = db.Column(db.String(64), primary_key=True, comment="Hash SHA-256 de la versión anterior")
+    hash_destino = db.Column(db.String(64), primary_key=True, comment="Hash SHA-256 de la versión siguiente")
+    version = db.Column(db.String(20), primary_key=True, comment="Versión del formato de diferencias")
+    resultado = db.Column(db.LargeBinary, nullable=False, comment="Diferencia completa (JSON comprimido)")
+    resumen = db.Column(db.Text, nullable=False, comment="Totales de la diferencia (JSON)")
+    tamano = db.Column(db.Integer, nullable=False, default=0, comment="Bytes ocupados por la entrada")
+    ultimo_acceso = db.Column(db.Float, nullable=False, index=True, comment="Marca de tiempo del último uso (LRU)")
+
+    def __repr__(self):
+        return f"<DiferenciaVersiones {self.hash_origen[:8]}->{self.hash_destino[:8]}>"
+
+
+class EntidadIP(db.Model):
+    """
+    IP o red IPv4 mencionada en un documento (una versión), como rango de enteros
+    [inicio, fin]: una IP suelta tiene inicio == fin y prefijo 32.
+    """
+    __tablename__ = 'entidades_ip'
+    __table_args__ = (
+        db.Index('ix_entidades_ip_rango', 'inicio', 'fin'),      # IPs/redes dentro de un rango
+        db.Index('ix_entidades_ip_red', 'prefijo', 'inicio'),    # redes que contienen un rango
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    documento_id = db.Column(db.Integer, db.ForeignKey('documentos.id', ondelete='CASCADE'), nullable=False, index=True)
+    inicio = db.Column(db.BigInteger, nullable=False, comment="Primera dirección como entero")
+    fin = db.Column(db.BigInteger, nullable=False, comment="Última dirección como entero")
+    prefijo = db.Column(db.SmallInteger, nullable=False, comment="Longitud del prefijo CIDR (32 = IP suelta)")
+    texto = db.Column(db.String(18), nullable=False, comment="IP o red tal como aparece (normalizada)")
+
+    documento = db.relationship('Documento')
+
+    def __repr__(self):
+        return f"<EntidadIP {self.texto} doc={self.documento_id}>"
+
+
+class EntidadHost(db.Model):
+    """Hostname mencionado en un documento (columna 'Host Name' o 'hostname: x' en el texto)."""
+    __tablename__ = 'entidades_host'
+
+    id = db.Column(db.Integer, primary_key=True)
+    documento_id = db.Column(db.Integer, db.ForeignKey('documentos.id', ondelete='CASCADE'), nullable=False, index=True)
+    hostname = db.Column(db.String(253), nullable=False, index=True, comment="Hostname en minúsculas")
+
+    documento = db.relationship('Documento')
+
+    def __repr__(self):
+        return f"<EntidadHost {self.hostname} doc={self.documento_id}>"
+
+
+class ItemInventario(db.Model):
+    """Fila de una hoja de inventario (código, descripción, marca y la fila completa en JSON)."""
+    __tablename__ = 'items_inventario'
+
+    id = db.Column(db.Integer, primary_key=True)
+    documento_id = db.Column(db.Integer, db.ForeignKey('documentos.id', ondelete='CASCADE'), nullable=False, index=True)
+    hoja = db.Column(db.String(120), nullable=True, comment="Hoja de origen (None en CSV)")
+    fila = db.Column(db.Integer, nullable=False, comment="Índice de la fila en la hoja")
+    codigo = db.Column(db.String(120), nullable=True, index=True, comment="Nº de inventario, patrimonial o serie")
+    descripcion = db.Column(db.String(255), nullable=True, index=True)
+    marca = db.Column(db.String(120), nullable=True, index=True)
+    datos = db.Column(db.Text, nullable=False, comment="Fila completa (JSON columna -> valor)")
+
+    documento = db.relationship('Documento')
+
+    def __repr__(self):
+        return f"<ItemInventario {self.codigo or self.descripcion} doc={self.documento_id}>"
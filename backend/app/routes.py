@@ -1,38 +1,74 @@
-import os
 import traceback
-import pandas as pd
-from datetime import date
+from datetime import date, datetime
 from pathlib import Path
 from io import BytesIO
+from itertools import chain
 from difflib import SequenceMatcher
+from concurrent.futures import ThreadPoolExecutor
 import mimetypes
 
-from flask import request, jsonify, send_from_directory, render_template, session, redirect, abort, send_file
+from flask import (Blueprint, Response, current_app, request, jsonify, send_from_directory, render_template, session,
+                   redirect, abort, send_file)
+from sqlalchemy import and_, func
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
-from . import app, db
+from . import db
 from .models import Documento, Usuario
-from .utils.ocr import extraer_contenido
-from .utils.categorize import categorizar
+from .utils.ocr import version_extractor
+from .utils.extraccion_aislada import extraer as extraer_aislado, ExtraccionFallida
+from .utils import cache_extraccion
+from .utils.versiones_delta import asignar_contenido, materializar_dependientes
+from .utils import estadisticas
+from .utils import entidades
+from .utils import vistas_previas
+from .utils import exportar
+from .utils import graficos
+from .utils import subidas_fragmentadas
+from .utils import archivos_documentos
+from .utils import diferencias_versiones
+from .utils.subidas_fragmentadas import ErrorSubida
+from .utils.respuestas import (DocumentoResumen, DocumentoDetalle, respuesta_json,
+                               lista_json_en_streaming, objeto_json_en_streaming, TAMANO_BLOQUE)
+from .utils.categorize import categorizar_lote
 from .utils.file_comparator import hash_file
-from .utils.es_graficable import es_graficable
-from .auth_routes import login_required
-from .utils.utils_fs import ensure_dir
-from .utils.utils_uploads import ensure_allowed_and_name, save_bytes
+from .utils.es_graficable import evaluar_graficable, clave_cache as clave_graficable
+from .auth_routes import login_required, admin_required
+from .utils.perfilado import perfilable, listar_perfiles, directorio_perfiles
+from .utils import admision
+from .utils.admision import admitir
+from .utils.utils_uploads import ensure_allowed_and_name, ensure_allowed_name, check_mime, save_bytes
 
 # ==== RUTAS ABSOLUTAS AL FRONTEND (robusto a la estructura del repo) ====
 REPO_ROOT = Path(__file__).resolve().parents[2]   # .../<repo>
 FRONTEND_DIR = REPO_ROOT / "frontend"             # .../<repo>/frontend
 
+# Todas las rutas de la app; create_app() registra el blueprint (sin efectos al importar)
+principal_bp = Blueprint('principal', __name__)
+
+
 def _frontend_dir() -> str:
     return str(FRONTEND_DIR)
 
 
+def _upload_dir() -> Path:
+    return Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+
+
+def _servir_frontend(nombre: str):
+    # Copia compilada (huellas + precompresión) que create_app deja en extensions; sin ella, frontend/ tal cual
+    recursos = current_app.extensions.get('recursos_frontend')
+    if recursos is not None:
+        respuesta = recursos.responder(nombre, request.headers.get('Accept-Encoding', ''))
+        if respuesta is not None:
+            return respuesta
+    return send_from_directory(_frontend_dir(), nombre)
+
+
 # ==== UTIL: RESOLUCIÓN DE RUTA FÍSICA DE DOCUMENTOS ====
 def ruta_fisica_de_documento(doc) -> Path:
-    base = Path(UPLOAD_DIR)
-    grupo_dir = secure_filename(Path(doc.grupo).stem) or "doc"
-    candidato = base / grupo_dir / f"v{int(doc.version)}" / doc.nombre
+    base = _upload_dir()
+    candidato = base / archivos_documentos.ruta_relativa(doc.grupo, doc.version, doc.nombre)
     if candidato.exists():
         return candidato
     # Legacy: por compatibilidad si quedó plano
@@ -41,22 +77,25 @@ def ruta_fisica_de_documento(doc) -> Path:
 
 
 # ==== MANEJO 404 (sirve 404.html del frontend si existe) ====
-@app.errorhandler(404)
+@principal_bp.app_errorhandler(404)
 def not_found(e):
     try:
-        return send_from_directory(_frontend_dir(), '404.html'), 404
+        return _servir_frontend('404.html'), 404
     except Exception:
         # Fallback por si falta el archivo
         return ("<h1>404</h1><p>Página no encontrada</p>", 404)
 
-@app.route("/404")
+@principal_bp.route("/404")
 def show_404():
-    return send_from_directory(_frontend_dir(), '404.html'), 404
+    return _servir_frontend('404.html'), 404
 
 
 # ==== PROTECCIÓN GLOBAL DE RUTAS ====
-@app.before_request
+@principal_bp.before_app_request
 def proteger_todas_rutas():
+    # Assets estáticos del frontend/ y /static/: sin más comprobaciones
+    if request.path.startswith(('/frontend/', '/static/')):
+        return
     rutas_publicas = [
         '/api/login',
         '/api/register',
@@ -70,125 +109,186 @@ def proteger_todas_rutas():
     ]
     if any(request.path.startswith(r) for r in rutas_publicas):
         return
-    # Deja pasar assets estáticos del frontend/ y /static/
-    if request.path.startswith('/static/') or request.path.startswith('/frontend/'):
-        return
     if 'user_id' not in session:
         return jsonify({'error': 'No autorizado'}), 401
 
 
-# Carpeta de uploads
-UPLOAD_DIR = ensure_dir(Path(app.config.get('UPLOAD_FOLDER', 'uploads')))
-
-
 # ==== SERVIR ASSETS DEL FRONTEND (CSS/JS/IMÁGENES) ====
-@app.route('/frontend/<path:filename>')
+@principal_bp.route('/frontend/<path:filename>')
 def serve_frontend_assets(filename):
     # Responde: http://localhost:5000/frontend/styles.css, /frontend/main.js, etc.
-    return send_from_directory(_frontend_dir(), filename)
+    # y los nombres con huella (/frontend/styles.<hash>.css) con caché inmutable
+    return _servir_frontend(filename)
 
 
 # ==== PÁGINAS PRINCIPALES (LANDING, LOGIN, REGISTER, DASHBOARD) ====
-@app.route('/')
+@principal_bp.route('/')
 def landing():
     # Landing público
-    return send_from_directory(_frontend_dir(), 'index.html')
+    return _servir_frontend('index.html')
 
-@app.route('/login.html')
+@principal_bp.route('/login.html')
 def login_page():
     if 'user_id' in session:
         return redirect('/dashboard')
-    return send_from_directory(_frontend_dir(), 'login.html')
+    return _servir_frontend('login.html')
 
-@app.route('/register.html')
+@principal_bp.route('/register.html')
 def register_page():
     if 'user_id' in session:
         return redirect('/dashboard')
-    return send_from_directory(_frontend_dir(), 'register.html')
+    return _servir_frontend('register.html')
 
-@app.route('/dashboard')
+@principal_bp.route('/dashboard')
 def dashboard_page():
     # Protegido por sesión
     if 'user_id' not in session:
         return redirect('/login.html')
-    return send_from_directory(_frontend_dir(), 'dashboard.html')
+    return _servir_frontend('dashboard.html')
 
 
 # ==== SUBIDA Y PROCESAMIENTO DE DOCUMENTOS ====
-@app.route("/upload", methods=["POST"])
-@login_required
-def subir_documento():
+UMBRAL_IGUAL = 0.99  # ≥99% = igual
+
+
+def _sim_texto(a: str, b: str) -> float:
+    a = (a or "").strip(); b = (b or "").strip()
+    if not a and not b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _grupo_dir(nombre_visible: str) -> str:
+    # Carpeta base para el grupo (usa el "nombre original" como hoy, sin extensión)
+    return archivos_documentos.carpeta_grupo(nombre_visible)
+
+
+def _ruta_destino(grupo_visible: str, version: int, nombre_original: str) -> Path:
+    # <UPLOAD_FOLDER>/<grupo>/v{version}/<nombre_original>
+    base = _upload_dir()
+    carpeta = base / _grupo_dir(grupo_visible) / f"v{version}"
+    carpeta.mkdir(parents=True, exist_ok=True)
+    return carpeta / nombre_original
+
+
+def _extraer(entrada: dict) -> None:
+    """Extrae texto/patrones de una entrada (se ejecuta en el pool de hilos, con límites por archivo)."""
+    try:
+        entrada["texto"], entrada["patrones"] = extraer_aislado(entrada["data"], entrada["tipo"])
+    except Exception as ex:
+        entrada["error_extraccion"] = ex
+
+
+def _versiones_por_grupo(grupos: set) -> tuple[dict, dict]:
     """
-    Cambios:
-    - Se guarda SIEMPRE con el nombre ORIGINAL del archivo.
-    - La versión se maneja con subcarpetas: <UPLOAD_DIR>/<grupo_sanitizado>/v{version}/<nombre_original>
-    - Si difiere ≥1% y el nombre coincide (mismo grupo), pide decisión (409) o aplica estrategia replace/new_version.
-    - El campo Documento.nombre guarda el NOMBRE ORIGINAL (no la ruta).
+    Carga en una consulta proyectada (sin `contenido`) las versiones de todos los grupos,
+    y en otra solo los Documento de la última versión de cada grupo.
+
+    Returns:
+        (grupo -> [(id, version, hash)] ordenado por versión desc, grupo -> Documento última versión)
     """
-    try:
-        archivos = request.files.getlist("archivo")
-        if not archivos:
-            return jsonify({"error": "No se recibieron archivos"}), 400
+    versiones = {}
+    if not grupos:
+        return versiones, {}
+    filas = (db.session.query(Documento.id, Documento.grupo, Documento.version, Documento.hash_contenido)
+             .filter(Documento.grupo.in_(grupos))
+             .order_by(Documento.grupo, Documento.version.desc())
+             .all())
+    for fila in filas:
+        versiones.setdefault(fila.grupo, []).append((fila.id, fila.version, fila.hash_contenido))
+
+    ultimas_ids = [lista[0][0] for lista in versiones.values()]
+    ultimas = {doc.grupo: doc for doc in Documento.query.filter(Documento.id.in_(ultimas_ids)).all()} if ultimas_ids else {}
+    return versiones, ultimas
+
+
+def _procesar_subidas(entradas: list[dict], estrategia: str, usuario_id) -> list[dict]:
+    """
+    Procesa un lote de archivos ya validados en una sola transacción.
 
-        estrategia = (request.form.get("estrategia") or request.args.get("estrategia") or "").strip().lower()
-        resultados = []
-        UMBRAL_IGUAL = 0.99  # ≥99% = igual
-
-        def _sim_texto(a: str, b: str) -> float:
-            a = (a or "").strip(); b = (b or "").strip()
-            if not a and not b:
-                return 1.0
-            return SequenceMatcher(None, a, b).ratio()
-
-        def _grupo_dir(nombre_visible: str) -> str:
-            # Carpeta base para el grupo (usa el "nombre original" como hoy, sin extensión)
-            stem = Path(nombre_visible).stem
-            safe = secure_filename(stem) or "doc"
-            return safe
-
-        def _ruta_destino(grupo_visible: str, version: int, nombre_original: str) -> Path:
-            # <UPLOAD_DIR>/<grupo>/v{version}/<nombre_original>
-            base = Path(UPLOAD_DIR)
-            carpeta = base / _grupo_dir(grupo_visible) / f"v{version}"
-            carpeta.mkdir(parents=True, exist_ok=True)
-            return carpeta / nombre_original
+    Cada entrada es {"nombre_original", "tipo", "data"} y, si viene de una subida por partes,
+    "hash" (ya calculado) y "ruta_parcial" (se mueve al destino). Antes de tocar la BD se consulta
+    la caché de extracción por hash y solo se extraen (en paralelo) los archivos que no
+    estén; después se consultan todos los grupos de una vez y se hace un único commit.
+    Devuelve un resultado por archivo, en el mismo orden.
+    """
+    for entrada in entradas:
+        if "hash" not in entrada:
+            entrada["hash"] = hash_file(BytesIO(entrada["data"]))
+
+    en_cache = cache_extraccion.obtener_varios({e["hash"] for e in entradas}, version_extractor())
+    por_extraer = {}  # hash -> entrada (bytes idénticos en el lote se extraen una vez)
+    for entrada in entradas:
+        if entrada["hash"] in en_cache:
+            entrada["texto"], entrada["patrones"] = en_cache[entrada["hash"]]
+        else:
+            por_extraer.setdefault(entrada["hash"], entrada)
 
-        for file_storage in archivos:
-            # --- 1) Validación / preparación ---
-            nombre_archivo_final, data = ensure_allowed_and_name(file_storage)
-            hash_nuevo = hash_file(BytesIO(data))
+    hilos = max(1, min(len(por_extraer), int(current_app.config.get("UPLOAD_HILOS", 4))))
+    if hilos == 1:
+        for entrada in por_extraer.values():
+            _extraer(entrada)
+    else:
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            list(pool.map(_extraer, por_extraer.values()))
+
+    extraidos = {}
+    for entrada in entradas:
+        origen = por_extraer.get(entrada["hash"])
+        if origen is None:
+            continue
+        if "error_extraccion" in origen:
+            entrada["error_extraccion"] = origen["error_extraccion"]
+        else:
+            entrada["texto"], entrada["patrones"] = origen["texto"], origen["patrones"]
+            extraidos[entrada["hash"]] = (origen["texto"], origen["patrones"])
 
-            nombre_original = secure_filename(Path(file_storage.filename).name)
-            tipo_subida = Path(nombre_archivo_final).suffix.lower().lstrip(".")
+    # Categorías de todo el lote de una vez (el motor "modelo" clasifica en bloque)
+    categorizables = [e for e in entradas if "texto" in e]
+    categorias = categorizar_lote([(e["nombre_original"], e["texto"] or "", e["patrones"] or {})
+                                   for e in categorizables])
+    for entrada, categoria in zip(categorizables, categorias):
+        entrada["categoria"] = categoria
 
-            # Regla actual de agrupación por nombre visible (tú ya la usas)
+    # Regla actual de agrupación por nombre visible
+    versiones, ultimas = _versiones_por_grupo({e["nombre_original"] for e in entradas})
+
+    resultados = []
+    pendientes = []  # (resultado, documento) a completar con el id tras el commit
+    guardados = []   # entradas escritas en disco (vistas previas tras el commit)
+    escrituras = archivos_documentos.EscriturasPendientes()  # temporales, se colocan tras el commit
+    diferencias = []  # (hash, texto) anterior y nuevo de cada versión nueva o reemplazada, para precalcular su diff
+
+    try:
+        for entrada in entradas:
+            nombre_original = entrada["nombre_original"]
+            tipo_subida = entrada["tipo"]
+            data = entrada["data"]
+            hash_nuevo = entrada["hash"]
             grupo = nombre_original
 
-            # Extraer texto (antes de escribir a disco)
-            try:
-                texto_nuevo, patrones_nuevo = extraer_contenido(BytesIO(data), tipo_subida)
-            except Exception as ex:
-                app.logger.error(f"Error extrayendo contenido de {nombre_original}: {ex}")
-                resultados.append({"nombre": nombre_original, "error": "Error extrayendo contenido"})
+            if "error_extraccion" in entrada:
+                error = entrada["error_extraccion"]
+                current_app.logger.error(f"Error extrayendo contenido de {nombre_original}: {error}")
+                if isinstance(error, ExtraccionFallida) and error.motivo != "error":
+                    resultados.append({"nombre": nombre_original, "error": error.mensaje, "error_code": error.codigo})
+                else:
+                    resultados.append({"nombre": nombre_original, "error": "Error extrayendo contenido"})
                 continue
-
-            # --- 2) Buscar versiones previas del mismo grupo ---
-            versiones = (Documento.query
-                         .filter_by(grupo=grupo)
-                         .order_by(Documento.version.desc())
-                         .all())
+            texto_nuevo = entrada["texto"]
 
             # Duplicado exacto por hash
-            duplicado = next((doc for doc in versiones if doc.hash_contenido == hash_nuevo), None)
+            lista = versiones.get(grupo, [])
+            duplicado = next((v for v in lista if v[2] == hash_nuevo), None)
             if duplicado:
                 resultados.append({
                     "nombre": nombre_original,
-                    "error": f"Ya existe una versión con el mismo contenido (v{duplicado.version})"
+                    "error": f"Ya existe una versión con el mismo contenido (v{duplicado[1]})"
                 })
                 continue
 
-            if versiones:
-                actual = versiones[0]  # última versión
+            actual = ultimas.get(grupo)
+            if actual is not None:
                 sim = _sim_texto(texto_nuevo, actual.contenido or "")
 
                 if sim >= UMBRAL_IGUAL:
@@ -213,16 +313,28 @@ def subir_documento():
                 if estrategia == "replace":
                     # Guardar en el MISMO path de la versión actual, con el nombre ORIGINAL (actual.nombre)
                     destino = _ruta_destino(actual.grupo, actual.version, actual.nombre)
-                    destino.write_bytes(data)
-
-                    categoria = categorizar(nombre_original, texto_nuevo or "", patrones_nuevo or {})
-                    # Mantener nombre original en DB:
-                    actual.contenido = texto_nuevo
+                    escrituras.preparar(destino, data, entrada.pop("ruta_parcial", None))
+                    guardados.append(entrada)
+
+                    categoria = entrada["categoria"]
+                    antes = estadisticas.instantanea(actual)
+                    # Versión anterior a la reemplazada: su diferencia con el contenido nuevo
+                    id_previa = max((v for v in lista if v[1] < actual.version), key=lambda v: v[1], default=(None,))[0]
+                    previa = db.session.get(Documento, id_previa) if id_previa is not None else None
+                    # Mantener nombre original en DB (las versiones que dependan de esta como base pasan a completas):
+                    materializar_dependientes(actual)
+                    base = db.session.get(Documento, actual.delta_base_id) if actual.delta_base_id else None
+                    asignar_contenido(actual, texto_nuevo, base, int(current_app.config.get("DELTA_KEYFRAME_CADA", 10)))
                     actual.categoria = categoria
                     actual.hash_contenido = hash_nuevo
                     actual.fecha_subida = date.today().isoformat()
                     actual.tipo = Path(actual.nombre).suffix.lower().lstrip(".") or tipo_subida
-                    db.session.commit()
+                    actual.tamano = len(data)
+                    estadisticas.registrar_cambio(antes, actual)
+                    entidades.indexar(actual, texto_nuevo, reemplazar=True)
+                    if previa is not None:
+                        diferencias.append((previa.hash_contenido, previa.contenido, hash_nuevo, texto_nuevo, actual.tipo))
+                    versiones[grupo] = [(actual.id, actual.version, hash_nuevo)] + [v for v in lista if v[0] != actual.id]
 
                     resultados.append({
                         "mensaje": f"Documento reemplazado (v{actual.version})",
@@ -235,111 +347,408 @@ def subir_documento():
 
                 # estrategia == "new_version" → crear nueva subcarpeta v{n+1}, conservar nombre original
                 version = actual.version + 1
-                destino = _ruta_destino(grupo, version, nombre_original)
-                destino.write_bytes(data)
-
-                categoria = categorizar(nombre_original, texto_nuevo or "", patrones_nuevo or {})
-
-                nuevo_doc = Documento(
-                    nombre=nombre_original,               # ← Guarda SOLO el nombre original
-                    tipo=Path(nombre_original).suffix.lower().lstrip("."),
-                    contenido=texto_nuevo,
-                    categoria=categoria,
-                    fecha_subida=date.today().isoformat(),
-                    version=version,
-                    grupo=grupo,
-                    hash_contenido=hash_nuevo,
-                    usuario_id=session.get('user_id')
-                )
-                db.session.add(nuevo_doc)
-                db.session.commit()
-
-                resultados.append({
-                    "mensaje": f"Documento guardado como versión {version}",
-                    "categoria": categoria,
-                    "version": version,
-                    "nombre_visible": nombre_original,
-                    "id": nuevo_doc.id
-                })
+                mensaje = f"Documento guardado como versión {version}"
             else:
                 # Primera versión (v1), conservar nombre original
                 version = 1
-                destino = _ruta_destino(grupo, version, nombre_original)
-                destino.write_bytes(data)
-
-                categoria = categorizar(nombre_original, texto_nuevo or "", patrones_nuevo or {})
-
-                nuevo_doc = Documento(
-                    nombre=nombre_original,               # ← Guarda SOLO el nombre original
-                    tipo=Path(nombre_original).suffix.lower().lstrip("."),
-                    contenido=texto_nuevo,
-                    categoria=categoria,
-                    fecha_subida=date.today().isoformat(),
-                    version=version,
-                    grupo=grupo,
-                    hash_contenido=hash_nuevo,
-                    usuario_id=session.get('user_id')
-                )
-                db.session.add(nuevo_doc)
-                db.session.commit()
+                mensaje = f"Documento guardado como versión {version}"
+
+            destino = _ruta_destino(grupo, version, nombre_original)
+            escrituras.preparar(destino, data, entrada.pop("ruta_parcial", None))
+            guardados.append(entrada)
+
+            categoria = entrada["categoria"]
+
+            nuevo_doc = Documento(
+                nombre=nombre_original,               # ← Guarda SOLO el nombre original
+                tipo=Path(nombre_original).suffix.lower().lstrip("."),
+                categoria=categoria,
+                fecha_subida=date.today().isoformat(),
+                version=version,
+                grupo=grupo,
+                hash_contenido=hash_nuevo,
+                tamano=len(data),
+                usuario_id=usuario_id
+            )
+            if actual is not None and actual.id is None:
+                db.session.flush()  # la versión anterior es de este mismo lote: necesita id para el delta
+            if actual is not None:
+                diferencias.append((actual.hash_contenido, actual.contenido, hash_nuevo, texto_nuevo, tipo_subida))
+            # Texto como delta de la versión anterior (o completo si es v1 / toca keyframe)
+            asignar_contenido(nuevo_doc, texto_nuevo, actual, int(current_app.config.get("DELTA_KEYFRAME_CADA", 10)))
+            db.session.add(nuevo_doc)
+            estadisticas.registrar_alta(nuevo_doc)
+            entidades.indexar(nuevo_doc, texto_nuevo)
+
+            # El siguiente archivo del lote con el mismo grupo ve esta versión como la actual
+            ultimas[grupo] = nuevo_doc
+            versiones[grupo] = [(None, version, hash_nuevo)] + lista
+
+            resultado = {
+                "mensaje": mensaje,
+                "categoria": categoria,
+                "version": version,
+                "nombre_visible": nombre_original,
+                "id": None
+            }
+            resultados.append(resultado)
+            pendientes.append((resultado, nuevo_doc))
+
+        # Un único commit para todo el lote
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        escrituras.descartar()
+        raise
+    # Los archivos pasan a su ruta solo con el lote ya confirmado en la BD
+    escrituras.confirmar()
 
-                resultados.append({
-                    "mensaje": f"Documento guardado como versión {version}",
-                    "categoria": categoria,
-                    "version": version,
-                    "nombre_visible": nombre_original,
-                    "id": nuevo_doc.id
-                })
+    for resultado, doc in pendientes:
+        resultado["id"] = doc.id
+
+    cache_extraccion.guardar_varios(extraidos, version_extractor())
+
+    config = current_app.config
+    if config.get("DIFERENCIAS_AL_SUBIR", True):
+        diferencias_versiones.precalcular(diferencias)
+    if config.get("VISTAS_PREVIAS_AL_SUBIR", True):
+        for entrada in guardados:
+            vistas_previas.programar(entrada["data"], entrada["tipo"], config["VISTAS_PREVIAS_DIR"], entrada["hash"],
+                                     config["VISTAS_PREVIAS_PAGINAS"], config["VISTAS_PREVIAS_ANCHOS"],
+                                     config["VISTAS_PREVIAS_HILOS"])
+    return resultados
+
+
+@principal_bp.route("/upload", methods=["POST"])
+@login_required
+@admitir("subida", contar_bytes=True)
+@perfilable
+def subir_documento():
+    """
+    Cambios:
+    - Se guarda SIEMPRE con el nombre ORIGINAL del archivo.
+    - La versión se maneja con subcarpetas: <UPLOAD_FOLDER>/<grupo_sanitizado>/v{version}/<nombre_original>
+    - Si difiere ≥1% y el nombre coincide (mismo grupo), pide decisión (409) o aplica estrategia replace/new_version.
+    - El campo Documento.nombre guarda el NOMBRE ORIGINAL (no la ruta).
+    - Varios archivos se procesan en lote: extracción en paralelo, una consulta por lote y un único commit.
+    """
+    try:
+        archivos = request.files.getlist("archivo")
+        if not archivos:
+            return jsonify({"error": "No se recibieron archivos"}), 400
+
+        estrategia = (request.form.get("estrategia") or request.args.get("estrategia") or "").strip().lower()
+
+        entradas = []
+        for file_storage in archivos:
+            # --- Validación / preparación ---
+            nombre_archivo_final, data = ensure_allowed_and_name(file_storage)
+            entradas.append({
+                "nombre_original": secure_filename(Path(file_storage.filename).name),
+                "tipo": Path(nombre_archivo_final).suffix.lower().lstrip("."),
+                "data": data,
+            })
+
+        resultados = _procesar_subidas(entradas, estrategia, session.get('user_id'))
 
         if any(r.get("requires_decision") for r in resultados):
             return jsonify(resultados), 409
 
         return jsonify(resultados)
 
+    except RequestEntityTooLarge:
+        return jsonify({"error": "Archivo demasiado grande: usa la subida por partes (/api/subidas)",
+                        "error_code": "ARCHIVO_DEMASIADO_GRANDE"}), 413
     except Exception as e:
         traceback.print_exc()
-        app.logger.error(f"Error interno en subir_documento: {e}")
+        current_app.logger.error(f"Error interno en subir_documento: {e}")
         return jsonify({"error": "Error interno"}), 500
 
 
-# ==== DOCUMENTOS ====
-@app.route("/documentos", methods=["GET"])
+# ==== SUBIDAS POR PARTES (reanudables) ====
+_CABECERA_MIME = 64 * 1024  # bytes que bastan a libmagic para reconocer PDF/CSV/OOXML
+
+
+def _error_subida(e: ErrorSubida):
+    return jsonify({"error": e.mensaje, "error_code": e.codigo}), e.estado
+
+
+def _sesion_subida(id_):
+    sesion = subidas_fragmentadas.obtener(id_, session.get('user_id'))
+    if sesion is None:
+        raise ErrorSubida("Subida no encontrada o caducada", "SUBIDA_NO_ENCONTRADA", 404)
+    return sesion
+
+
+@principal_bp.route("/api/subidas", methods=["POST"])
 @login_required
-def obtener_documentos():
-    documentos = Documento.query.all()
-    return jsonify([{
-        "id": doc.id,
-        "nombre": doc.nombre,
-        "tipo": doc.tipo,
-        "categoria": doc.categoria,
-        "fecha": doc.fecha_subida
-    } for doc in documentos])
+def crear_subida():
+    """Abre una subida por partes: {"nombre", "tamano"[, "tamano_parte"]} -> estado con id."""
+    datos = request.get_json(silent=True) or {}
+    nombre, ext = ensure_allowed_name(str(datos.get("nombre") or ""))
+    config = current_app.config
+    maximo_parte = int(config["SUBIDAS_TAMANO_PARTE"])
+    if config.get("MAX_CONTENT_LENGTH"):  # None = sin límite por petición
+        maximo_parte = min(maximo_parte, int(config["MAX_CONTENT_LENGTH"]))
+    try:
+        tamano = int(datos.get("tamano") or 0)
+        tamano_parte = min(int(datos.get("tamano_parte") or maximo_parte), maximo_parte)
+        if tamano_parte <= 0:
+            raise ValueError
+        sesion = subidas_fragmentadas.crear(config["SUBIDAS_DIR"], session.get('user_id'), nombre, ext.lstrip("."),
+                                            tamano, tamano_parte, int(config["SUBIDAS_MAX_BYTES"]))
+    except (TypeError, ValueError):
+        return jsonify({"error": "tamano y tamano_parte deben ser enteros positivos"}), 400
+    except ErrorSubida as e:
+        return _error_subida(e)
+    return jsonify(subidas_fragmentadas.estado(sesion)), 201
+
+
+@principal_bp.route("/api/subidas/<id_>", methods=["GET"])
+@login_required
+def estado_subida(id_):
+    """Bytes recibidos y siguiente parte esperada: desde dónde reanudar."""
+    try:
+        return jsonify(subidas_fragmentadas.estado(_sesion_subida(id_)))
+    except ErrorSubida as e:
+        return _error_subida(e)
 
 
-@app.route("/documentos/<int:id>", methods=["GET"])
+@principal_bp.route("/api/subidas/<id_>/partes/<int:numero>", methods=["PUT"])
+@login_required
+@admitir("subida", contar_bytes=True)
+def subir_parte(id_, numero):
+    """Parte `numero` (desde 0) en el cuerpo, con su SHA-256 en X-Checksum-SHA256."""
+    try:
+        sesion = _sesion_subida(id_)
+        return jsonify(subidas_fragmentadas.recibir_parte(sesion, current_app.config["SUBIDAS_DIR"], numero,
+                                                          request.get_data(cache=False),
+                                                          request.headers.get("X-Checksum-SHA256")))
+    except ErrorSubida as e:
+        return _error_subida(e)
+
+
+@principal_bp.route("/api/subidas/<id_>/finalizar", methods=["POST"])
+@login_required
+@admitir("subida")
+def finalizar_subida(id_):
+    """
+    Pasa el archivo completo por la ingesta de /upload. Acepta {"estrategia", "sha256"}:
+    con "sha256" se comprueba el archivo entero. Si la ingesta pide decisión (409) la
+    sesión se conserva para volver a finalizar con una estrategia sin resubir nada.
+    """
+    directorio = current_app.config["SUBIDAS_DIR"]
+    datos = request.get_json(silent=True) or {}
+    try:
+        sesion = _sesion_subida(id_)
+        if sesion.recibido < sesion.tamano:
+            raise ErrorSubida(f"Faltan {sesion.tamano - sesion.recibido} bytes", "SUBIDA_INCOMPLETA", 409)
+        hash_ = subidas_fragmentadas.sha256(sesion, directorio)
+        esperado = str(datos.get("sha256") or "").strip().lower()
+        if esperado and esperado != hash_:
+            subidas_fragmentadas.descartar(sesion, directorio)
+            raise ErrorSubida("El archivo recibido no coincide con el sha256 indicado", "CHECKSUM_INVALIDO")
+    except ErrorSubida as e:
+        return _error_subida(e)
+
+    ruta = subidas_fragmentadas.ruta_parcial(directorio, sesion.id)
+    # El tipo real se comprueba con la cabecera antes de cargar el archivo entero
+    with open(ruta, "rb") as f:
+        check_mime(f".{sesion.tipo}", f.read(_CABECERA_MIME))
+    data = Path(ruta).read_bytes()  # la ingesta trabaja en memoria: de ahí SUBIDAS_MAX_BYTES
+    estrategia = str(datos.get("estrategia") or request.args.get("estrategia") or "").strip().lower()
+    try:
+        resultados = _procesar_subidas([{"nombre_original": sesion.nombre, "tipo": sesion.tipo, "data": data,
+                                         "hash": hash_, "ruta_parcial": ruta}],
+                                       estrategia, session.get('user_id'))
+    except Exception as e:
+        traceback.print_exc()
+        current_app.logger.error(f"Error interno en finalizar_subida: {e}")
+        return jsonify({"error": "Error interno"}), 500
+
+    if any(r.get("requires_decision") for r in resultados):
+        return jsonify(resultados), 409
+    subidas_fragmentadas.descartar(sesion, directorio)
+    return jsonify(resultados)
+
+
+@principal_bp.route("/api/subidas/<id_>", methods=["DELETE"])
+@login_required
+def cancelar_subida(id_):
+    try:
+        subidas_fragmentadas.descartar(_sesion_subida(id_), current_app.config["SUBIDAS_DIR"])
+    except ErrorSubida as e:
+        return _error_subida(e)
+    return jsonify({"mensaje": "Subida cancelada"})
+
+
+# ==== DOCUMENTOS ====
+@principal_bp.route("/documentos", methods=["GET"])
+@login_required
+def obtener_documentos():
+    # Consulta proyectada (sin `contenido`) leída por bloques y enviada en streaming
+    filas = (db.session.query(Documento.id, Documento.nombre, Documento.tipo,
+                              Documento.categoria, Documento.fecha_subida)
+             .order_by(Documento.id)
+             .yield_per(TAMANO_BLOQUE))
+    return lista_json_en_streaming(
+        DocumentoResumen(id=f.id, nombre=f.nombre, tipo=f.tipo, categoria=f.categoria, fecha=f.fecha_subida)
+        for f in filas
+    )
+
+
+@principal_bp.route("/documentos/<int:id>", methods=["GET"])
 @login_required
 def obtener_documento(id):
     doc = Documento.query.get_or_404(id)
-    return jsonify({
-        "id": doc.id,
-        "nombre": doc.nombre,
-        "tipo": doc.tipo,
-        "categoria": doc.categoria,
-        "contenido": doc.contenido,
-        "fecha": doc.fecha_subida
-    })
+    return respuesta_json(DocumentoDetalle(
+        id=doc.id,
+        nombre=doc.nombre,
+        tipo=doc.tipo,
+        categoria=doc.categoria,
+        contenido=doc.contenido,
+        fecha=doc.fecha_subida
+    ))
 
 
-@app.route("/documentos/<int:id>", methods=["DELETE"])
+@principal_bp.route("/documentos/<int:id>", methods=["DELETE"])
 @login_required
 def eliminar_documento(id):
     doc = Documento.query.get_or_404(id)
+    ruta = ruta_fisica_de_documento(doc)
+    materializar_dependientes(doc)
+    estadisticas.registrar_baja(doc)
+    # El archivo se borra después, en la cola de borrados (lápida en la misma transacción)
+    if ruta.exists():
+        archivos_documentos.marcar_para_borrado(_upload_dir(), [ruta])
+    # Explícito: con SQLITE_FOREIGN_KEYS desactivado SQLite no aplica el ON DELETE CASCADE
+    entidades.borrar(doc.id)
     db.session.delete(doc)
     db.session.commit()
     return jsonify({"mensaje": "Documento eliminado"})
 
 
-@app.route("/documentos/<int:doc_id>/descargar")
+@principal_bp.route("/api/estadisticas", methods=["GET"])
+@login_required
+def obtener_estadisticas():
+    """Totales y desglose por categoría, tipo, usuario y día (mantenidos al subir/eliminar)."""
+    return respuesta_json(estadisticas.obtener_estadisticas())
+
+
+# ==== ENTIDADES (IPs, hosts, inventario indexados al subir) ====
+def _limite(nombre: str, defecto: int, maximo: int) -> int:
+    try:
+        return max(1, min(int(request.args.get(nombre, defecto)), maximo))
+    except ValueError:
+        return defecto
+
+
+@principal_bp.route("/api/entidades/ips")
+@login_required
+def buscar_ips():
+    """?red=10.0.3.0/24 | 10.0.3.7 | 10.0.3. | 10.0.3.1-10.0.3.50 [&categoria=X]: documentos que la mencionan."""
+    red = request.args.get("red", "")
+    try:
+        resultado = entidades.documentos_con_ips(red, request.args.get("categoria"), _limite("limite", 500, 5000))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return respuesta_json(resultado)
+
+
+@principal_bp.route("/api/entidades/hosts")
+@login_required
+def buscar_hosts():
+    """?categoria=X [&prefijo=srv-]: hostnames con los documentos que los mencionan."""
+    return respuesta_json(entidades.hosts(request.args.get("categoria"), request.args.get("prefijo"),
+                                          _limite("limite", 1000, 10000)))
+
+
+@principal_bp.route("/api/entidades/inventario")
+@login_required
+def buscar_inventario():
+    """?categoria=X &documento=id &marca=M &q=texto (código o descripción), paginado con limite/desde."""
+    documento = request.args.get("documento", type=int)
+    return respuesta_json(entidades.items_inventario(
+        categoria=request.args.get("categoria"), documento_id=documento, texto=request.args.get("q"),
+        marca=request.args.get("marca"), limite=_limite("limite", 500, 5000),
+        desde=request.args.get("desde", 0, type=int)))
+
+
+@principal_bp.route("/api/documentos/<int:doc_id>/entidades")
+@login_required
+def entidades_documento(doc_id):
+    Documento.query.get_or_404(doc_id)
+    return respuesta_json(entidades.resumen_documento(doc_id))
+
+
+# ==== VERSIONES DE UN GRUPO ====
+def _versiones_de(grupo: str) -> list:
+    """Versiones del grupo ordenadas (consulta proyectada sobre ix_documentos_grupo_version)."""
+    return (db.session.query(Documento.id, Documento.version, Documento.nombre, Documento.tipo, Documento.categoria,
+                             Documento.fecha_subida, Documento.tamano, Documento.hash_contenido)
+            .filter(Documento.grupo == grupo)
+            .order_by(Documento.version)
+            .all())
+
+
+@principal_bp.route("/api/grupos/<grupo>/versiones")
+@login_required
+def versiones_grupo(grupo):
+    """Historial del grupo; "cambios" resume la diferencia con la versión anterior si ya está calculada."""
+    filas = _versiones_de(grupo)
+    if not filas:
+        return jsonify({"error": "Grupo no encontrado"}), 404
+    resumenes = diferencias_versiones.resumenes(
+        (a.hash_contenido, b.hash_contenido) for a, b in zip(filas, filas[1:]))
+    versiones = []
+    for anterior, fila in zip([None, *filas], filas):
+        versiones.append({
+            "id": fila.id,
+            "version": fila.version,
+            "nombre": fila.nombre,
+            "tipo": fila.tipo,
+            "categoria": fila.categoria,
+            "fecha_subida": fila.fecha_subida,
+            "tamano": fila.tamano,
+            "hash": fila.hash_contenido,
+            "cambios": resumenes.get((anterior.hash_contenido, fila.hash_contenido)) if anterior else None,
+        })
+    return respuesta_json({"grupo": grupo, "versiones": versiones})
+
+
+@principal_bp.route("/api/grupos/<grupo>/diff")
+@login_required
+def diff_grupo(grupo):
+    """
+    Diferencia entre dos versiones: ?from=<versión>&to=<versión>. Por defecto `to` es la
+    última y `from` la versión anterior a `to`. Por líneas (PDF/DOCX) o por filas (XLSX/CSV).
+    """
+    filas = _versiones_de(grupo)
+    if not filas:
+        return jsonify({"error": "Grupo no encontrado"}), 404
+    por_version = {f.version: f for f in filas}
+    try:
+        hasta = int(request.args.get("to") or filas[-1].version)
+        previas = [f.version for f in filas if f.version < hasta]
+        desde = int(request.args.get("from") or (previas[-1] if previas else hasta))
+    except ValueError:
+        return jsonify({"error": "from y to deben ser números de versión"}), 400
+    if desde not in por_version or hasta not in por_version:
+        return jsonify({"error": "Versión no encontrada"}), 404
+    a, b = por_version[desde], por_version[hasta]
+
+    def textos():
+        docs = {d.id: d for d in Documento.query.filter(Documento.id.in_({a.id, b.id})).all()}
+        return docs[a.id].contenido or "", docs[b.id].contenido or ""
+
+    if a.hash_contenido and b.hash_contenido:
+        diferencia = diferencias_versiones.obtener_o_calcular(a.hash_contenido, b.hash_contenido, textos, b.tipo)
+    else:
+        diferencia = diferencias_versiones.diferenciar(*textos(), b.tipo)
+    return respuesta_json({"grupo": grupo, "desde": desde, "hasta": hasta, **diferencia})
+
+
+@principal_bp.route("/documentos/<int:doc_id>/descargar")
 @login_required
 def descargar(doc_id):
     doc = Documento.query.get_or_404(doc_id)
@@ -349,7 +758,73 @@ def descargar(doc_id):
     return send_file(str(path), as_attachment=True, download_name=doc.nombre)
 
 
-@app.route("/documentos/<nombre_archivo>")
+@principal_bp.route("/api/exportar", methods=["POST"])
+@login_required
+@admitir("exportar")
+def exportar_documentos():
+    """
+    ZIP (generado en streaming) con los documentos indicados por {"ids": [...]} o por un filtro:
+    {"categoria", "desde", "hasta" (YYYY-MM-DD), "grupo", "versiones": "ultima" | "todas"}.
+    Un grupo se exporta con todas sus versiones; el resto de filtros, solo la última de cada grupo.
+    """
+    datos = request.get_json(silent=True) or {}
+    consulta = db.session.query(Documento.id, Documento.nombre, Documento.grupo, Documento.version,
+                                Documento.categoria, Documento.fecha_subida, Documento.tipo,
+                                Documento.tamano, Documento.hash_contenido)
+    ids = datos.get("ids")
+    if ids is not None:
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+            return jsonify({"error": "'ids' debe ser una lista de enteros"}), 400
+        consulta = consulta.filter(Documento.id.in_(ids))
+        filtro = {"ids": ids}
+    else:
+        filtro = {k: datos[k] for k in ("categoria", "desde", "hasta", "grupo") if datos.get(k)}
+        if not filtro:
+            return jsonify({"error": "Indica 'ids' o un filtro (categoria, desde, hasta, grupo)"}), 400
+        for clave in ("desde", "hasta"):
+            try:
+                if clave in filtro:
+                    date.fromisoformat(str(filtro[clave]))
+            except ValueError:
+                return jsonify({"error": f"'{clave}' debe ser una fecha YYYY-MM-DD"}), 400
+        if "categoria" in filtro:
+            consulta = consulta.filter(Documento.categoria == filtro["categoria"])
+        if "desde" in filtro:
+            consulta = consulta.filter(Documento.fecha_subida >= filtro["desde"])
+        if "hasta" in filtro:
+            consulta = consulta.filter(Documento.fecha_subida <= filtro["hasta"])
+        if "grupo" in filtro:
+            consulta = consulta.filter(Documento.grupo == filtro["grupo"])
+        filtro["versiones"] = datos.get("versiones") or ("todas" if "grupo" in filtro else "ultima")
+        if filtro["versiones"] not in ("ultima", "todas"):
+            return jsonify({"error": "'versiones' debe ser 'ultima' o 'todas'"}), 400
+        if filtro["versiones"] == "ultima":
+            ultimas = (db.session.query(Documento.grupo, func.max(Documento.version).label("version"))
+                       .group_by(Documento.grupo).subquery())
+            consulta = consulta.join(ultimas, and_(Documento.grupo == ultimas.c.grupo,
+                                                   Documento.version == ultimas.c.version))
+
+    maximo = int(current_app.config.get("EXPORTAR_MAX_DOCUMENTOS", 5000))
+    filas = consulta.order_by(Documento.grupo, Documento.version).limit(maximo + 1).all()
+    if not filas:
+        return jsonify({"error": "No hay documentos que exportar"}), 404
+    if len(filas) > maximo:
+        return jsonify({"error": f"La exportación supera el máximo de {maximo} documentos",
+                        "error_code": "EXPORTACION_DEMASIADO_GRANDE"}), 400
+
+    # Rutas resueltas ahora (necesitan la app); el generador solo lee archivos
+    documentos = [{
+        "id": f.id, "nombre": f.nombre, "grupo": f.grupo, "version": f.version, "categoria": f.categoria,
+        "fecha": f.fecha_subida, "tipo": f.tipo, "tamano": f.tamano, "hash": f.hash_contenido,
+        "ruta_zip": f"{_grupo_dir(f.grupo)}/v{f.version}/{f.nombre}",
+        "ruta": str(ruta_fisica_de_documento(f)),
+    } for f in filas]
+    nombre_zip = f"exportacion-{datetime.now():%Y%m%d-%H%M%S}.zip"
+    return Response(exportar.zip_en_streaming(documentos, filtro), mimetype="application/zip",
+                    headers={"Content-Disposition": f'attachment; filename="{nombre_zip}"'})
+
+
+@principal_bp.route("/documentos/<nombre_archivo>")
 @login_required
 def servir_archivo(nombre_archivo):
     # Asegura que sea un basename seguro (sin ../ ni separadores)
@@ -376,16 +851,96 @@ def servir_archivo(nombre_archivo):
                      download_name=doc.nombre)
 
 
-@app.route('/ver_docx')
+@principal_bp.route('/ver_docx')
 @login_required
 def ver_docx():
     nombre = request.args.get("nombre")
     return render_template("ver_docx.html", nombre=nombre)
 
 
+# ==== VISTAS PREVIAS (miniaturas de PDF / HTML de DOCX, por hash de contenido) ====
+def _origen_por_hash(hash_: str) -> str:
+    """Ruta del archivo original con ese hash (para generar la vista previa que falte)."""
+    doc = Documento.query.filter_by(hash_contenido=hash_).order_by(Documento.id.desc()).first()
+    path = ruta_fisica_de_documento(doc) if doc is not None else None
+    if path is None or not path.exists():
+        abort(404)
+    return str(path)
+
+
+def _respuesta_inmutable(ruta: str, mimetype: str):
+    # La URL incluye el hash: el mismo contenido siempre tiene la misma respuesta
+    respuesta = send_file(ruta, mimetype=mimetype, conditional=True, etag=True)
+    respuesta.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    return respuesta
+
+
+@principal_bp.route("/api/documentos/<int:doc_id>/vista-previa")
+@login_required
+def vista_previa_documento(doc_id):
+    """Número de páginas y URLs (con el hash del contenido) de las miniaturas o del HTML."""
+    doc = Documento.query.get_or_404(doc_id)
+    tipo = (doc.tipo or "").lower()
+    if tipo not in vistas_previas.TIPOS:
+        return jsonify({"error": "Este tipo de documento no tiene vista previa"}), 404
+    if not doc.hash_contenido:
+        path = ruta_fisica_de_documento(doc)
+        if not path.exists():
+            return jsonify({"error": "Archivo no encontrado"}), 404
+        with open(path, "rb") as f:
+            doc.hash_contenido = hash_file(f)
+        db.session.commit()
+
+    config = current_app.config
+    hash_ = doc.hash_contenido
+    try:
+        meta = vistas_previas.obtener_meta(lambda: _origen_por_hash(hash_), tipo, config["VISTAS_PREVIAS_DIR"],
+                                           hash_, config["VISTAS_PREVIAS_PAGINAS"], config["VISTAS_PREVIAS_ANCHOS"])
+    except Exception as e:
+        current_app.logger.error(f"Error generando la vista previa de {doc_id}: {e}")
+        return jsonify({"error": "No se pudo generar la vista previa"}), 500
+
+    base = f"/api/vistas-previas/{hash_}"
+    respuesta = {"id": doc.id, "tipo": tipo, "hash": hash_, "paginas": meta.get("paginas")}
+    if tipo == "pdf":
+        respuesta["anchos"] = list(config["VISTAS_PREVIAS_ANCHOS"])
+        respuesta["pagina_url"] = base + "/pagina/{pagina}/{ancho}"
+    else:
+        respuesta["html_url"] = base + "/documento.html"
+    return jsonify(respuesta)
+
+
+@principal_bp.route("/api/vistas-previas/<hash_>/pagina/<int:pagina>/<int:ancho>")
+@login_required
+def miniatura_pagina(hash_, pagina, ancho):
+    if not vistas_previas.hash_valido(hash_) or ancho not in current_app.config["VISTAS_PREVIAS_ANCHOS"]:
+        abort(404)
+    try:
+        ruta = vistas_previas.obtener_miniatura(lambda: _origen_por_hash(hash_), current_app.config["VISTAS_PREVIAS_DIR"],
+                                                hash_, pagina, ancho)
+    except LookupError:
+        abort(404)
+    return _respuesta_inmutable(ruta, "image/jpeg")
+
+
+@principal_bp.route("/api/vistas-previas/<hash_>/documento.html")
+@login_required
+def vista_previa_html(hash_):
+    if not vistas_previas.hash_valido(hash_):
+        abort(404)
+    ruta = vistas_previas.obtener_html(lambda: _origen_por_hash(hash_), current_app.config["VISTAS_PREVIAS_DIR"], hash_)
+    respuesta = _respuesta_inmutable(ruta, "text/html; charset=utf-8")
+    # Fragmento sin scripts ni recursos externos: que el navegador tampoco los permita
+    respuesta.headers["Content-Security-Policy"] = "default-src 'none'; style-src 'unsafe-inline'"
+    respuesta.headers["X-Content-Type-Options"] = "nosniff"
+    return respuesta
+
+
 # ==== GRAFICAR DATOS ====
-@app.route("/graficos")
+@principal_bp.route("/graficos")
 @login_required
+@admitir("graficos")
+@perfilable
 def graficar_datos():
     id_archivo = request.args.get("id")
     hojas = request.args.getlist("hojas")
@@ -396,6 +951,8 @@ def graficar_datos():
         return jsonify({"error": "Archivo no encontrado"}), 404
     ruta = str(path)  # <- pandas necesita str
 
+    import pandas as pd  # diferido: solo lo pagan las rutas que leen hojas de cálculo
+
     datos_para_graficar = {}
     try:
         if doc.tipo == "xlsx":
@@ -416,8 +973,10 @@ def graficar_datos():
     return render_template("graficos.html", datos=datos_para_graficar)
 
 
-@app.route("/api/hojas/<int:id_archivo>")
+@principal_bp.route("/api/hojas/<int:id_archivo>")
 @login_required
+@admitir("graficos")
+@perfilable
 def obtener_hojas_o_columnas(id_archivo):
     doc = Documento.query.get_or_404(id_archivo)
     path = ruta_fisica_de_documento(doc)
@@ -425,6 +984,8 @@ def obtener_hojas_o_columnas(id_archivo):
         return jsonify({"error": "Archivo no encontrado"}), 404
     ruta = str(path)
 
+    import pandas as pd
+
     try:
         if doc.tipo == "xlsx":
             return jsonify(list(pd.read_excel(ruta, sheet_name=None).keys()))
@@ -436,82 +997,118 @@ def obtener_hojas_o_columnas(id_archivo):
         return jsonify({"error": f"Error procesando archivo: {str(e)}"}), 500
 
 
-@app.route("/api/graficos-multiples", methods=["POST"])
+@principal_bp.route("/api/graficos-multiples", methods=["POST"])
 @login_required
+@admitir("graficos")
+@perfilable
 def graficos_multiples():
+    """
+    [{"id": 1, "hojas": [...]}, ...] -> {"<nombre> - <hoja>": serie, ...}
+
+    Los documentos se cargan en una sola consulta y sus archivos se leen en paralelo
+    (utils/graficos.py) con un presupuesto de GRAFICOS_TIEMPO_MAX segundos: las entradas
+    que no terminan a tiempo llevan su error y el resto se devuelve igualmente.
+    """
     datos = request.get_json()
     if not isinstance(datos, list):
         return jsonify({"error": "Formato inválido"}), 400
 
-    resultado = {}
-
+    # Hojas pedidas por documento (varias entradas del mismo id se leen una vez)
+    hojas_por_id = {}
     for entrada in datos:
-        id_archivo = entrada.get("id")
-        hojas = entrada.get("hojas", [])
+        if not isinstance(entrada, dict):
+            continue
+        id_archivo, hojas = entrada.get("id"), entrada.get("hojas") or []
         if not id_archivo or not hojas:
             continue
-
-        doc = Documento.query.get(id_archivo)
-        if not doc:
+        pedidas = hojas_por_id.setdefault(id_archivo, [])
+        pedidas.extend(h for h in hojas if h not in pedidas)
+
+    filas = (db.session.query(Documento.id, Documento.nombre, Documento.grupo, Documento.version, Documento.tipo)
+             .filter(Documento.id.in_(list(hojas_por_id)))
+             .all()) if hojas_por_id else []
+    por_id = {f.id: f for f in filas}
+
+    errores, documentos = [], []
+    for id_archivo, hojas in hojas_por_id.items():
+        doc = por_id.get(id_archivo)
+        if doc is None or doc.tipo not in ("xlsx", "csv"):
             continue
-
         path = ruta_fisica_de_documento(doc)
         if not path.exists():
-            resultado[doc.nombre] = [{"error": "Archivo no encontrado"}]
+            errores.append((doc.nombre, [{"error": "Archivo no encontrado"}]))
             continue
-        ruta = str(path)
-
-        try:
-            if doc.tipo == "xlsx":
-                hojas_dict = pd.read_excel(ruta, sheet_name=hojas)
-            elif doc.tipo == "csv":
-                df = pd.read_csv(ruta)
-                hojas_dict = {col: df[[col]] for col in hojas if col in df.columns}
-            else:
-                continue
+        documentos.append({"nombre": doc.nombre, "ruta": str(path), "tipo": doc.tipo, "hojas": hojas})
 
-            for hoja, df in hojas_dict.items():
-                if df.empty:
-                    continue
-                etiquetas = df.iloc[:, 0].astype(str).tolist()
-                valores = df.iloc[:, 1].fillna(0).astype(float).tolist() if df.shape[1] > 1 else df.iloc[:, 0].tolist()
-                clave = f"{doc.nombre} - {hoja}"
-                resultado[clave] = [
-                    {df.columns[0]: e, df.columns[1] if df.shape[1] > 1 else df.columns[0]: v}
-                    for e, v in zip(etiquetas, valores)
-                ]
-        except Exception as e:
-            resultado[doc.nombre] = [{"error": f"Error: {str(e)}"}]
+    config = current_app.config
+    series = graficos.series_en_paralelo(documentos, int(config.get("GRAFICOS_PROCESOS", 4)),
+                                         float(config.get("GRAFICOS_TIEMPO_MAX", 20)))
+    # Cada serie se envía en cuanto está lista, sin acumular el resultado completo
+    return objeto_json_en_streaming(chain(errores, series))
 
-    return jsonify(resultado)
 
-
-@app.route("/validar_graficable", methods=["POST"])  # (No usada si no haces validación previa)
+@principal_bp.route("/validar_graficable", methods=["POST"])  # (No usada si no haces validación previa)
 @login_required
+@admitir("graficos", contar_bytes=True)
+@perfilable
 def validar_graficable():
     archivo = request.files.get("archivo")
     if not archivo:
         return jsonify({"error": "No se recibió archivo"}), 400
 
     nombre_tmp, data = ensure_allowed_and_name(archivo, allowed_exts={".xlsx", ".csv"})
-    ruta_tmp = str(UPLOAD_DIR / f"tmp_{nombre_tmp}")
+
+    # El mismo archivo se valida una sola vez (veredicto en la caché de extracción)
+    hash_archivo = hash_file(BytesIO(data))
+    muestra_filas = current_app.config.get("GRAFICABLE_MUESTRA_FILAS", 1000)
+    en_cache = cache_extraccion.obtener(hash_archivo, clave_graficable(muestra_filas))
+    if en_cache is not None:
+        if db.session.dirty:
+            db.session.commit()  # persiste la marca LRU (solo si se renovó)
+        return jsonify(en_cache[1])
 
     try:
-        Path(ruta_tmp).write_bytes(data)
-        es_valido = es_graficable(ruta_tmp)
+        # Muestra acotada leída de memoria: no se escribe temporal en UPLOAD_FOLDER
+        veredicto = evaluar_graficable(data, Path(nombre_tmp).suffix.lower(), muestra_filas)
     except Exception as e:
-        app.logger.error(f"Error validando graficable: {e}")
+        current_app.logger.error(f"Error validando graficable: {e}")
         return jsonify({"error": "Error interno"}), 500
-    finally:
-        try:
-            os.remove(ruta_tmp)
-        except Exception as e:
-            app.logger.warning(f"No se pudo eliminar temporal: {e}")
 
-    return jsonify({"graficable": es_valido})
+    if "error" not in veredicto:  # un fallo de lectura no es un veredicto: se reintenta la próxima vez
+        cache_extraccion.guardar_varios({hash_archivo: (None, veredicto)}, clave_graficable(muestra_filas))
+    return jsonify(veredicto)
+
+
+# ==== PERFILES (solo admin) ====
+@principal_bp.route("/api/admin/perfiles")
+@admin_required
+def listar_perfiles_guardados():
+    return jsonify(listar_perfiles())
+
+
+@principal_bp.route("/api/admin/perfiles/<nombre>")
+@admin_required
+def descargar_perfil(nombre):
+    seguro = secure_filename(nombre)
+    if not seguro.endswith(".prof"):
+        return jsonify({"error": "Nombre inválido"}), 400
+    return send_from_directory(str(directorio_perfiles()), seguro, as_attachment=True)
+
+
+@principal_bp.route("/api/admin/cache-extraccion")
+@admin_required
+def estadisticas_cache_extraccion():
+    return jsonify(cache_extraccion.estadisticas())
+
+
+@principal_bp.route("/api/admin/admision")
+@admin_required
+def metricas_admision():
+    """Cola, espera y rechazos del control de admisión de este proceso."""
+    return jsonify(admision.metricas())
 
 
-@app.route('/api/check-session')
+@principal_bp.route('/api/check-session')
 def check_session():
     if 'user_id' in session:
         return jsonify({"logged_in": True})
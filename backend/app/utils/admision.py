@@ -0,0 +1,259 @@
+# backend/app/utils/admision.py
+"""
+Control de admisión para endpoints costosos.
+
+Cada clase de endpoint ("subida", "graficos") tiene un máximo de peticiones en curso y
+una cola de espera acotada. Si la cola está llena, o la espera supera ADMISION_ESPERA_MAX,
+se responde 503 con Retry-After en lugar de acumular trabajo y memoria; así las
+peticiones baratas (páginas, listados) no se quedan sin hilos ni CPU.
+
+Además, por usuario:
+- un máximo de peticiones en curso por clase (ADMISION_USUARIO_CONCURRENCIA);
+- una cuota de bytes subidos por minuto (ADMISION_USUARIO_MB_POR_MIN, cubo de tokens).
+Superarlas devuelve 429 con Retry-After.
+
+Los límites y las cuotas son por proceso (el estado está en memoria): con N workers de
+gunicorn el total admitido es N veces el configurado y un usuario cuyas peticiones caen
+en workers distintos dispone de hasta N veces su cuota. Dentro de un worker solo hay
+cola si atiende varias peticiones a la vez (GUNICORN_THREADS > 1 o waitress).
+El estado se guarda en cada app (app.extensions["admision"]), con su propia configuración.
+"""
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request, session
+
+_lock = threading.Lock()
+
+
+class Rechazo(Exception):
+    def __init__(self, estado: int, motivo: str, reintentar: int):
+        super().__init__(motivo)
+        self.estado = estado
+        self.motivo = motivo
+        self.reintentar = reintentar
+
+
+class ClaseAdmision:
+    """Semáforo con cola acotada, límite por usuario y métricas."""
+
+    def __init__(self, nombre: str, concurrencia: int, cola: int, espera_max: float, por_usuario: int):
+        self.nombre = nombre
+        self.concurrencia = concurrencia
+        self.cola = cola
+        self.espera_max = espera_max
+        self.por_usuario = por_usuario
+        self._condicion = threading.Condition()
+        self._en_curso = 0
+        self._en_cola = 0
+        self._por_usuario: dict = {}
+        # Métricas
+        self.admitidas = 0
+        self.rechazos = {"cola_llena": 0, "espera_agotada": 0, "usuario_concurrencia": 0}
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.cola_maxima = 0
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self.espera_max))
+
+    def adquirir(self, usuario) -> None:
+        inicio = time.monotonic()
+        with self._condicion:
+            if self.por_usuario and self._por_usuario.get(usuario, 0) >= self.por_usuario:
+                self.rechazos["usuario_concurrencia"] += 1
+                raise Rechazo(429, "Demasiadas peticiones simultáneas de este usuario", self._retry_after())
+            # Ocupa el hueco del usuario desde ya: sus peticiones en cola también cuentan
+            self._por_usuario[usuario] = self._por_usuario.get(usuario, 0) + 1
+
+            if self._en_curso >= self.concurrencia:
+                if self._en_cola >= self.cola:
+                    self._soltar_usuario(usuario)
+                    self.rechazos["cola_llena"] += 1
+                    raise Rechazo(503, "Servidor ocupado, inténtalo más tarde", self._retry_after())
+                self._en_cola += 1
+                self.cola_maxima = max(self.cola_maxima, self._en_cola)
+                limite = inicio + self.espera_max
+                try:
+                    while self._en_curso >= self.concurrencia:
+                        restante = limite - time.monotonic()
+                        if restante <= 0:
+                            self._soltar_usuario(usuario)
+                            self.rechazos["espera_agotada"] += 1
+                            raise Rechazo(503, "Servidor ocupado, inténtalo más tarde", self._retry_after())
+                        self._condicion.wait(restante)
+                finally:
+                    self._en_cola -= 1
+
+            self._en_curso += 1
+            espera = time.monotonic() - inicio
+            self.admitidas += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+
+    def _soltar_usuario(self, usuario) -> None:
+        restantes = self._por_usuario.get(usuario, 1) - 1
+        if restantes > 0:
+            self._por_usuario[usuario] = restantes
+        else:
+            self._por_usuario.pop(usuario, None)
+
+    def liberar(self, usuario) -> None:
+        with self._condicion:
+            self._en_curso -= 1
+            self._soltar_usuario(usuario)
+            self._condicion.notify()
+
+    def metricas(self) -> dict:
+        with self._condicion:
+            return {
+                "concurrencia": self.concurrencia,
+                "cola_max_configurada": self.cola,
+                "en_curso": self._en_curso,
+                "en_cola": self._en_cola,
+                "cola_maxima_observada": self.cola_maxima,
+                "admitidas": self.admitidas,
+                "rechazadas": dict(self.rechazos),
+                "espera_media_ms": round(self.espera_total / self.admitidas * 1000, 2) if self.admitidas else 0.0,
+                "espera_maxima_ms": round(self.espera_maxima * 1000, 2),
+            }
+
+
+class _EstadoAdmision:
+    """Clases, cuotas y métricas de admisión de una app."""
+
+    def __init__(self):
+        self.clases: dict[str, ClaseAdmision] = {}
+        self.cuotas_bytes: dict = {}
+        self.rechazos_bytes = 0
+        self.lock = threading.Lock()
+
+
+def _estado() -> _EstadoAdmision:
+    extensiones = current_app.extensions
+    estado = extensiones.get("admision")
+    if estado is None:
+        with _lock:
+            estado = extensiones.setdefault("admision", _EstadoAdmision())
+    return estado
+
+
+class _CuboBytes:
+    """Cubo de tokens: `capacidad` bytes que se reponen a `capacidad` por minuto."""
+
+    def __init__(self, capacidad: float):
+        self.capacidad = capacidad
+        self.tokens = capacidad
+        self.actualizado = time.monotonic()
+
+    def consumir(self, cantidad: int) -> float:
+        """Devuelve 0 si hay saldo (y lo descuenta) o los segundos hasta tenerlo."""
+        ahora = time.monotonic()
+        ritmo = self.capacidad / 60.0
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self.actualizado) * ritmo)
+        self.actualizado = ahora
+        # Una petición mayor que la cuota entera se admite con el cubo lleno (queda en negativo)
+        necesario = min(cantidad, self.capacidad)
+        if self.tokens >= necesario:
+            self.tokens -= cantidad
+            return 0.0
+        return (necesario - self.tokens) / ritmo
+
+
+def _consumir_bytes(usuario, cantidad: int) -> None:
+    mb_por_min = current_app.config.get("ADMISION_USUARIO_MB_POR_MIN", 0)
+    if not mb_por_min or not cantidad:
+        return
+    estado = _estado()
+    with estado.lock:
+        cubo = estado.cuotas_bytes.get(usuario)
+        if cubo is None:
+            cubo = estado.cuotas_bytes[usuario] = _CuboBytes(mb_por_min * 1024 * 1024)
+        espera = cubo.consumir(cantidad)
+        if espera:
+            estado.rechazos_bytes += 1
+    if espera:
+        raise Rechazo(429, "Cuota de subida del usuario agotada", max(1, math.ceil(espera)))
+
+
+def _devolver_bytes(usuario, cantidad: int) -> None:
+    """Reintegra la cuota de una petición que al final no se admitió."""
+    estado = _estado()
+    with estado.lock:
+        cubo = estado.cuotas_bytes.get(usuario)
+        if cubo is not None and cantidad:
+            cubo.tokens = min(cubo.capacidad, cubo.tokens + cantidad)
+
+
+def obtener_clase(nombre: str) -> ClaseAdmision:
+    """Clase `nombre` de la app actual, creada con su configuración la primera vez."""
+    estado = _estado()
+    with estado.lock:
+        clase = estado.clases.get(nombre)
+        if clase is None:
+            config = current_app.config
+            prefijo = f"ADMISION_{nombre.upper()}"
+            clase = estado.clases[nombre] = ClaseAdmision(
+                nombre,
+                concurrencia=int(config.get(f"{prefijo}_CONCURRENCIA", 4)),
+                cola=int(config.get(f"{prefijo}_COLA", 16)),
+                espera_max=float(config.get("ADMISION_ESPERA_MAX", 10)),
+                por_usuario=int(config.get("ADMISION_USUARIO_CONCURRENCIA", 0)),
+            )
+        return clase
+
+
+def admitir(clase: str, contar_bytes: bool = False):
+    """
+    Limita la vista a la capacidad de `clase`; con contar_bytes descuenta el tamaño
+    del cuerpo de la cuota del usuario. Las respuestas en streaming mantienen el
+    hueco ocupado hasta que terminan de enviarse.
+    """
+    def decorador(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get("ADMISION_HABILITADA", True):
+                return f(*args, **kwargs)
+
+            usuario = session.get("user_id") or request.remote_addr
+            control = obtener_clase(clase)
+            cantidad = (request.content_length or 0) if contar_bytes else 0
+            try:
+                _consumir_bytes(usuario, cantidad)
+                try:
+                    control.adquirir(usuario)
+                except Rechazo:
+                    _devolver_bytes(usuario, cantidad)
+                    raise
+            except Rechazo as r:
+                codigo = "SERVIDOR_OCUPADO" if r.estado == 503 else "CUOTA_EXCEDIDA"
+                respuesta = jsonify({"error": r.motivo, "error_code": codigo})
+                respuesta.status_code = r.estado
+                respuesta.headers["Retry-After"] = str(r.reintentar)
+                return respuesta
+
+            try:
+                respuesta = make_response(f(*args, **kwargs))
+            except BaseException:
+                control.liberar(usuario)
+                raise
+            if respuesta.is_streamed:
+                respuesta.call_on_close(lambda: control.liberar(usuario))
+            else:
+                control.liberar(usuario)
+            return respuesta
+        return wrapper
+    return decorador
+
+
+def metricas() -> dict:
+    estado = _estado()
+    with estado.lock:
+        clases = list(estado.clases.values())
+        rechazos_bytes = estado.rechazos_bytes
+    return {
+        "clases": {c.nombre: c.metricas() for c in clases},
+        "rechazos_cuota_bytes": rechazos_bytes,
+    }
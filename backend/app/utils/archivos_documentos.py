@@ -0,0 +1,179 @@
+# backend/app/utils/archivos_documentos.py
+"""
+Ciclo de vida de los archivos de documentos en <UPLOAD_FOLDER>/<grupo>/v<n>/<nombre>.
+
+Escrituras: cada archivo de una subida se escribe primero en un temporal de la misma
+carpeta (".tmp-*") y solo se renombra a su ruta definitiva cuando la transacción de
+la BD ya se confirmó; si falla, se borran los temporales. Un reemplazo no toca el
+archivo anterior hasta que el nuevo está registrado.
+
+Borrados: al eliminar un Documento se añade en la misma transacción una lápida
+(ArchivoPendienteBorrado) con su ruta. La tarea `reclamar_pendientes` las procesa por
+lotes cada BORRADOS_INTERVALO_S, así que el disco sigue a la BD en minutos y el
+recorrido completo del árbol (limpieza_programada.py) queda como comprobación rara.
+Antes de borrar se comprueba que ningún Documento vivo use la misma ruta (una versión
+borrada y vuelta a subir con el mismo número).
+"""
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from werkzeug.utils import secure_filename
+
+from ..models import db, Documento, ArchivoPendienteBorrado
+
+logger = logging.getLogger(__name__)
+
+PREFIJO_TEMPORAL = ".tmp-"
+
+
+def carpeta_grupo(grupo: str) -> str:
+    """Carpeta del grupo: el nombre visible sin extensión, saneado."""
+    return secure_filename(Path(grupo).stem) or "doc"
+
+
+def ruta_relativa(grupo: str, version: int, nombre: str) -> str:
+    """Ruta del archivo respecto a UPLOAD_FOLDER, siempre con "/"."""
+    return f"{carpeta_grupo(grupo)}/v{int(version)}/{nombre}"
+
+
+class EscriturasPendientes:
+    """Archivos de un lote escritos en temporales, a renombrar tras el commit."""
+
+    def __init__(self):
+        self._pendientes: list[tuple[str, Path, str | None]] = []  # (temporal, destino, origen)
+
+    def preparar(self, destino: Path, data: bytes | None = None, origen: str | None = None) -> None:
+        """Escribe `data` (o mueve el archivo `origen`) a un temporal junto a `destino`."""
+        for intento in range(2):
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                fd, temporal = tempfile.mkstemp(dir=destino.parent, prefix=PREFIJO_TEMPORAL)
+                break
+            except FileNotFoundError:
+                if intento:  # la carpeta vacía la podó el reclamador entre medias
+                    raise
+        self._pendientes.append((temporal, destino, origen))
+        if origen is not None:
+            os.close(fd)
+            shutil.move(origen, temporal)
+        else:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+
+    def confirmar(self) -> None:
+        """Tras el commit: cada temporal pasa a su ruta (rename atómico, sustituye al anterior)."""
+        for temporal, destino, _ in self._pendientes:
+            os.replace(temporal, destino)
+        self._pendientes.clear()
+
+    def descartar(self) -> None:
+        """Tras un rollback: borra los temporales (o devuelve los movidos); los anteriores siguen intactos."""
+        for temporal, _, origen in self._pendientes:
+            try:
+                if origen is not None:
+                    shutil.move(temporal, origen)
+                else:
+                    os.remove(temporal)
+            except OSError as e:
+                logger.warning(f"No se pudo descartar {temporal}: {e}")
+        self._pendientes.clear()
+
+
+def marcar_para_borrado(base: Path, rutas) -> None:
+    """Añade lápidas para `rutas` (absolutas bajo `base`) a la transacción en curso."""
+    ahora = time.time()
+    for ruta in rutas:
+        relativa = Path(ruta).resolve().relative_to(Path(base).resolve()).as_posix()
+        db.session.add(ArchivoPendienteBorrado(ruta=relativa, creado=ahora))
+
+
+def _rutas_vivas(rutas: set[str]) -> set[str]:
+    """Las de `rutas` que usa algún Documento (incluido el formato plano antiguo)."""
+    nombres = {r.rsplit("/", 1)[-1] for r in rutas}
+    vivas = set()
+    filas = (db.session.query(Documento.grupo, Documento.version, Documento.nombre)
+             .filter(Documento.nombre.in_(nombres)).all())
+    for fila in filas:
+        vivas.add(ruta_relativa(fila.grupo, fila.version, fila.nombre))
+        vivas.add(fila.nombre)
+    return vivas & rutas
+
+
+def _podar(carpeta: str, base: str) -> None:
+    """Borra carpetas vacías hacia arriba (v<n>, después el grupo) sin salir de `base`."""
+    while os.path.normpath(carpeta) != os.path.normpath(base):
+        try:
+            os.rmdir(carpeta)
+        except OSError:
+            return
+        carpeta = os.path.dirname(carpeta)
+
+
+def _borrar(base: str, relativa: str) -> bool:
+    destino = os.path.join(base, *relativa.split("/"))
+    # Se aparta antes de borrar: si entretanto se registró otra vez esa ruta, se devuelve
+    # a su sitio salvo que la subida nueva ya haya dejado su archivo (os.link no sobrescribe)
+    apartado = os.path.join(os.path.dirname(destino), f"{PREFIJO_TEMPORAL}borrado-{uuid.uuid4().hex}")
+    try:
+        os.rename(destino, apartado)
+    except FileNotFoundError:
+        return False
+    db.session.commit()  # nueva transacción: ver lo confirmado por otros procesos
+    if _rutas_vivas({relativa}):
+        try:
+            os.link(apartado, destino)
+        except FileExistsError:
+            pass
+        os.remove(apartado)
+        return False
+    os.remove(apartado)
+    _podar(os.path.dirname(destino), base)
+    return True
+
+
+def reclamar_pendientes(base: str | None = None, lote: int | None = None) -> int:
+    """
+    Procesa lápidas por lotes hasta vaciar la cola y devuelve los archivos borrados
+    (tarea programada). Requiere contexto de aplicación.
+    """
+    from flask import current_app
+    base = base or current_app.config["UPLOAD_FOLDER"]
+    lote = lote or int(current_app.config.get("BORRADOS_LOTE", 500))
+
+    borrados = 0
+    while True:
+        filas = (db.session.query(ArchivoPendienteBorrado.id, ArchivoPendienteBorrado.ruta)
+                 .order_by(ArchivoPendienteBorrado.id).limit(lote).all())
+        if not filas:
+            break
+        rutas = {f.ruta for f in filas}
+        for relativa in rutas - _rutas_vivas(rutas):
+            try:
+                borrados += _borrar(base, relativa)
+            except OSError as e:
+                # La lápida se retira igualmente: la comprobación completa lo reintentará
+                logger.warning(f"No se pudo borrar {relativa}: {e}")
+        (ArchivoPendienteBorrado.query
+         .filter(ArchivoPendienteBorrado.id.in_([f.id for f in filas]))
+         .delete(synchronize_session=False))
+        db.session.commit()
+        if len(filas) < lote:
+            break
+    if borrados:
+        logger.info(f"Archivos de documentos eliminados: {borrados}")
+    return borrados
+
+
+def rutas_registradas() -> set[str]:
+    """Rutas relativas que deben existir: documentos (y su ruta plana antigua) y lápidas sin procesar."""
+    rutas = set()
+    for fila in db.session.query(Documento.grupo, Documento.version, Documento.nombre):
+        rutas.add(ruta_relativa(fila.grupo, fila.version, fila.nombre))
+        rutas.add(fila.nombre)
+    rutas.update(r for (r,) in db.session.query(ArchivoPendienteBorrado.ruta))
+    return rutas
@@ -0,0 +1,74 @@
+# backend/app/utils/base_datos.py
+import sqlite3
+import logging
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar_url(url: str) -> str:
+    """Heroku y similares aún entregan 'postgres://', que SQLAlchemy 2 ya no acepta."""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def opciones_motor(config) -> dict:
+    """
+    Opciones de create_engine según el motor configurado en SQLALCHEMY_DATABASE_URI.
+
+    - SQLite: pool pequeño (un único escritor a la vez) y espera en lugar de "database is locked".
+    - Postgres/otros: QueuePool dimensionado, pre_ping y reciclado de conexiones.
+    """
+    url = config["SQLALCHEMY_DATABASE_URI"]
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        return {}  # BD en memoria: SQLAlchemy usa su propio pool de una conexión
+    if url.startswith("sqlite"):
+        return {
+            "pool_size": config.get("DB_POOL_SIZE", 5),
+            "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+            "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+            "connect_args": {"timeout": config.get("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000},
+        }
+    return {
+        "pool_size": config.get("DB_POOL_SIZE", 5),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": True,
+    }
+
+
+def registrar_pragmas_sqlite(engine, config) -> None:
+    """
+    Aplica en cada conexión nueva de `engine` (solo SQLite):
+    WAL (lectores no bloquean al escritor), synchronous=NORMAL (seguro con WAL),
+    caché de páginas, mmap y busy_timeout. Con SQLITE_FOREIGN_KEYS también
+    foreign_keys=ON (SQLite no comprueba claves ajenas ni aplica ON DELETE por defecto).
+
+    El listener va en el engine de cada app, no en la clase Engine: otras apps u otros
+    motores del mismo proceso conservan su propia configuración.
+    """
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA cache_size=-{int(config.get('SQLITE_CACHE_SIZE_KB', 64000))}",
+        f"PRAGMA mmap_size={int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+        f"PRAGMA busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if config.get("SQLITE_FOREIGN_KEYS", False):
+        pragmas.append("PRAGMA foreign_keys=ON")
+
+    @event.listens_for(engine, "connect")
+    def _aplicar_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    logger.info("Pragmas SQLite registrados (WAL, synchronous=NORMAL, mmap, busy_timeout)")
@@ -0,0 +1,137 @@
+# backend/app/utils/cache_extraccion.py
+"""
+Caché persistente de extracción: (sha256, versión del extractor) -> (contenido, patrones).
+
+Se guarda en la tabla `cache_extraccion` (compartida por todos los workers), con el texto
+comprimido y expulsión LRU cuando el total supera CACHE_EXTRACCION_MAX_MB.
+"""
+import json
+import logging
+import threading
+import time
+import zlib
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from flask import current_app
+
+from ..models import db, CacheExtraccion
+from .cache_lru import expulsar_lru, marcar_acceso
+
+logger = logging.getLogger(__name__)
+
+_estadisticas = {"aciertos": 0, "fallos": 0, "guardados": 0, "expulsados": 0}
+_lock = threading.Lock()
+
+
+def _contar(clave: str, n: int = 1) -> None:
+    with _lock:
+        _estadisticas[clave] += n
+
+
+def _habilitada() -> bool:
+    return bool(current_app.config.get("CACHE_EXTRACCION", True))
+
+
+def obtener_varios(hashes, version_extractor: str) -> dict:
+    """
+    Busca varios hashes en una sola consulta.
+
+    Returns:
+        dict hash -> (contenido, patrones) solo con los que están en caché.
+        La marca LRU se renueva (si está vieja) en la sesión actual y se persiste con el commit de quien llama.
+    """
+    hashes = set(hashes)
+    if not hashes or not _habilitada():
+        return {}
+    encontradas = (CacheExtraccion.query
+                   .filter(CacheExtraccion.version_extractor == version_extractor,
+                           CacheExtraccion.hash_contenido.in_(hashes))
+                   .all())
+    ahora = time.time()
+    resultado = {}
+    for entrada in encontradas:
+        marcar_acceso(entrada, ahora)
+        contenido = zlib.decompress(entrada.contenido).decode("utf-8") if entrada.contenido is not None else None
+        resultado[entrada.hash_contenido] = (contenido, json.loads(entrada.patrones) if entrada.patrones else {})
+    _contar("aciertos", len(resultado))
+    _contar("fallos", len(hashes) - len(resultado))
+    return resultado
+
+
+def obtener(hash_contenido: str, version_extractor: str):
+    """Devuelve (contenido, patrones) si está en caché, o None."""
+    return obtener_varios([hash_contenido], version_extractor).get(hash_contenido)
+
+
+def _nueva_entrada(hash_contenido: str, version_extractor: str, contenido, patrones) -> CacheExtraccion:
+    comprimido = zlib.compress(contenido.encode("utf-8"), 6) if contenido is not None else None
+    patrones_json = json.dumps(patrones or {}, ensure_ascii=False, default=str)
+    return CacheExtraccion(
+        hash_contenido=hash_contenido,
+        version_extractor=version_extractor,
+        contenido=comprimido,
+        patrones=patrones_json,
+        tamano=len(comprimido or b"") + len(patrones_json),
+        ultimo_acceso=time.time(),
+    )
+
+
+def guardar_varios(resultados: dict, version_extractor: str) -> None:
+    """
+    Guarda {hash: (contenido, patrones)} en su propia transacción y aplica la expulsión LRU.
+
+    Se llama después del commit principal: un fallo aquí (p. ej. otro worker guardó el mismo
+    hash a la vez) no debe deshacer la subida, así que los conflictos se ignoran.
+    """
+    if not resultados or not _habilitada():
+        return
+    try:
+        for hash_contenido, (contenido, patrones) in resultados.items():
+            db.session.add(_nueva_entrada(hash_contenido, version_extractor, contenido, patrones))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        # Alguna ya existía: reintenta una a una saltando las repetidas
+        for hash_contenido, (contenido, patrones) in resultados.items():
+            try:
+                db.session.add(_nueva_entrada(hash_contenido, version_extractor, contenido, patrones))
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+    _contar("guardados", len(resultados))
+
+    try:
+        if expulsar_excedente():
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"No se pudo aplicar la expulsión de la caché de extracción: {e}")
+
+
+def expulsar_excedente() -> int:
+    """
+    Elimina las entradas menos usadas hasta quedar bajo CACHE_EXTRACCION_MAX_MB.
+    Devuelve cuántas se eliminaron (sin commit).
+    """
+    maximo = int(current_app.config.get("CACHE_EXTRACCION_MAX_MB", 512)) * 1024 * 1024
+    expulsadas = expulsar_lru(CacheExtraccion, maximo)
+    if expulsadas:
+        _contar("expulsados", expulsadas)
+        logger.info(f"Caché de extracción: {expulsadas} entradas expulsadas (LRU)")
+    return expulsadas
+
+
+def estadisticas() -> dict:
+    """Aciertos/fallos de este proceso y ocupación total de la tabla."""
+    with _lock:
+        datos = dict(_estadisticas)
+    consultas = datos["aciertos"] + datos["fallos"]
+    datos["tasa_aciertos"] = round(datos["aciertos"] / consultas, 4) if consultas else None
+    entradas, total = (db.session.query(func.count(CacheExtraccion.hash_contenido),
+                                        func.coalesce(func.sum(CacheExtraccion.tamano), 0))
+                       .one())
+    datos["entradas"] = entradas
+    datos["bytes"] = int(total)
+    datos["max_bytes"] = int(current_app.config.get("CACHE_EXTRACCION_MAX_MB", 512)) * 1024 * 1024
+    return datos
@@ -0,0 +1,56 @@
+# backend/app/utils/cache_lru.py
+"""
+Expulsión LRU común a las cachés persistentes en tablas (cache_extraccion,
+diferencias_versiones): modelos con columnas `tamano` y `ultimo_acceso`.
+"""
+import time
+
+from sqlalchemy import func, inspect, tuple_
+
+from ..models import db
+
+_LOTE = 500  # filas leídas por consulta y claves por DELETE
+# Una lectura solo renueva `ultimo_acceso` si tiene más de esto: evita una escritura
+# (y un commit) por cada acierto; para el orden LRU basta esa resolución
+REFRESCO_ACCESO_S = 300
+
+
+def marcar_acceso(entrada, ahora: float | None = None) -> bool:
+    """Renueva la marca LRU de `entrada` si está vieja (sin commit); True si la cambió."""
+    ahora = time.time() if ahora is None else ahora
+    if ahora - (entrada.ultimo_acceso or 0) < REFRESCO_ACCESO_S:
+        return False
+    entrada.ultimo_acceso = ahora
+    return True
+
+
+def expulsar_lru(modelo, maximo_bytes: int) -> int:
+    """
+    Elimina las filas de `modelo` con `ultimo_acceso` más antiguo hasta que la suma de
+    `tamano` quede bajo `maximo_bytes`. Solo lee las filas necesarias, por lotes, y las
+    borra con DELETE ... WHERE (clave) IN (...). Devuelve cuántas se eliminaron (sin commit).
+    """
+    total = db.session.query(func.coalesce(func.sum(modelo.tamano), 0)).scalar()
+    if total <= maximo_bytes:
+        return 0
+
+    clave = list(inspect(modelo).primary_key)
+    claves = []
+    consulta = (db.session.query(*clave, modelo.tamano)
+                .order_by(modelo.ultimo_acceso.asc())
+                .limit(_LOTE))
+    while total > maximo_bytes:
+        filas = consulta.offset(len(claves)).all()
+        if not filas:
+            break
+        for *pk, tamano in filas:
+            if total <= maximo_bytes:
+                break
+            claves.append(tuple(pk))
+            total -= tamano
+
+    for inicio in range(0, len(claves), _LOTE):
+        (db.session.query(modelo)
+         .filter(tuple_(*clave).in_(claves[inicio:inicio + _LOTE]))
+         .delete(synchronize_session=False))
+    return len(claves)
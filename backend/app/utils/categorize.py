@@ -47,3 +47,83 @@ def categorizar(nombre_archivo: str, contenido: str, patrones: Optional[Dict[str
     # Determinar categoría con mayor puntuación
     categoria_final = max(puntuaciones, key=puntuaciones.get)
     return categoria_final if puntuaciones[categoria_final] > 0 else "General"
+
+
+def categorizar_lote(documentos: list[tuple]) -> list[str]:
+    """
+    Categorías de [(nombre, texto, patrones), ...] según CATEGORIZACION_MOTOR.
+
+    "palabras" usa categorizar(); "modelo" el clasificador TF-IDF de clasificador.py
+    (importado solo entonces: NumPy no se carga con el motor de palabras clave).
+    """
+    from flask import current_app
+    config = current_app.config
+    if config.get("CATEGORIZACION_MOTOR") != "modelo":
+        return [categorizar(nombre, texto or "", patrones or {}) for nombre, texto, patrones in documentos]
+
+    from .clasificador import cargar_modelo, clasificar_lote
+    modelo = cargar_modelo(config["CLASIFICADOR_RUTA"])
+    umbral = float(config.get("CLASIFICADOR_UMBRAL", 0.6))
+    return [r["categoria"] for r in clasificar_lote(documentos, modelo, umbral)]
+
+
+def _con_patrones(documentos) -> list[tuple]:
+    """
+    (nombre, texto, patrones) de cada Documento para categorizar_lote. Los patrones no se
+    guardan con el documento: se recalculan del texto como al subirlo.
+    """
+    from .ocr import analizar_texto_contenido
+    tuplas = []
+    for doc in documentos:
+        texto = doc.contenido or ""
+        tuplas.append((doc.nombre, texto, analizar_texto_contenido(texto)))
+    return tuplas
+
+
+def registrar_comandos(app) -> None:
+    import time
+    import click
+
+    @app.cli.command("entrenar-clasificador")
+    @click.option("--incluir-general", is_flag=True, help="Usar también los documentos en 'General'.")
+    @click.option("--bits", default=18, show_default=True, help="log2 del número de columnas del hashing.")
+    @click.option("--epocas", default=30, show_default=True)
+    def entrenar_clasificador(incluir_general, bits, epocas):
+        """Entrena el clasificador con las categorías guardadas y lo guarda en CLASIFICADOR_RUTA."""
+        from ..models import Documento
+        from .clasificador import entrenar
+        consulta = Documento.query
+        if not incluir_general:
+            consulta = consulta.filter(Documento.categoria != "General")
+        documentos, etiquetas = [], []
+        for doc in consulta.yield_per(200):
+            documentos.extend(_con_patrones([doc]))
+            etiquetas.append(doc.categoria)
+        inicio = time.perf_counter()
+        modelo, metricas = entrenar(documentos, etiquetas, bits=bits, epocas=epocas)
+        modelo.guardar(app.config["CLASIFICADOR_RUTA"])
+        print(f"Modelo entrenado en {time.perf_counter() - inicio:.1f}s: {metricas}")
+
+    @app.cli.command("recategorizar")
+    @click.option("--solo-general", is_flag=True, help="Solo documentos en 'General'.")
+    def recategorizar(solo_general):
+        """Vuelve a categorizar los documentos en lotes con el motor configurado."""
+        from .. import db
+        from ..models import Documento
+        from . import estadisticas
+        consulta = db.session.query(Documento.id).order_by(Documento.id)
+        if solo_general:
+            consulta = consulta.filter(Documento.categoria == "General")
+        ids = [i for (i,) in consulta]
+        cambios = 0
+        for inicio in range(0, len(ids), 500):
+            lote = Documento.query.filter(Documento.id.in_(ids[inicio:inicio + 500])).all()
+            for doc, categoria in zip(lote, categorizar_lote(_con_patrones(lote))):
+                if categoria != doc.categoria:
+                    antes = estadisticas.instantanea(doc)
+                    doc.categoria = categoria
+                    estadisticas.registrar_cambio(antes, doc)
+                    cambios += 1
+            db.session.commit()
+            db.session.expunge_all()
+        print(f"{cambios} de {len(ids)} documentos cambiaron de categoría.")
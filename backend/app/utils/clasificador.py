@@ -0,0 +1,267 @@
+# backend/app/utils/clasificador.py
+"""
+Motor de categorización alternativo: TF-IDF con hashing + regresión logística, en NumPy.
+
+- Vectorizador: tokens del contenido y del nombre (con prefijo "n:") llevados a 2**bits
+  columnas con crc32; tf sublineal, idf aprendido y norma L2. Los patrones no se usan
+  como rasgos porque no se guardan con el documento (no estarían al entrenar).
+- Modelo: softmax multiclase entrenado offline (`flask entrenar-clasificador`) con las
+  categorías ya guardadas en `documentos.categoria`; la temperatura se ajusta en una
+  partición de validación para que la confianza esté calibrada.
+- Un lote se clasifica con operaciones dispersas (CSR en arrays NumPy): una suma por
+  fila de W[índices] * pesos, sin matrices densas de documentos x vocabulario.
+- Si la confianza queda por debajo de CLASIFICADOR_UMBRAL se usa `categorizar` (palabras clave).
+
+El modelo se guarda en CLASIFICADOR_RUTA (.npz) y cada worker lo carga una sola vez.
+La app entra por categorize.categorizar_lote, que solo importa este módulo (y NumPy)
+cuando CATEGORIZACION_MOTOR=modelo.
+"""
+import logging
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from .categorize import categorizar
+
+logger = logging.getLogger(__name__)
+
+VERSION_MODELO = 1
+_TOKEN = re.compile(r"[^\W\d_]{2,}|\d+(?:\.\d+){3}", re.UNICODE)  # palabras y direcciones IPv4
+_MAX_CARACTERES = 200_000  # el comienzo del documento basta para categorizar
+
+_modelo = None
+_modelo_ruta = None
+_modelo_lock = threading.Lock()
+
+
+# ---- Vectorización ----
+def _tokens(nombre: str, texto: str) -> list[str]:
+    tokens = _TOKEN.findall((texto or "")[:_MAX_CARACTERES].lower())
+    tokens += ["n:" + t for t in _TOKEN.findall((nombre or "").lower())]
+    return tokens
+
+
+class _Hasher:
+    """crc32 de cada token distinto, memorizado (el vocabulario real es pequeño)."""
+
+    def __init__(self, bits: int):
+        self.mascara = (1 << bits) - 1
+        self._memo: dict[str, int] = {}
+
+    def __call__(self, token: str) -> int:
+        indice = self._memo.get(token)
+        if indice is None:
+            indice = zlib.crc32(token.encode("utf-8")) & self.mascara
+            if len(self._memo) < 1_000_000:
+                self._memo[token] = indice
+        return indice
+
+
+def vectorizar(documentos: list[tuple], hasher: _Hasher, idf: np.ndarray | None = None):
+    """
+    Convierte [(nombre, texto, patrones), ...] en una matriz CSR (indptr, indices, datos).
+    Con idf se aplica TF-IDF y norma L2 por fila; sin él devuelve solo tf sublineal.
+    """
+    indptr = [0]
+    indices_partes, datos_partes = [], []
+    for nombre, texto, _patrones in documentos:
+        hashes = np.fromiter((hasher(t) for t in _tokens(nombre, texto)), dtype=np.int64)
+        columnas, cuentas = np.unique(hashes, return_counts=True)
+        indices_partes.append(columnas)
+        datos_partes.append(1.0 + np.log(cuentas, dtype=np.float32))
+        indptr.append(indptr[-1] + len(columnas))
+
+    indptr = np.asarray(indptr, dtype=np.int64)
+    indices = np.concatenate(indices_partes) if indices_partes else np.empty(0, dtype=np.int64)
+    datos = np.concatenate(datos_partes).astype(np.float32) if datos_partes else np.empty(0, dtype=np.float32)
+
+    if idf is not None:
+        return ponderar(indptr, indices, datos, idf)
+    return indptr, indices, datos
+
+
+def ponderar(indptr, indices, datos, idf: np.ndarray):
+    """tf -> tf-idf con norma L2 por fila."""
+    datos = datos * idf[indices]
+    if len(datos):
+        filas = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        normas = np.sqrt(np.bincount(filas, weights=datos.astype(np.float64) ** 2, minlength=len(indptr) - 1))
+        datos /= np.maximum(normas[filas], 1e-12).astype(np.float32)
+    return indptr, indices, datos
+
+
+def _producto(indptr, indices, datos, W: np.ndarray) -> np.ndarray:
+    """X (CSR) @ W (denso): suma por fila de W[indices] ponderado por datos."""
+    n = len(indptr) - 1
+    salida = np.zeros((n, W.shape[1]), dtype=np.float32)
+    if len(datos) == 0:
+        return salida
+    filas = np.repeat(np.arange(n), np.diff(indptr))
+    for c in range(W.shape[1]):
+        salida[:, c] = np.bincount(filas, weights=datos * W[indices, c], minlength=n)
+    return salida
+
+
+def _producto_traspuesto(indptr, indices, datos, G: np.ndarray, columnas: int) -> np.ndarray:
+    """X.T (CSR) @ G (denso), columna a columna con bincount."""
+    filas = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    salida = np.empty((columnas, G.shape[1]), dtype=np.float32)
+    for c in range(G.shape[1]):
+        salida[:, c] = np.bincount(indices, weights=datos * G[filas, c], minlength=columnas)
+    return salida
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def _filas(X, seleccion: np.ndarray):
+    indptr, indices, datos = X
+    partes_i = [indices[indptr[i]:indptr[i + 1]] for i in seleccion]
+    partes_d = [datos[indptr[i]:indptr[i + 1]] for i in seleccion]
+    nuevo_indptr = np.concatenate([[0], np.cumsum([len(p) for p in partes_i])]).astype(np.int64)
+    return (nuevo_indptr,
+            np.concatenate(partes_i) if partes_i else np.empty(0, dtype=np.int64),
+            np.concatenate(partes_d) if partes_d else np.empty(0, dtype=np.float32))
+
+
+# ---- Modelo ----
+class ModeloCategorias:
+    def __init__(self, clases: list[str], W: np.ndarray, b: np.ndarray, idf: np.ndarray,
+                 bits: int, temperatura: float = 1.0):
+        self.clases = list(clases)
+        self.W = W
+        self.b = b
+        self.idf = idf
+        self.bits = bits
+        self.temperatura = temperatura
+        self._hasher = _Hasher(bits)
+
+    def probabilidades(self, documentos: list[tuple]) -> np.ndarray:
+        X = vectorizar(documentos, self._hasher, self.idf)
+        return _softmax((_producto(*X, self.W) + self.b) / self.temperatura)
+
+    def guardar(self, ruta: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        tmp = ruta + ".tmp.npz"
+        np.savez_compressed(tmp, version=VERSION_MODELO, clases=np.array(self.clases), W=self.W, b=self.b,
+                            idf=self.idf, bits=self.bits, temperatura=self.temperatura)
+        os.replace(tmp, ruta)
+
+    @classmethod
+    def cargar(cls, ruta: str) -> "ModeloCategorias":
+        with np.load(ruta, allow_pickle=False) as datos:
+            if int(datos["version"]) != VERSION_MODELO:
+                raise ValueError(f"Versión de modelo {int(datos['version'])} no soportada")
+            return cls([str(c) for c in datos["clases"]], datos["W"], datos["b"], datos["idf"],
+                       int(datos["bits"]), float(datos["temperatura"]))
+
+
+def entrenar(documentos: list[tuple], etiquetas: list[str], bits: int = 18, epocas: int = 30,
+             tasa: float = 0.5, regularizacion: float = 1e-5, validacion: float = 0.15,
+             semilla: int = 0) -> tuple[ModeloCategorias, dict]:
+    """
+    Entrena el modelo con descenso de gradiente por mini-lotes.
+
+    Returns:
+        (modelo, métricas) con exactitud y log-loss en la partición de validación.
+    """
+    if len(set(etiquetas)) < 2:
+        raise ValueError("Se necesitan al menos dos categorías distintas para entrenar")
+
+    rng = np.random.default_rng(semilla)
+    clases = sorted(set(etiquetas))
+    y = np.array([clases.index(e) for e in etiquetas])
+    columnas = 1 << bits
+    hasher = _Hasher(bits)
+
+    # idf sobre el total (sin etiquetas: no filtra información de validación)
+    tf = vectorizar(documentos, hasher)
+    df = np.bincount(tf[1], minlength=columnas)
+    idf = (np.log((1 + len(documentos)) / (1 + df)) + 1).astype(np.float32)
+    X = ponderar(*tf, idf)
+
+    orden = rng.permutation(len(documentos))
+    n_validacion = int(len(orden) * validacion) if len(orden) >= 20 else 0
+    i_val, i_ent = orden[:n_validacion], orden[n_validacion:]
+    X_ent, y_ent = _filas(X, i_ent), y[i_ent]
+
+    W = np.zeros((columnas, len(clases)), dtype=np.float32)
+    b = np.zeros(len(clases), dtype=np.float32)
+    Y = np.eye(len(clases), dtype=np.float32)
+    lote = 256
+    for epoca in range(epocas):
+        paso = tasa / (1 + 0.1 * epoca)
+        permutacion = rng.permutation(len(i_ent))
+        for inicio in range(0, len(permutacion), lote):
+            seleccion = permutacion[inicio:inicio + lote]
+            Xb = _filas(X_ent, seleccion)
+            G = (_softmax(_producto(*Xb, W) + b) - Y[y_ent[seleccion]]) / len(seleccion)
+            W -= paso * (_producto_traspuesto(*Xb, G, columnas) + regularizacion * W)
+            b -= paso * G.sum(axis=0)
+
+    modelo = ModeloCategorias(clases, W, b, idf, bits)
+    metricas = {"documentos": len(documentos), "clases": clases, "validacion": int(n_validacion)}
+    if n_validacion:
+        X_val = _filas(X, i_val)
+        logits = _producto(*X_val, W) + b
+        # Escalado de temperatura: la que minimiza el log-loss en validación
+        mejor = (np.inf, 1.0)
+        for t in np.exp(np.linspace(np.log(0.05), np.log(5.0), 60)):
+            p = _softmax(logits / t)
+            perdida = -np.mean(np.log(p[np.arange(len(i_val)), y[i_val]] + 1e-12))
+            mejor = min(mejor, (perdida, float(t)))
+        modelo.temperatura = mejor[1]
+        p = _softmax(logits / modelo.temperatura)
+        metricas.update(exactitud=float(np.mean(p.argmax(axis=1) == y[i_val])),
+                        log_loss=round(float(mejor[0]), 4), temperatura=round(modelo.temperatura, 3))
+    return modelo, metricas
+
+
+# ---- Uso desde la app ----
+def cargar_modelo(ruta: str) -> ModeloCategorias | None:
+    """Carga el modelo una vez por proceso (None si no existe o no es válido)."""
+    global _modelo, _modelo_ruta
+    with _modelo_lock:
+        if _modelo_ruta != ruta:
+            _modelo_ruta = ruta
+            _modelo = None
+            if os.path.exists(ruta):
+                try:
+                    _modelo = ModeloCategorias.cargar(ruta)
+                    logger.info(f"Clasificador cargado: {len(_modelo.clases)} categorías ({ruta})")
+                except Exception as e:
+                    logger.warning(f"No se pudo cargar el clasificador {ruta}: {e}")
+        return _modelo
+
+
+def clasificar_lote(documentos: list[tuple], modelo: ModeloCategorias | None, umbral: float) -> list[dict]:
+    """
+    Categoriza [(nombre, texto, patrones), ...] de una vez.
+
+    Returns:
+        [{"categoria", "confianza", "motor"}, ...]; motor es "modelo" o "palabras"
+        (sin modelo o con confianza < umbral se usan las palabras clave).
+    """
+    if not documentos:
+        return []
+    if modelo is None:
+        return [{"categoria": categorizar(n, t or "", p or {}), "confianza": None, "motor": "palabras"}
+                for n, t, p in documentos]
+
+    probabilidades = modelo.probabilidades(documentos)
+    mejores = probabilidades.argmax(axis=1)
+    resultados = []
+    for (nombre, texto, patrones), indice, fila in zip(documentos, mejores, probabilidades):
+        confianza = float(fila[indice])
+        if confianza >= umbral:
+            resultados.append({"categoria": modelo.clases[indice], "confianza": round(confianza, 4), "motor": "modelo"})
+        else:
+            resultados.append({"categoria": categorizar(nombre, texto or "", patrones or {}),
+                               "confianza": round(confianza, 4), "motor": "palabras"})
+    return resultados
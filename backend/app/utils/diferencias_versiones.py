@@ -0,0 +1,271 @@
+# backend/app/utils/diferencias_versiones.py
+"""
+Diferencias entre dos versiones de un grupo, memoizadas por el par de hashes de contenido.
+
+- PDF/DOCX (texto): diff por líneas. Se recortan el prefijo y el sufijo comunes (en
+  versiones sucesivas suele ser casi todo el documento) y solo el tramo central pasa
+  por SequenceMatcher.
+- XLSX/CSV (JSON de filas): diff por filas de cada hoja. Las filas se emparejan por una
+  columna clave (la primera sin vacíos ni repetidos en ambas versiones) y se informa
+  de las celdas cambiadas; sin clave, se comparan las filas completas (altas y bajas).
+
+El resultado se guarda comprimido en la tabla `diferencias_versiones` con expulsión
+LRU al superar DIFERENCIAS_MAX_MB. Al subir una versión nueva se calcula ya la
+diferencia con la anterior, así que el historial de un grupo sale de la caché.
+"""
+import json
+import logging
+import time
+import zlib
+from collections import Counter
+from difflib import SequenceMatcher
+
+from sqlalchemy.exc import IntegrityError
+from flask import current_app
+
+from ..models import db, DiferenciaVersiones
+from .cache_lru import expulsar_lru, marcar_acceso
+
+logger = logging.getLogger(__name__)
+
+# Cambiar si cambia el formato del resultado: invalida las diferencias guardadas
+VERSION = "1"
+TIPOS_TABLA = ("xlsx", "csv")
+MAX_LINEAS = 2000   # líneas de texto incluidas en la respuesta
+MAX_FILAS = 1000    # filas por lista (agregadas / eliminadas / modificadas) y hoja
+
+
+# ==== TEXTO ====
+
+def _diff_lineas(texto_a: str, texto_b: str) -> dict:
+    a, b = (texto_a or "").splitlines(), (texto_b or "").splitlines()
+    inicio = 0
+    while inicio < len(a) and inicio < len(b) and a[inicio] == b[inicio]:
+        inicio += 1
+    fin = 0
+    while fin < len(a) - inicio and fin < len(b) - inicio and a[-1 - fin] == b[-1 - fin]:
+        fin += 1
+    medio_a, medio_b = a[inicio:len(a) - fin], b[inicio:len(b) - fin]
+
+    bloques, agregadas, eliminadas, emitidas, total = [], 0, 0, 0, 0
+    nombres = {"replace": "reemplazar", "insert": "insertar", "delete": "eliminar"}
+    for op, i1, i2, j1, j2 in SequenceMatcher(None, medio_a, medio_b).get_opcodes():
+        if op == "equal":
+            continue
+        eliminadas += i2 - i1
+        agregadas += j2 - j1
+        total += 1
+        if emitidas < MAX_LINEAS:
+            antes, despues = medio_a[i1:i2], medio_b[j1:j2]
+            emitidas += len(antes) + len(despues)
+            bloques.append({
+                "op": nombres[op],
+                "lineas_antes": [inicio + i1 + 1, inicio + i2],   # 1-based, inclusivo
+                "lineas_despues": [inicio + j1 + 1, inicio + j2],
+                "antes": antes,
+                "despues": despues,
+            })
+    return {
+        "modo": "lineas",
+        "resumen": {"agregadas": agregadas, "eliminadas": eliminadas, "bloques": total},
+        "bloques": bloques,
+        "truncado": total > len(bloques),
+    }
+
+
+# ==== TABLAS ====
+
+def _hojas(texto: str, tipo: str) -> dict | None:
+    """{hoja: [filas]} del contenido de un XLSX (o {"": filas} de un CSV); None si no lo es."""
+    try:
+        datos = json.loads(texto or "", parse_constant=lambda _: None)  # NaN de celdas vacías -> null
+    except ValueError:
+        return None
+    if tipo == "csv" and isinstance(datos, list):
+        return {"": datos}
+    if isinstance(datos, dict) and all(isinstance(v, list) for v in datos.values()):
+        return datos
+    return None
+
+
+def _columna_clave(filas_a: list, filas_b: list):
+    """Primera columna presente en las dos versiones sin vacíos ni repetidos."""
+    if not filas_a or not filas_b:
+        return None
+    comunes = [c for c in filas_a[0] if c in filas_b[0]]
+    for columna in comunes:
+        valido = True
+        for filas in (filas_a, filas_b):
+            vistos = set()
+            for fila in filas:
+                valor = fila.get(columna)
+                if valor is None or valor == "" or valor in vistos:
+                    valido = False
+                    break
+                vistos.add(valor)
+            if not valido:
+                break
+        if valido:
+            return columna
+    return None
+
+
+def _canonica(fila: dict) -> str:
+    return json.dumps(fila, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _diff_hoja(filas_a: list, filas_b: list) -> dict:
+    clave = _columna_clave(filas_a, filas_b)
+    agregadas, eliminadas, modificadas = [], [], []
+    if clave is not None:
+        por_clave_a = {fila[clave]: fila for fila in filas_a}
+        por_clave_b = {fila[clave]: fila for fila in filas_b}
+        for k, fila in por_clave_b.items():
+            anterior = por_clave_a.get(k)
+            if anterior is None:
+                agregadas.append(fila)
+            elif anterior != fila:
+                cambios = {c: {"antes": anterior.get(c), "despues": fila.get(c)}
+                           for c in dict.fromkeys([*anterior, *fila]) if anterior.get(c) != fila.get(c)}
+                modificadas.append({"clave": k, "cambios": cambios})
+        eliminadas = [fila for k, fila in por_clave_a.items() if k not in por_clave_b]
+    else:
+        # Sin clave: multiconjunto de filas completas
+        cuenta_a = Counter(_canonica(f) for f in filas_a)
+        cuenta_b = Counter(_canonica(f) for f in filas_b)
+        for fila in filas_b:
+            c = _canonica(fila)
+            if cuenta_a[c] > 0:
+                cuenta_a[c] -= 1
+            else:
+                agregadas.append(fila)
+        for fila in filas_a:
+            c = _canonica(fila)
+            if cuenta_b[c] > 0:
+                cuenta_b[c] -= 1
+            else:
+                eliminadas.append(fila)
+    return {
+        "clave": clave,
+        "resumen": {"agregadas": len(agregadas), "eliminadas": len(eliminadas), "modificadas": len(modificadas)},
+        "agregadas": agregadas[:MAX_FILAS],
+        "eliminadas": eliminadas[:MAX_FILAS],
+        "modificadas": modificadas[:MAX_FILAS],
+        "truncado": max(len(agregadas), len(eliminadas), len(modificadas)) > MAX_FILAS,
+    }
+
+
+def _diff_filas(hojas_a: dict, hojas_b: dict) -> dict:
+    hojas, resumen = [], {"agregadas": 0, "eliminadas": 0, "modificadas": 0}
+    for nombre in dict.fromkeys([*hojas_a, *hojas_b]):
+        if nombre not in hojas_b:
+            hojas.append({"hoja": nombre, "estado": "eliminada", "filas": len(hojas_a[nombre])})
+            resumen["eliminadas"] += len(hojas_a[nombre])
+            continue
+        if nombre not in hojas_a:
+            hojas.append({"hoja": nombre, "estado": "agregada", "filas": len(hojas_b[nombre])})
+            resumen["agregadas"] += len(hojas_b[nombre])
+            continue
+        diff = _diff_hoja(hojas_a[nombre], hojas_b[nombre])
+        for k in resumen:
+            resumen[k] += diff["resumen"][k]
+        if any(diff["resumen"].values()):
+            hojas.append({"hoja": nombre, "estado": "modificada", **diff})
+    return {"modo": "filas", "resumen": resumen, "hojas": hojas}
+
+
+def diferenciar(texto_a: str, texto_b: str, tipo: str) -> dict:
+    """Diferencia de `texto_a` (versión anterior) a `texto_b`: por filas si son tablas, si no por líneas."""
+    if tipo in TIPOS_TABLA:
+        hojas_a, hojas_b = _hojas(texto_a, tipo), _hojas(texto_b, tipo)
+        if hojas_a is not None and hojas_b is not None:
+            return _diff_filas(hojas_a, hojas_b)
+    return _diff_lineas(texto_a, texto_b)
+
+
+# ==== CACHÉ ====
+
+def obtener(hash_a: str, hash_b: str) -> dict | None:
+    """Diferencia guardada para el par de hashes (renueva la marca LRU si está vieja, sin commit)."""
+    entrada = db.session.get(DiferenciaVersiones, (hash_a, hash_b, VERSION))
+    if entrada is None:
+        return None
+    marcar_acceso(entrada)
+    return json.loads(zlib.decompress(entrada.resultado).decode("utf-8"))
+
+
+def resumenes(pares) -> dict:
+    """{(hash_a, hash_b): resumen} de los pares ya calculados, en una consulta."""
+    pares = set(pares)
+    if not pares:
+        return {}
+    filas = (db.session.query(DiferenciaVersiones.hash_origen, DiferenciaVersiones.hash_destino,
+                              DiferenciaVersiones.resumen)
+             .filter(DiferenciaVersiones.version == VERSION,
+                     DiferenciaVersiones.hash_destino.in_({b for _, b in pares}))
+             .all())
+    return {(f.hash_origen, f.hash_destino): json.loads(f.resumen)
+            for f in filas if (f.hash_origen, f.hash_destino) in pares}
+
+
+def guardar_varios(resultados: dict) -> None:
+    """
+    Guarda {(hash_a, hash_b): diferencia} en su propia transacción y aplica la expulsión LRU.
+    Los pares que ya estaban (otro worker los calculó a la vez) se ignoran.
+    """
+    if not resultados:
+        return
+    ahora = time.time()
+    for (hash_a, hash_b), diferencia in resultados.items():
+        comprimido = zlib.compress(json.dumps(diferencia, ensure_ascii=False, default=str).encode("utf-8"), 6)
+        try:
+            db.session.add(DiferenciaVersiones(hash_origen=hash_a, hash_destino=hash_b, version=VERSION,
+                                               resultado=comprimido, resumen=json.dumps(diferencia["resumen"]),
+                                               tamano=len(comprimido), ultimo_acceso=ahora))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+    try:
+        if expulsar_excedente():
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"No se pudo aplicar la expulsión de la caché de diferencias: {e}")
+
+
+def expulsar_excedente() -> int:
+    """Elimina las diferencias menos consultadas hasta quedar bajo DIFERENCIAS_MAX_MB (sin commit)."""
+    maximo = int(current_app.config.get("DIFERENCIAS_MAX_MB", 64)) * 1024 * 1024
+    expulsadas = expulsar_lru(DiferenciaVersiones, maximo)
+    if expulsadas:
+        logger.info(f"Caché de diferencias: {expulsadas} entradas expulsadas (LRU)")
+    return expulsadas
+
+
+def obtener_o_calcular(hash_a: str, hash_b: str, textos_fn, tipo: str) -> dict:
+    """
+    Diferencia memoizada; si no está guardada se calcula con `textos_fn()` ->
+    (texto_a, texto_b), que solo se llama entonces (reconstruir versiones cuesta).
+    """
+    diferencia = obtener(hash_a, hash_b)
+    if diferencia is None:
+        texto_a, texto_b = textos_fn()
+        diferencia = diferenciar(texto_a, texto_b, tipo)
+        guardar_varios({(hash_a, hash_b): diferencia})
+    elif db.session.dirty:
+        db.session.commit()  # persiste la marca LRU (solo si se renovó)
+    return diferencia
+
+
+def precalcular(pares: list[tuple]) -> None:
+    """
+    Tras una subida: [(hash_a, texto_a, hash_b, texto_b, tipo)] de versiones consecutivas.
+    Un fallo aquí no afecta a la subida ya confirmada.
+    """
+    try:
+        guardar_varios({(hash_a, hash_b): diferenciar(texto_a, texto_b, tipo)
+                        for hash_a, texto_a, hash_b, texto_b, tipo in pares if hash_a and hash_b})
+    except Exception:
+        db.session.rollback()
+        logger.exception("No se pudieron precalcular las diferencias entre versiones")
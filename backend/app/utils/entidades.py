@@ -0,0 +1,337 @@
+# backend/app/utils/entidades.py
+"""
+Índice de entidades de los documentos: IPs/redes IPv4, hostnames y filas de inventario.
+
+Se extraen del texto al ingerir cada versión y se guardan en tablas indexadas
+(entidades_ip, entidades_host, items_inventario) enlazadas al Documento, para que
+preguntas como "qué documentos mencionan 10.0.3.0/24" o "hosts de la categoría X"
+sean consultas con índice en lugar de volver a leer las hojas de cálculo.
+
+Las IPs se guardan como rango de enteros [inicio, fin] con su prefijo:
+- IPs/redes dentro de un rango: `inicio BETWEEN a AND b` (índice inicio, fin);
+- redes que contienen el rango: 32 búsquedas exactas (prefijo, inicio), una por longitud.
+
+`flask reindexar-entidades` indexa los documentos subidos antes de existir el índice.
+"""
+import ipaddress
+import json
+import re
+import unicodedata
+
+from sqlalchemy import and_, or_
+
+from ..models import db, Documento, EntidadIP, EntidadHost, ItemInventario
+
+# Tope de entidades de cada tipo por documento (un volcado enorme no llena la BD)
+MAX_POR_DOCUMENTO = 20000
+
+# La barra del CIDR puede venir escapada ("\/") en el JSON de las hojas de cálculo
+_RE_IPV4 = re.compile(r"(?<![\d.])((?:\d{1,3}\.){3}\d{1,3})(?:\\?/(\d{1,2}))?(?![\d.])")
+_RE_HOST_ETIQUETA = re.compile(r"\bhost\s*_?name\s*[:=]\s*([A-Za-z0-9][\w.\-]{0,252})", re.IGNORECASE)
+_RE_HOSTNAME = re.compile(r"^[a-z0-9][a-z0-9_\-]{0,62}(?:\.[a-z0-9_\-]{1,63})*$")
+_VALORES_VACIOS = {"", "nan", "null", "none", "-", "n/a"}
+
+# Columnas de una hoja de inventario (texto normalizado: minúsculas y sin tildes)
+_COLUMNAS_INVENTARIO = {
+    "codigo": ("inventario", "patrimonial", "codigo", "serie", "activo"),
+    "descripcion": ("descripcion", "detalle", "articulo"),
+    "marca": ("marca", "fabricante"),
+    "otras": ("modelo", "cantidad", "ubicacion", "estado", "responsable"),
+}
+_FILAS_BUSCAR_CABECERA = 10
+
+
+def _normalizar(valor) -> str:
+    texto = unicodedata.normalize("NFKD", str(valor)).encode("ascii", "ignore").decode()
+    return " ".join(texto.lower().split())
+
+
+def _vacio(valor) -> bool:
+    return valor is None or _normalizar(valor) in _VALORES_VACIOS
+
+
+# ==== IPs ====
+
+def rango_ip(consulta: str) -> tuple[int, int, int]:
+    """
+    Interpreta una consulta de IPs y devuelve (inicio, fin, prefijo):
+    "10.0.3.7", "10.0.3.0/24", prefijo "10.0.3." / "10.0" o rango "10.0.3.1-10.0.3.50".
+
+    Raises:
+        ValueError: si la consulta no es una IP, red, prefijo o rango IPv4 válido.
+    """
+    consulta = (consulta or "").strip()
+    if "-" in consulta:
+        a, b = (int(ipaddress.IPv4Address(p.strip())) for p in consulta.split("-", 1))
+        if a > b:
+            raise ValueError("El rango termina antes de empezar")
+        prefijo = 32 - (a ^ b).bit_length()
+        return a, b, prefijo
+    if "/" in consulta:
+        red = ipaddress.IPv4Network(consulta, strict=False)
+        return int(red.network_address), int(red.broadcast_address), red.prefixlen
+
+    octetos = [o for o in consulta.rstrip(".").split(".") if o != ""]
+    if not 1 <= len(octetos) <= 4 or not all(o.isdigit() and int(o) <= 255 for o in octetos):
+        raise ValueError(f"'{consulta}' no es una IP, red o prefijo IPv4")
+    prefijo = 8 * len(octetos)
+    red = ipaddress.IPv4Network(".".join(octetos + ["0"] * (4 - len(octetos))) + f"/{prefijo}")
+    return int(red.network_address), int(red.broadcast_address), prefijo
+
+
+def _ips_de_texto(texto: str) -> dict:
+    """{texto normalizado: (inicio, fin, prefijo)} de las IPs y redes CIDR del texto."""
+    ips = {}
+    for coincidencia in _RE_IPV4.finditer(texto):
+        ip, prefijo = coincidencia.group(1), coincidencia.group(2)
+        try:
+            if prefijo is not None and int(prefijo) <= 32:
+                red = ipaddress.IPv4Network(f"{ip}/{prefijo}", strict=False)
+            else:
+                red = ipaddress.IPv4Network(ip)
+        except ValueError:
+            continue  # p. ej. versiones "1.2.3.400"
+        ips.setdefault(str(red) if red.prefixlen < 32 else ip,
+                       (int(red.network_address), int(red.broadcast_address), red.prefixlen))
+        if len(ips) >= MAX_POR_DOCUMENTO:
+            break
+    return ips
+
+
+# ==== Hojas de cálculo ====
+
+def _tablas(texto: str, tipo: str) -> dict:
+    """{hoja: [registros]} del contenido JSON de un XLSX/CSV (vacío para otros tipos)."""
+    if tipo not in ("xlsx", "xls", "csv") or not texto:
+        return {}
+    try:
+        datos = json.loads(texto)
+    except ValueError:
+        return {}
+    if isinstance(datos, list):
+        return {None: datos}
+    if isinstance(datos, dict):
+        return {hoja: registros for hoja, registros in datos.items() if isinstance(registros, list)}
+    return {}
+
+
+def _rol_columna(cabecera) -> str | None:
+    nombre = _normalizar(cabecera)
+    for rol, claves in _COLUMNAS_INVENTARIO.items():
+        if any(clave in nombre for clave in claves):
+            return rol
+    return None
+
+
+def _cabeceras(registros: list) -> tuple[dict, int]:
+    """
+    Cabecera efectiva de una hoja: {columna: nombre}, y la fila donde empiezan los datos.
+    Si las columnas no dicen nada (p. ej. "Unnamed: 3") busca la fila de títulos entre
+    las primeras, como en los inventarios con cabecera desplazada.
+    """
+    columnas = list(registros[0].keys()) if registros and isinstance(registros[0], dict) else []
+    propias = {c: c for c in columnas}
+    if sum(_rol_columna(c) is not None for c in columnas) >= 2:
+        return propias, 0
+    for i, registro in enumerate(registros[:_FILAS_BUSCAR_CABECERA]):
+        if not isinstance(registro, dict):
+            continue
+        if sum(_rol_columna(v) is not None for v in registro.values() if isinstance(v, str)) >= 2:
+            return {c: str(v).strip() for c, v in registro.items() if not _vacio(v)}, i + 1
+    return propias, 0
+
+
+def _recortar(valor, largo: int) -> str | None:
+    return None if _vacio(valor) else str(valor).strip()[:largo]
+
+
+def _entidades_de_hoja(hoja, registros: list, hosts: set, inventario: list) -> None:
+    cabeceras, desde = _cabeceras(registros)
+    roles = {c: _rol_columna(nombre) for c, nombre in cabeceras.items()}
+    columnas_host = [c for c, nombre in cabeceras.items() if "host" in _normalizar(nombre)]
+    es_inventario = len({r for r in roles.values() if r}) >= 2
+
+    for fila, registro in enumerate(registros[desde:], start=desde):
+        if not isinstance(registro, dict):
+            continue
+        for columna in columnas_host:
+            _agregar_host(registro.get(columna), hosts)
+
+        if not es_inventario or len(inventario) >= MAX_POR_DOCUMENTO:
+            continue
+        datos = {cabeceras[c]: v for c, v in registro.items() if c in cabeceras and not _vacio(v)}
+        textos = [v for v in datos.values() if isinstance(v, str)]
+        if not datos or (len(textos) >= 2 and all(_rol_columna(v) for v in textos)):
+            continue  # fila vacía o cabecera repetida
+        item = {"hoja": hoja, "fila": fila, "codigo": None, "descripcion": None, "marca": None,
+                "datos": json.dumps(datos, ensure_ascii=False, default=str)}
+        for columna, rol in roles.items():
+            if rol in ("codigo", "descripcion", "marca") and item[rol] is None:
+                item[rol] = _recortar(registro.get(columna), 255 if rol == "descripcion" else 120)
+        inventario.append(item)
+
+
+def _agregar_host(valor, hosts: set) -> None:
+    if _vacio(valor) or len(hosts) >= MAX_POR_DOCUMENTO:
+        return
+    nombre = str(valor).strip().lower().rstrip(".")
+    if "libre" in nombre or nombre.isdigit() or _RE_IPV4.fullmatch(nombre):
+        return
+    if _RE_HOSTNAME.match(nombre) and len(nombre) <= 253:
+        hosts.add(nombre)
+
+
+# ==== Extracción e indexado ====
+
+def extraer_entidades(texto: str, tipo: str) -> dict:
+    """
+    Entidades de un texto extraído (el de `Documento.contenido`).
+
+    Returns:
+        {"ips": {texto: (inicio, fin, prefijo)}, "hosts": set, "inventario": [dict]}
+    """
+    texto = texto or ""
+    hosts, inventario = set(), []
+    for hoja, registros in _tablas(texto, tipo).items():
+        _entidades_de_hoja(hoja, registros, hosts, inventario)
+    for coincidencia in _RE_HOST_ETIQUETA.finditer(texto):
+        _agregar_host(coincidencia.group(1), hosts)
+    return {"ips": _ips_de_texto(texto), "hosts": hosts, "inventario": inventario}
+
+
+def borrar(documento_id: int) -> None:
+    """Quita las entidades de un documento (antes de reindexarlo o de eliminarlo)."""
+    for modelo in (EntidadIP, EntidadHost, ItemInventario):
+        modelo.query.filter(modelo.documento_id == documento_id).delete(synchronize_session=False)
+
+
+def indexar(doc, texto: str, reemplazar: bool = False) -> dict:
+    """
+    Añade a la sesión las entidades de `doc` (sin commit: van en la transacción de la subida).
+    `doc` puede no tener id todavía. Con reemplazar=True se borran antes las que tuviera.
+    Devuelve el número de entidades de cada tipo.
+    """
+    if reemplazar and doc.id is not None:
+        borrar(doc.id)
+    entidades = extraer_entidades(texto, doc.tipo)
+    filas = [EntidadIP(documento=doc, inicio=inicio, fin=fin, prefijo=prefijo, texto=ip)
+             for ip, (inicio, fin, prefijo) in entidades["ips"].items()]
+    filas += [EntidadHost(documento=doc, hostname=h) for h in sorted(entidades["hosts"])]
+    filas += [ItemInventario(documento=doc, **item) for item in entidades["inventario"]]
+    db.session.add_all(filas)
+    return {"ips": len(entidades["ips"]), "hosts": len(entidades["hosts"]),
+            "inventario": len(entidades["inventario"])}
+
+
+# ==== Consultas ====
+
+def filtro_ips(inicio: int, fin: int):
+    """
+    Condición de las EntidadIP que solapan [inicio, fin]. Una red que solapa el rango
+    o empieza dentro de él o contiene `inicio`; estas últimas se buscan con una
+    comparación exacta (prefijo, inicio) por cada longitud de prefijo posible.
+    """
+    contenedoras = []
+    for p in range(32):
+        mascara = (0xFFFFFFFF << (32 - p)) & 0xFFFFFFFF
+        contenedoras.append(and_(EntidadIP.prefijo == p, EntidadIP.inicio == inicio & mascara))
+    return or_(EntidadIP.inicio.between(inicio, fin), *contenedoras)
+
+
+def documentos_con_ips(consulta: str, categoria: str | None = None, limite: int = 500) -> dict:
+    """Documentos que mencionan IPs o redes que solapan `consulta`, con las IPs encontradas."""
+    inicio, fin, prefijo = rango_ip(consulta)
+    q = (db.session.query(EntidadIP.documento_id, EntidadIP.texto, Documento.nombre, Documento.grupo,
+                          Documento.version, Documento.categoria)
+         .join(Documento, Documento.id == EntidadIP.documento_id)
+         .filter(filtro_ips(inicio, fin)))
+    if categoria:
+        q = q.filter(Documento.categoria == categoria)
+
+    documentos = {}
+    for fila in q.order_by(EntidadIP.documento_id, EntidadIP.inicio):
+        doc = documentos.get(fila.documento_id)
+        if doc is None:
+            if len(documentos) >= limite:
+                break
+            doc = documentos[fila.documento_id] = {
+                "id": fila.documento_id, "nombre": fila.nombre, "grupo": fila.grupo,
+                "version": fila.version, "categoria": fila.categoria, "ips": []}
+        doc["ips"].append(fila.texto)
+    return {
+        "consulta": {"inicio": str(ipaddress.IPv4Address(inicio)), "fin": str(ipaddress.IPv4Address(fin)),
+                     "prefijo": prefijo},
+        "documentos": list(documentos.values()),
+    }
+
+
+def hosts(categoria: str | None = None, prefijo: str | None = None, limite: int = 1000) -> list[dict]:
+    """Hostnames (opcionalmente de una categoría o que empiezan por `prefijo`) con sus documentos."""
+    q = (db.session.query(EntidadHost.hostname, EntidadHost.documento_id)
+         .join(Documento, Documento.id == EntidadHost.documento_id))
+    if categoria:
+        q = q.filter(Documento.categoria == categoria)
+    if prefijo:
+        q = q.filter(EntidadHost.hostname.startswith(prefijo.strip().lower(), autoescape=True))
+
+    resultado = {}
+    for hostname, documento_id in q.order_by(EntidadHost.hostname, EntidadHost.documento_id):
+        if hostname not in resultado:
+            if len(resultado) >= limite:
+                break
+            resultado[hostname] = []
+        resultado[hostname].append(documento_id)
+    return [{"hostname": h, "documentos": ids} for h, ids in resultado.items()]
+
+
+def items_inventario(categoria: str | None = None, documento_id: int | None = None, texto: str | None = None,
+                     marca: str | None = None, limite: int = 500, desde: int = 0) -> list[dict]:
+    """Filas de inventario filtradas por categoría, documento, marca o texto en código/descripción."""
+    q = (db.session.query(ItemInventario)
+         .join(Documento, Documento.id == ItemInventario.documento_id))
+    if categoria:
+        q = q.filter(Documento.categoria == categoria)
+    if documento_id is not None:
+        q = q.filter(ItemInventario.documento_id == documento_id)
+    if marca:
+        q = q.filter(ItemInventario.marca == marca)
+    if texto:
+        q = q.filter(or_(ItemInventario.codigo.startswith(texto, autoescape=True),
+                         ItemInventario.descripcion.contains(texto, autoescape=True)))
+    filas = q.order_by(ItemInventario.documento_id, ItemInventario.hoja, ItemInventario.fila).offset(desde).limit(limite)
+    return [{"documento_id": i.documento_id, "hoja": i.hoja, "fila": i.fila, "codigo": i.codigo,
+             "descripcion": i.descripcion, "marca": i.marca, "datos": json.loads(i.datos)} for i in filas]
+
+
+def resumen_documento(documento_id: int) -> dict:
+    """Entidades indexadas de un documento."""
+    ips = [t for (t,) in db.session.query(EntidadIP.texto).filter(EntidadIP.documento_id == documento_id)
+           .order_by(EntidadIP.inicio)]
+    nombres = [h for (h,) in db.session.query(EntidadHost.hostname).filter(EntidadHost.documento_id == documento_id)
+               .order_by(EntidadHost.hostname)]
+    inventario = ItemInventario.query.filter(ItemInventario.documento_id == documento_id).count()
+    return {"documento_id": documento_id, "ips": ips, "hosts": nombres, "items_inventario": inventario}
+
+
+def registrar_comandos(app) -> None:
+    import click
+
+    @app.cli.command("reindexar-entidades")
+    @click.option("--todos", is_flag=True, help="Reindexar también los documentos que ya tienen entidades.")
+    def reindexar_entidades(todos):
+        """Indexa IPs, hosts e inventario de los documentos existentes."""
+        consulta = db.session.query(Documento.id).order_by(Documento.id)
+        if not todos:
+            indexados = (db.session.query(EntidadIP.documento_id)
+                         .union(db.session.query(EntidadHost.documento_id),
+                                db.session.query(ItemInventario.documento_id)))
+            consulta = consulta.filter(Documento.id.notin_(indexados))
+        ids = [i for (i,) in consulta]
+        totales = {"ips": 0, "hosts": 0, "inventario": 0}
+        for inicio in range(0, len(ids), 200):
+            for doc in Documento.query.filter(Documento.id.in_(ids[inicio:inicio + 200])).all():
+                for clave, n in indexar(doc, doc.contenido or "", reemplazar=True).items():
+                    totales[clave] += n
+            db.session.commit()
+            db.session.expunge_all()
+        print(f"{len(ids)} documentos indexados: {totales}")
@@ -1,25 +1,74 @@
-import pandas as pd
+import logging
+from io import BytesIO
 
-def es_graficable(file_path):
+logger = logging.getLogger(__name__)
+
+# Clave del veredicto en la caché de extracción (cambiar si cambia el criterio)
+VERSION_VALIDADOR = "graficable-3"
+
+# Filas leídas por hoja para decidir; 0 = leer la hoja completa
+MUESTRA_FILAS = 1000
+
+
+def clave_cache(muestra_filas: int = MUESTRA_FILAS) -> str:
+    """Versión con la que se guarda el veredicto: depende también del tamaño de la muestra."""
+    return f"{VERSION_VALIDADOR}-{int(muestra_filas or 0)}"
+
+
+def es_graficable(file_path, muestra_filas: int = MUESTRA_FILAS):
+    """Compatibilidad: valida un archivo en disco (.csv/.xlsx)."""
+    extension = ".csv" if file_path.endswith('.csv') else ".xlsx" if file_path.endswith('.xlsx') else ""
+    if not extension:
+        return False
+    with open(file_path, "rb") as f:
+        return evaluar_graficable(f, extension, muestra_filas)["graficable"]
+
+
+def evaluar_graficable(archivo, extension: str, muestra_filas: int = MUESTRA_FILAS) -> dict:
+    """
+    Decide si un CSV/XLSX es graficable leyendo solo las primeras `muestra_filas` filas
+    de cada hoja, directamente desde bytes o un objeto archivo (sin pasar por disco).
+    Si una hoja llena la muestra y no sale graficable, el resto de filas podría cambiar
+    el tipo de sus columnas: esa hoja se vuelve a leer completa.
+
+    Se detiene en la primera hoja graficable. Devuelve:
+        {"graficable": bool, "hojas": [{"hoja": str, "graficable": bool}, ...]}
+    con el veredicto de cada hoja evaluada (para CSV, una única hoja None), más
+    "error" si no se pudo leer el archivo (ese veredicto no debe cachearse).
+    """
+    import pandas as pd  # diferido: no se carga al arrancar la app
+
+    if isinstance(archivo, (bytes, bytearray)):
+        archivo = BytesIO(archivo)
+    nrows = muestra_filas or None
+    hojas = []
     try:
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
-            return evaluar_dataframe(df)
+        if extension == ".csv":
+            inicio = archivo.tell()
+            df = pd.read_csv(archivo, nrows=nrows)
+            graficable = evaluar_dataframe(df)
+            if not graficable and nrows and len(df) >= nrows:
+                archivo.seek(inicio)
+                graficable = evaluar_dataframe(pd.read_csv(archivo))
+            hojas.append({"hoja": None, "graficable": graficable})
 
-        elif file_path.endswith('.xlsx'):
-            with pd.ExcelFile(file_path) as xls:   # <-- Aquí el cambio
+        elif extension == ".xlsx":
+            # El lector openpyxl de pandas abre en read_only y deja de leer tras nrows
+            with pd.ExcelFile(archivo, engine="openpyxl") as xls:
                 for hoja in xls.sheet_names:
-                    df = xls.parse(hoja)
-                    if evaluar_dataframe(df):
-                        return True
-            return False
-
-        else:
-            return False
+                    df = xls.parse(hoja, nrows=nrows)
+                    graficable = evaluar_dataframe(df)
+                    if not graficable and nrows and len(df) >= nrows:
+                        graficable = evaluar_dataframe(xls.parse(hoja))
+                    hojas.append({"hoja": hoja, "graficable": graficable})
+                    if graficable:
+                        break
 
     except Exception as e:
-        print("Error leyendo archivo:", e)
-        return False
+        logger.warning(f"Error leyendo archivo para validar si es graficable: {e}")
+        return {"graficable": any(h["graficable"] for h in hojas), "hojas": hojas, "error": str(e)}
+
+    return {"graficable": any(h["graficable"] for h in hojas), "hojas": hojas}
 
 
 
@@ -0,0 +1,141 @@
+# backend/app/utils/estadisticas.py
+"""
+Estadísticas del panel mantenidas de forma incremental en la tabla `estadisticas_documentos`.
+
+Las altas, reemplazos y bajas ajustan los contadores con un upsert dentro de la misma
+transacción que modifica `documentos`, así GET /api/estadisticas no recorre el corpus.
+`flask reconstruir-estadisticas` recalcula la tabla desde cero si alguna vez se desajusta.
+"""
+import logging
+from sqlalchemy import func, update, cast
+
+from ..models import db, Documento, EstadisticaDocumentos
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONES = ("total", "categoria", "tipo", "usuario", "fecha")
+
+
+def instantanea(doc) -> dict:
+    """Valores de `doc` que cuentan en las estadísticas (tomar antes de modificarlo)."""
+    return {
+        "total": "total",
+        "categoria": doc.categoria or "General",
+        "tipo": doc.tipo or "",
+        "usuario": str(doc.usuario_id) if doc.usuario_id is not None else "anonimo",
+        "fecha": (doc.fecha_subida or "")[:10],
+        "_bytes": int(doc.tamano or 0),
+    }
+
+
+def _upsert(dimension: str, clave: str, documentos: int, bytes_: int) -> None:
+    tabla = EstadisticaDocumentos
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto in ("sqlite", "postgresql"):
+        if dialecto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(tabla).values(dimension=dimension, clave=clave, documentos=documentos, bytes=bytes_)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[tabla.dimension, tabla.clave],
+            set_={"documentos": tabla.documentos + documentos, "bytes": tabla.bytes + bytes_},
+        )
+        db.session.execute(stmt)
+        return
+
+    resultado = db.session.execute(
+        update(tabla)
+        .where(tabla.dimension == dimension, tabla.clave == clave)
+        .values(documentos=tabla.documentos + documentos, bytes=tabla.bytes + bytes_)
+    )
+    if resultado.rowcount == 0:
+        db.session.add(tabla(dimension=dimension, clave=clave, documentos=documentos, bytes=bytes_))
+
+
+def _ajustar(valores: dict, signo: int) -> None:
+    for dimension in DIMENSIONES:
+        _upsert(dimension, valores[dimension], signo, signo * valores["_bytes"])
+
+
+def registrar_alta(doc) -> None:
+    _ajustar(instantanea(doc), +1)
+
+
+def registrar_baja(doc) -> None:
+    _ajustar(instantanea(doc), -1)
+
+
+def registrar_cambio(antes: dict, doc) -> None:
+    """Reemplazo: resta los valores previos y suma los nuevos."""
+    _ajustar(antes, -1)
+    registrar_alta(doc)
+
+
+def obtener_estadisticas() -> dict:
+    """Lee la tabla agregada (su tamaño depende de los valores distintos, no del número de documentos)."""
+    resultado = {"total": {"documentos": 0, "bytes": 0}}
+    resultado.update({f"por_{d}": {} for d in DIMENSIONES if d != "total"})
+    for fila in EstadisticaDocumentos.query.all():
+        valores = {"documentos": fila.documentos, "bytes": fila.bytes}
+        if fila.dimension == "total":
+            resultado["total"] = valores
+        elif fila.documentos > 0:
+            resultado[f"por_{fila.dimension}"][fila.clave] = valores
+    return resultado
+
+
+def reconstruir(tamano_de=None) -> None:
+    """
+    Recalcula la tabla desde `documentos` con GROUP BY.
+
+    Args:
+        tamano_de: función opcional doc -> bytes para rellenar `tamano` en documentos antiguos que no lo tienen.
+    """
+    if tamano_de is not None:
+        for doc in Documento.query.filter(Documento.tamano.is_(None)).all():
+            doc.tamano = tamano_de(doc)
+        db.session.flush()
+
+    EstadisticaDocumentos.query.delete()
+
+    documentos, bytes_ = db.session.query(func.count(Documento.id), func.coalesce(func.sum(Documento.tamano), 0)).one()
+    db.session.add(EstadisticaDocumentos(dimension="total", clave="total", documentos=documentos, bytes=int(bytes_)))
+
+    columnas = {
+        "categoria": func.coalesce(Documento.categoria, "General"),
+        "tipo": func.coalesce(Documento.tipo, ""),
+        "usuario": func.coalesce(cast(Documento.usuario_id, db.String), "anonimo"),
+        "fecha": func.substr(Documento.fecha_subida, 1, 10),
+    }
+    for dimension, expresion in columnas.items():
+        filas = (db.session.query(expresion.label("clave"),
+                                  func.count(Documento.id),
+                                  func.coalesce(func.sum(Documento.tamano), 0))
+                 .group_by(expresion)
+                 .all())
+        for clave, documentos, bytes_ in filas:
+            db.session.add(EstadisticaDocumentos(dimension=dimension, clave=str(clave),
+                                                 documentos=documentos, bytes=int(bytes_)))
+    db.session.commit()
+    logger.info("Estadísticas de documentos reconstruidas")
+
+
+def _tamano_en_disco(doc) -> int:
+    from ..routes import ruta_fisica_de_documento
+    ruta = ruta_fisica_de_documento(doc)
+    return ruta.stat().st_size if ruta.exists() else 0
+
+
+def asegurar_inicializadas() -> None:
+    """Primera vez (BD anterior a esta tabla): construye las estadísticas a partir de los documentos."""
+    if db.session.get(EstadisticaDocumentos, ("total", "total")) is None:
+        reconstruir(tamano_de=_tamano_en_disco)
+
+
+def registrar_comandos(app) -> None:
+    @app.cli.command("reconstruir-estadisticas")
+    def reconstruir_estadisticas():
+        """Recalcula estadisticas_documentos desde la tabla documentos."""
+        reconstruir(tamano_de=_tamano_en_disco)
+        print("Estadísticas reconstruidas.")
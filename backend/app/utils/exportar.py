@@ -0,0 +1,101 @@
+# backend/app/utils/exportar.py
+"""
+Exportación de varios documentos en un ZIP generado al vuelo.
+
+El ZIP se escribe sobre una salida no posicionable (zipfile usa entonces descriptores
+de datos tras cada archivo) y cada archivo se copia por bloques: lo que se va
+comprimiendo se entrega a la respuesta en cuanto sale, así la memoria no depende del
+número ni del tamaño de los documentos y no se escribe nada en disco.
+
+Los formatos que ya son comprimidos (PDF, DOCX, XLSX, imágenes) se guardan sin
+recomprimir (ZIP_STORED); el resto con deflate. Al final se añade `manifest.json`
+con los metadatos de cada documento y el SHA-256 de los bytes exportados.
+"""
+import hashlib
+import json
+import os
+import time
+import zipfile
+from datetime import datetime, timezone
+
+BLOQUE = 64 * 1024
+NOMBRE_MANIFIESTO = "manifest.json"
+
+# Contenedores ZIP o formatos con compresión propia: recomprimirlos solo gasta CPU
+SIN_COMPRESION = {"pdf", "docx", "xlsx", "pptx", "zip", "gz", "png", "jpg", "jpeg", "gif", "webp"}
+
+
+class _Salida:
+    """Archivo de solo escritura y sin seek: acumula lo que escribe zipfile hasta vaciarlo."""
+
+    def __init__(self):
+        self._trozos = []
+
+    def write(self, datos) -> int:
+        self._trozos.append(bytes(datos))
+        return len(datos)
+
+    def flush(self) -> None:
+        pass
+
+    def vaciar(self):
+        if self._trozos:
+            datos = b"".join(self._trozos)
+            self._trozos.clear()
+            yield datos
+
+
+def _zinfo(documento: dict) -> zipfile.ZipInfo:
+    try:
+        marca = time.localtime(os.path.getmtime(documento["ruta"]))[:6]
+    except OSError:
+        marca = time.localtime()[:6]
+    zinfo = zipfile.ZipInfo(documento["ruta_zip"], date_time=max(marca, (1980, 1, 1, 0, 0, 0)))
+    tipo = (documento.get("tipo") or "").lower()
+    zinfo.compress_type = zipfile.ZIP_STORED if tipo in SIN_COMPRESION else zipfile.ZIP_DEFLATED
+    zinfo.external_attr = 0o644 << 16
+    return zinfo
+
+
+def zip_en_streaming(documentos: list[dict], filtro: dict | None = None):
+    """
+    Genera los bytes del ZIP.
+
+    Cada documento es un dict con "ruta" (archivo en disco), "ruta_zip" (nombre dentro
+    del ZIP) y los metadatos que se copian al manifiesto (id, nombre, grupo, version,
+    categoria, fecha, tipo, tamano, hash). Los que no están en disco se listan en
+    el manifiesto como "faltantes".
+    """
+    salida = _Salida()
+    exportados, faltantes = [], []
+    with zipfile.ZipFile(salida, mode="w", compresslevel=6) as zf:
+        for documento in documentos:
+            metadatos = {k: v for k, v in documento.items() if k != "ruta"}
+            ruta = documento.get("ruta")
+            if not ruta or not os.path.isfile(ruta):
+                faltantes.append(metadatos)
+                continue
+
+            sha256, tamano = hashlib.sha256(), 0
+            with open(ruta, "rb") as origen, zf.open(_zinfo(documento), mode="w") as destino:
+                while bloque := origen.read(BLOQUE):
+                    sha256.update(bloque)
+                    tamano += len(bloque)
+                    destino.write(bloque)
+                    yield from salida.vaciar()
+            yield from salida.vaciar()
+
+            metadatos["sha256"] = sha256.hexdigest()
+            metadatos["bytes"] = tamano
+            if documento.get("hash") and documento["hash"] != metadatos["sha256"]:
+                metadatos["aviso"] = "El archivo en disco no coincide con el hash registrado"
+            exportados.append(metadatos)
+
+        manifiesto = {
+            "generado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "filtro": filtro or {},
+            "documentos": exportados,
+            "faltantes": faltantes,
+        }
+        zf.writestr(NOMBRE_MANIFIESTO, json.dumps(manifiesto, ensure_ascii=False, indent=2, default=str))
+    yield from salida.vaciar()
@@ -0,0 +1,248 @@
+# backend/app/utils/extraccion_aislada.py
+"""
+Extracción en procesos trabajadores aislados, con presupuesto de tiempo y memoria por archivo.
+
+Un PDF o XLSX malformado puede dejar a pdfplumber/openpyxl minutos en bucle o agotar la
+memoria. Con EXTRACCION_AISLADA cada extracción se envía a un proceso del pool:
+- si no responde en EXTRACCION_TIMEOUT segundos se mata y se sustituye por otro;
+- el proceso tiene un límite de memoria (setrlimit RLIMIT_AS = EXTRACCION_MAX_MEMORIA_MB);
+- se aplican los topes de páginas/filas de extraer_contenido.
+Los procesos se reutilizan entre archivos, así el coste de arranque se paga una vez.
+Otras tareas sobre archivos subidos (las vistas previas de vistas_previas.py) usan el
+mismo pool y los mismos límites con `ejecutar`.
+
+Cada trabajador abre su propio grupo de procesos: al matarlo se mata el grupo entero,
+incluido el pool de OCR que haya creado (si no, sus hijos quedarían huérfanos).
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from io import BytesIO
+
+from .ocr import extraer_contenido, configurar_ocr, LimiteExtraccionExcedido, _CONFIG_OCR
+
+logger = logging.getLogger(__name__)
+
+_CONFIG = {
+    "habilitada": False,
+    "procesos": 2,
+    "timeout": 120,
+    "max_memoria_mb": 2048,
+    "max_paginas": None,
+    "max_filas": None,
+}
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ExtraccionFallida(Exception):
+    """
+    Resultado estructurado de una extracción que no terminó.
+
+    motivo: "timeout", "memoria", "demasiado_grande" o "error".
+    """
+    CODIGOS = {
+        "timeout": "EXTRACCION_TIMEOUT",
+        "memoria": "EXTRACCION_SIN_MEMORIA",
+        "demasiado_grande": "ARCHIVO_DEMASIADO_GRANDE",
+        "error": "EXTRACCION_ERROR",
+    }
+
+    def __init__(self, motivo: str, mensaje: str):
+        super().__init__(mensaje)
+        self.motivo = motivo
+        self.mensaje = mensaje
+
+    @property
+    def codigo(self) -> str:
+        return self.CODIGOS.get(self.motivo, "EXTRACCION_ERROR")
+
+
+def configurar(habilitada: bool = False, procesos: int = 2, timeout: float = 120,
+               max_memoria_mb: int = 2048, max_paginas: int | None = None, max_filas: int | None = None) -> None:
+    _CONFIG.update(habilitada=habilitada, procesos=procesos, timeout=timeout,
+                   max_memoria_mb=max_memoria_mb, max_paginas=max_paginas, max_filas=max_filas)
+
+
+def _limitar_memoria(max_memoria_mb: int) -> None:
+    try:
+        import resource
+    except ImportError:  # Windows: sin setrlimit, solo aplica el timeout
+        return
+    limite = max_memoria_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+
+
+def _extraer_local(data: bytes, tipo: str) -> tuple[str, dict]:
+    return extraer_contenido(BytesIO(data), tipo, max_paginas=_CONFIG["max_paginas"], max_filas=_CONFIG["max_filas"])
+
+
+def _bucle_trabajador(conexion, max_memoria_mb, max_paginas, max_filas, config_ocr) -> None:
+    """Proceso hijo: recibe (función, argumentos) y devuelve (estado, valor) hasta recibir None."""
+    if hasattr(os, "setpgid"):
+        os.setpgid(0, 0)  # grupo propio: lo hereda el pool de OCR (ver _Trabajador.matar)
+    if max_memoria_mb:
+        _limitar_memoria(max_memoria_mb)
+    configurar_ocr(**config_ocr)
+    _CONFIG.update(max_paginas=max_paginas, max_filas=max_filas)
+    while True:
+        try:
+            mensaje = conexion.recv()
+        except EOFError:
+            return
+        if mensaje is None:
+            return
+        funcion, args = mensaje
+        try:
+            conexion.send(("ok", funcion(*args)))
+        except LimiteExtraccionExcedido as e:
+            conexion.send(("demasiado_grande", str(e)))
+        except MemoryError:
+            conexion.send(("memoria", f"Memoria agotada (límite {max_memoria_mb} MB)"))
+            return  # tras un MemoryError el estado del proceso no es fiable: se sustituye
+        except Exception as e:
+            conexion.send(("error", str(e)))
+
+
+class _Trabajador:
+    def __init__(self, contexto):
+        self.conexion, extremo_hijo = contexto.Pipe()
+        # No daemon: el OCR del hijo puede necesitar su propio pool de procesos
+        self.proceso = contexto.Process(
+            target=_bucle_trabajador,
+            args=(extremo_hijo, _CONFIG["max_memoria_mb"], _CONFIG["max_paginas"], _CONFIG["max_filas"], dict(_CONFIG_OCR)),
+            daemon=False,
+        )
+        self.proceso.start()
+        extremo_hijo.close()
+
+    def vivo(self) -> bool:
+        return self.proceso.is_alive()
+
+    def matar(self) -> None:
+        """SIGKILL al grupo del trabajador (él y sus procesos de OCR); en Windows solo a él."""
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self.proceso.pid, signal.SIGKILL)
+                return
+            except (ProcessLookupError, PermissionError):
+                pass  # aún no había creado su grupo, o ya terminó
+        self.proceso.kill()
+
+    def terminar(self, forzar: bool = False) -> None:
+        try:
+            if forzar:
+                self.matar()
+            else:
+                self.conexion.send(None)
+        except (OSError, ValueError):
+            pass
+        self.proceso.join(timeout=5)
+        if self.proceso.is_alive():
+            self.matar()
+            self.proceso.join()
+        elif forzar:
+            self.matar()  # el trabajador murió solo (p. ej. OOM killer): quedan sus hijos de OCR
+        self.conexion.close()
+
+
+class PoolExtraccion:
+    """Pool de procesos reutilizables; cada extracción ocupa un trabajador de principio a fin."""
+
+    def __init__(self, procesos: int):
+        self._contexto = multiprocessing.get_context("spawn")
+        self._libres = queue.Queue()
+        for _ in range(procesos):
+            self._libres.put(None)  # se crean bajo demanda
+        self._todos = set()
+        self._lock = threading.Lock()
+
+    def _nuevo(self) -> _Trabajador:
+        trabajador = _Trabajador(self._contexto)
+        with self._lock:
+            self._todos.add(trabajador)
+        return trabajador
+
+    def _descartar(self, trabajador: _Trabajador) -> None:
+        with self._lock:
+            self._todos.discard(trabajador)
+        trabajador.terminar(forzar=True)
+
+    def ejecutar(self, funcion, args: tuple, timeout: float):
+        """`funcion(*args)` en un trabajador; `funcion` debe ser de nivel de módulo (se serializa por nombre)."""
+        trabajador = self._libres.get()
+        if trabajador is None or not trabajador.vivo():
+            if trabajador is not None:
+                self._descartar(trabajador)
+            trabajador = self._nuevo()
+        try:
+            trabajador.conexion.send((funcion, args))
+            if not trabajador.conexion.poll(timeout):
+                self._descartar(trabajador)
+                trabajador = None
+                raise ExtraccionFallida("timeout", f"La extracción superó {timeout:g} s y se canceló")
+            estado, valor = trabajador.conexion.recv()
+        except (EOFError, OSError):
+            # El proceso murió sin responder (p. ej. lo mató el sistema por memoria)
+            self._descartar(trabajador)
+            trabajador = None
+            raise ExtraccionFallida("memoria", "El proceso de extracción terminó inesperadamente")
+        finally:
+            self._libres.put(trabajador)
+
+        if estado == "ok":
+            return valor
+        # Tras "memoria" el hijo termina; se sustituye al volver a tomarlo del pool
+        raise ExtraccionFallida(estado, valor)
+
+    def extraer(self, data: bytes, tipo: str, timeout: float) -> tuple[str, dict]:
+        return self.ejecutar(_extraer_local, (data, tipo), timeout)
+
+    def cerrar(self) -> None:
+        with self._lock:
+            trabajadores = list(self._todos)
+            self._todos.clear()
+        for trabajador in trabajadores:
+            trabajador.terminar()
+
+
+def _obtener_pool() -> PoolExtraccion:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PoolExtraccion(_CONFIG["procesos"])
+            atexit.register(_pool.cerrar)
+        return _pool
+
+
+def extraer(data: bytes, tipo: str) -> tuple[str, dict]:
+    """
+    Extrae contenido y patrones respetando los límites configurados.
+
+    Raises:
+        ExtraccionFallida: timeout, memoria, archivo demasiado grande o error de extracción.
+    """
+    if not _CONFIG["habilitada"]:
+        try:
+            return _extraer_local(data, tipo)
+        except LimiteExtraccionExcedido as e:
+            raise ExtraccionFallida("demasiado_grande", str(e))
+    return _obtener_pool().extraer(data, tipo, _CONFIG["timeout"])
+
+
+def ejecutar(funcion, *args):
+    """
+    Ejecuta `funcion(*args)` en un trabajador aislado, con el mismo tiempo y memoria
+    máximos que una extracción (o en este proceso si EXTRACCION_AISLADA está desactivada).
+    `funcion` debe ser de nivel de módulo y sus argumentos serializables.
+
+    Raises:
+        ExtraccionFallida: timeout, memoria o excepción dentro del trabajador.
+    """
+    if not _CONFIG["habilitada"]:
+        return funcion(*args)
+    return _obtener_pool().ejecutar(funcion, args, _CONFIG["timeout"])
@@ -0,0 +1,132 @@
+# backend/app/utils/graficos.py
+"""
+Lectura de series para /api/graficos-multiples.
+
+Los archivos de una petición se leen a la vez en un pool de procesos compartido y
+acotado (GRAFICOS_PROCESOS), con un presupuesto de tiempo por petición
+(GRAFICOS_TIEMPO_MAX): lo que no termina a tiempo se devuelve como error de esa entrada
+y el resto llega igualmente. Cada documento se abre una sola vez aunque se pidan
+varias de sus hojas.
+
+Procesos y no hilos: openpyxl es Python puro y con hilos los libros se leen de uno en
+uno por el GIL (ver benchmarks/graficos_multiples.py). Una lectura que agota el
+presupuesto no se puede interrumpir dentro de su proceso: el pool se retira (las
+peticiones nuevas usan otro) y sus procesos se matan en cuanto ninguna petición en
+curso lo está usando.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturoTimeout
+from contextlib import contextmanager
+
+_pool = None
+_pool_lock = threading.Lock()
+_usos: dict = {}        # pool -> peticiones que lo están usando
+_retirados: set = set()  # pools con lecturas agotadas, a cerrar cuando queden sin uso
+
+
+def _pool_actual(procesos: int) -> ProcessPoolExecutor:
+    """Con _pool_lock tomado."""
+    global _pool
+    if _pool is None:
+        # spawn, como la extracción aislada: no se heredan conexiones ni hilos del servidor
+        _pool = ProcessPoolExecutor(max_workers=max(1, procesos), mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _obtener_pool(procesos: int) -> ProcessPoolExecutor:
+    with _pool_lock:
+        return _pool_actual(procesos)
+
+
+def _cerrar(pool: ProcessPoolExecutor) -> None:
+    """Cancela lo pendiente y mata los procesos (shutdown no interrumpe lo que está en curso)."""
+    procesos = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for proceso in procesos:
+        proceso.kill()
+
+
+@contextmanager
+def _pool_en_uso(procesos: int):
+    """Pool compartido durante una petición; `retirar()` lo aparta tras un tiempo agotado."""
+    with _pool_lock:
+        pool = _pool_actual(procesos)
+        _usos[pool] = _usos.get(pool, 0) + 1
+
+    def retirar() -> None:
+        global _pool
+        with _pool_lock:
+            _retirados.add(pool)
+            if _pool is pool:
+                _pool = None
+
+    try:
+        yield pool, retirar
+    finally:
+        with _pool_lock:
+            _usos[pool] -= 1
+            cerrar = not _usos[pool] and pool in _retirados
+            if cerrar:
+                del _usos[pool]
+                _retirados.discard(pool)
+        if cerrar:
+            _cerrar(pool)
+
+
+def _serie(df) -> list[dict]:
+    etiquetas = df.iloc[:, 0].astype(str).tolist()
+    valores = df.iloc[:, 1].fillna(0).astype(float).tolist() if df.shape[1] > 1 else df.iloc[:, 0].tolist()
+    col_x = str(df.columns[0])
+    col_y = str(df.columns[1]) if df.shape[1] > 1 else col_x
+    return [{col_x: e, col_y: v} for e, v in zip(etiquetas, valores)]
+
+
+def leer_series(ruta: str, tipo: str, nombre: str, hojas: list) -> list[tuple[str, list]]:
+    """
+    Pares (clave, serie) de las hojas (XLSX) o columnas (CSV) pedidas de un archivo.
+    Una hoja que no existe o no se puede convertir da una serie con su error.
+    """
+    import pandas as pd  # diferido: no se carga al arrancar la app
+
+    series = []
+    if tipo == "xlsx":
+        with pd.ExcelFile(ruta) as xls:
+            for hoja in hojas:
+                try:
+                    df = xls.parse(hoja)
+                    if not df.empty:
+                        series.append((f"{nombre} - {hoja}", _serie(df)))
+                except Exception as e:
+                    # Como antes del pool: el error se informa con la clave del documento
+                    series.append((nombre, [{"error": f"Error: {str(e)}"}]))
+                    break
+    elif tipo == "csv":
+        columnas = set(hojas)
+        df = pd.read_csv(ruta, usecols=lambda c: c in columnas)
+        for col in hojas:
+            if col in df.columns and not df[[col]].empty:
+                series.append((f"{nombre} - {col}", _serie(df[[col]])))
+    return series
+
+
+def series_en_paralelo(documentos: list[dict], procesos: int, presupuesto: float):
+    """
+    Genera pares (clave, serie) en el orden de `documentos` ({"nombre", "ruta", "tipo", "hojas"}).
+    Las lecturas empiezan todas a la vez; al agotarse `presupuesto` segundos las que
+    falten se devuelven como error TIEMPO_AGOTADO y, si alguna seguía en curso, el pool
+    se retira para que no siga ocupando procesos.
+    """
+    with _pool_en_uso(procesos) as (pool, retirar):
+        limite = time.monotonic() + presupuesto
+        futuros = [(d, pool.submit(leer_series, d["ruta"], d["tipo"], d["nombre"], d["hojas"])) for d in documentos]
+        for documento, futuro in futuros:
+            try:
+                yield from futuro.result(timeout=max(0.0, limite - time.monotonic()))
+            except FuturoTimeout:
+                if not futuro.cancel():  # ya empezó: solo se detiene matando su proceso
+                    retirar()
+                yield documento["nombre"], [{"error": f"Tiempo agotado ({presupuesto:g} s)", "error_code": "TIEMPO_AGOTADO"}]
+            except Exception as e:
+                yield documento["nombre"], [{"error": f"Error: {str(e)}"}]
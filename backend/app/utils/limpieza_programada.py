@@ -1,60 +1,69 @@
+import logging
 import os
 import time
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from apscheduler.schedulers.background import BackgroundScheduler
-from app.config import Config
-from app.models import db, Documento
+from flask import current_app
+from app.utils.archivos_documentos import rutas_registradas, PREFIJO_TEMPORAL
 
-# --- Configuración de Flask y SQLAlchemy ---
-app = Flask(__name__)
-app.config.from_object(Config)
-db.init_app(app)
+logger = logging.getLogger(__name__)
 
-# --- Ruta absoluta de la carpeta de uploads ---
-UPLOAD_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../uploads'))
 
 def limpiar_archivos_no_registrados():
     """
-    Elimina archivos del directorio UPLOAD_FOLDER que no están registrados en la base de datos.
+    Comprobación completa de UPLOAD_FOLDER (<grupo>/v<n>/<nombre>): borra los archivos que
+    ningún Documento ni lápida referencia, los temporales abandonados y las carpetas vacías.
+
+    Los borrados normales los hace la cola de lápidas (archivos_documentos.py); esto solo
+    recoge lo que se escape (caídas entre commit y rename, archivos copiados a mano), por
+    eso se programa cada LIMPIEZA_COMPLETA_DIAS. No toca nada modificado en las últimas
+    LIMPIEZA_GRACIA_HORAS. Debe llamarse dentro de un contexto de aplicación.
     """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    limite = time.time() - float(current_app.config.get('LIMPIEZA_GRACIA_HORAS', 1)) * 3600
+    eliminados = errores = 0
     try:
-        archivos_en_carpeta = set(os.listdir(UPLOAD_FOLDER))
-        archivos_en_db = set(doc.nombre for doc in Documento.query.all())
-        archivos_a_eliminar = archivos_en_carpeta - archivos_en_db
-
-        for archivo in archivos_a_eliminar:
-            ruta = os.path.join(UPLOAD_FOLDER, archivo)
-            try:
-                os.remove(ruta)
-                print(f"[✓] Archivo eliminado: {archivo}")
-            except Exception as e:
-                print(f"[✗] Error eliminando {archivo}: {e}")
+        registrados = rutas_registradas()
+        for raiz, _, archivos in os.walk(upload_folder, topdown=False):
+            for archivo in archivos:
+                ruta = os.path.join(raiz, archivo)
+                relativa = os.path.relpath(ruta, upload_folder).replace(os.sep, "/")
+                if relativa in registrados and not archivo.startswith(PREFIJO_TEMPORAL):
+                    continue
+                try:
+                    if os.path.getmtime(ruta) >= limite:
+                        continue
+                    os.remove(ruta)
+                    eliminados += 1
+                    logger.info(f"Archivo eliminado: {relativa}")
+                except OSError as e:
+                    errores += 1
+                    logger.warning(f"Error eliminando {relativa}: {e}")
+            if os.path.normpath(raiz) != os.path.normpath(upload_folder):
+                try:
+                    os.rmdir(raiz)  # solo si quedó vacía
+                except OSError:
+                    pass
     except Exception as general_error:
-        print(f"[!] Error general en limpieza: {general_error}")
-
-def iniciar_scheduler() -> BackgroundScheduler:
-    """
-    Inicia el programador que ejecuta la limpieza cada 7 días.
-    """
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(func=limpiar_archivos_no_registrados, trigger="interval", days=7)
-    scheduler.start()
-    return scheduler
+        logger.error(f"Error general en limpieza: {general_error}")
+    logger.info(f"Limpieza completa de archivos: {eliminados} eliminados, {errores} errores")
 
 
 if __name__ == '__main__':
+    from app import create_app
+    from app.utils.programador import iniciar_scheduler_unico, detener_scheduler
+
+    app = create_app()
     with app.app_context():
         print("▶ Ejecutando limpieza inicial...")
         limpiar_archivos_no_registrados()
 
-        print("▶ Iniciando scheduler (intervalo: cada 7 días)...")
-        scheduler = iniciar_scheduler()
-
+    print("▶ Iniciando scheduler...")
+    if iniciar_scheduler_unico(app) is None:
+        print("⚠ Otro proceso ya ejecuta las tareas programadas.")
+    else:
         try:
             print("✅ Scheduler en ejecución. Pulsa Ctrl+C para detener.")
             while True:
                 time.sleep(1)
         except (KeyboardInterrupt, SystemExit):
-            scheduler.shutdown()
+            detener_scheduler()
             print("🛑 Scheduler detenido.")
@@ -0,0 +1,35 @@
+# backend/app/utils/migraciones.py
+"""
+db.create_all() crea tablas nuevas pero no modifica las existentes.
+Este módulo añade a las tablas ya creadas las columnas e índices que falten,
+para que una BD de una versión anterior siga funcionando sin migraciones manuales.
+"""
+import logging
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+
+def asegurar_esquema(db) -> None:
+    """Añade columnas (siempre anulables o con default) e índices ausentes. Requiere contexto de app."""
+    engine = db.engine
+    inspector = inspect(engine)
+    tablas_existentes = set(inspector.get_table_names())
+
+    for tabla in db.metadata.sorted_tables:
+        if tabla.name not in tablas_existentes:
+            continue
+        columnas = {c["name"] for c in inspector.get_columns(tabla.name)}
+        for columna in tabla.columns:
+            if columna.name in columnas:
+                continue
+            tipo = columna.type.compile(dialect=engine.dialect)
+            ddl = f'ALTER TABLE {tabla.name} ADD COLUMN {columna.name} {tipo}'
+            if columna.server_default is not None:
+                ddl += f" DEFAULT {columna.server_default.arg}"
+            with engine.begin() as conn:
+                conn.execute(text(ddl))
+            logger.info(f"Migración: columna {tabla.name}.{columna.name} añadida")
+
+        for indice in tabla.indexes:
+            indice.create(bind=engine, checkfirst=True)
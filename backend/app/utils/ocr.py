@@ -1,16 +1,64 @@
-import pdfplumber
-import docx
-import pandas as pd
 import re
+import os
 import json
+import hashlib
 import logging
+import multiprocessing
+import zipfile
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
 
+# pdfplumber, pandas y lxml se importan al extraer: arrancar la app o un worker no los carga
 
-def analizar_excel_contenido(df: pd.DataFrame) -> dict:
+# Cambiar al modificar la forma de extraer: invalida la caché de extracción (utils/cache_extraccion.py)
+VERSION_EXTRACTOR = "3"
+
+# Configuración del OCR de páginas escaneadas (se ajusta desde create_app con configurar_ocr)
+_CONFIG_OCR = {
+    "habilitado": True,
+    "dpi": 200,
+    "idioma": "spa+eng",
+    "procesos": 2,
+    "directorio_cache": None,
+}
+_pool_ocr = None
+
+
+class LimiteExtraccionExcedido(ValueError):
+    """El archivo supera el máximo de páginas o filas permitido para extraer."""
+
+
+def configurar_ocr(habilitado: bool = True, dpi: int = 200, idioma: str = "spa+eng",
+                   procesos: int = 2, directorio_cache: str | None = None) -> None:
+    """Ajusta el OCR: resolución de rasterizado, idiomas de Tesseract, procesos y caché por página."""
+    _CONFIG_OCR.update(habilitado=habilitado, dpi=dpi, idioma=idioma,
+                       procesos=procesos, directorio_cache=directorio_cache)
+    if directorio_cache:
+        os.makedirs(directorio_cache, exist_ok=True)
+
+
+def version_extractor() -> str:
+    """
+    Clave de versión para la caché de extracción: VERSION_EXTRACTOR más los ajustes de OCR
+    que cambian el texto de un PDF escaneado (habilitado, idioma y resolución).
+    """
+    if not _CONFIG_OCR["habilitado"]:
+        return f"{VERSION_EXTRACTOR}-sin-ocr"
+    ajustes = f"{_CONFIG_OCR['idioma']}|{_CONFIG_OCR['dpi']}".encode("utf-8")
+    return f"{VERSION_EXTRACTOR}-ocr-{hashlib.sha1(ajustes).hexdigest()[:8]}"
+
+
+def analizar_excel_contenido(df) -> dict:
     """
     Analiza el contenido textual de un DataFrame para identificar ciertos patrones.
     """
-    texto = df.to_string()
+    return analizar_texto_contenido(df.to_string())
+
+
+def analizar_texto_contenido(texto: str) -> dict:
+    """
+    Identifica en un texto los mismos patrones que analizar_excel_contenido (IPs, hosts, inventario).
+    """
     texto_lower = texto.lower()
 
     return {
@@ -20,13 +68,16 @@ def analizar_excel_contenido(df: pd.DataFrame) -> dict:
     }
 
 
-def extraer_contenido(archivo, tipo: str) -> tuple[str, dict]:
+def extraer_contenido(archivo, tipo: str, max_paginas: int | None = None,
+                      max_filas: int | None = None) -> tuple[str, dict]:
     """
     Extrae el contenido textual y patrones de un archivo según su tipo.
 
     Args:
         archivo: stream o ruta del archivo.
         tipo (str): Tipo de archivo ('pdf', 'docx', 'xlsx', 'csv').
+        max_paginas (int, opcional): Máximo de páginas de un PDF.
+        max_filas (int, opcional): Máximo de filas por hoja/CSV o de líneas de un DOCX.
 
     Returns:
         Tuple: (contenido extraído, diccionario de patrones encontrados)
@@ -34,67 +85,270 @@ def extraer_contenido(archivo, tipo: str) -> tuple[str, dict]:
     Raises:
         RuntimeError: Si ocurre un error durante el procesamiento.
         ValueError: Si el tipo no es soportado o no se puede extraer contenido.
+        LimiteExtraccionExcedido: Si el archivo supera max_paginas o max_filas.
+        MemoryError: Si se agota la memoria disponible (p. ej. límite del proceso aislado).
     """
     contenido = ""
     patrones = {}
 
     try:
         if tipo == "pdf":
-            contenido = _procesar_pdf(archivo)
+            contenido = _procesar_pdf(archivo, max_paginas)
 
         elif tipo == "docx":
-            contenido = _procesar_docx(archivo)
+            contenido, patrones = _procesar_docx(archivo, max_filas)
 
         elif tipo in {"xls", "xlsx"}:
-            contenido, patrones = _procesar_excel(archivo)
+            contenido, patrones = _procesar_excel(archivo, max_filas)
 
         elif tipo == "csv":
-            contenido, patrones = _procesar_csv(archivo)
+            contenido, patrones = _procesar_csv(archivo, max_filas)
 
         else:
             raise ValueError(f"Tipo de archivo '{tipo}' no soportado")
 
         return contenido, patrones
 
+    except (LimiteExtraccionExcedido, MemoryError):
+        raise
     except Exception as e:
         logging.exception(f"Error procesando archivo tipo {tipo}: {e}")
         raise RuntimeError(f"Error al procesar {tipo.upper()}: {str(e)}")
 
 
-def _procesar_pdf(archivo) -> str:
+def _comprobar_filas(n: int, max_filas: int | None, donde: str) -> None:
+    if max_filas is not None and n > max_filas:
+        raise LimiteExtraccionExcedido(f"{donde} supera el máximo de {max_filas} filas")
+
+
+def _procesar_pdf(archivo, max_paginas: int | None = None) -> str:
+    import pdfplumber
+
     with pdfplumber.open(archivo) as pdf:
         if not pdf.pages:
             raise ValueError("El PDF no contiene páginas.")
+        if max_paginas is not None and len(pdf.pages) > max_paginas:
+            raise LimiteExtraccionExcedido(f"El PDF tiene {len(pdf.pages)} páginas (máximo {max_paginas})")
 
-        textos = []
+        textos = [None] * len(pdf.pages)
+        sin_texto = []
         for i, pagina in enumerate(pdf.pages):
             try:
                 texto = pagina.extract_text()
-                if texto:
-                    textos.append(texto)
+                if texto and texto.strip():
+                    textos[i] = texto
                 else:
-                    logging.warning(f"Página {i + 1} del PDF no tiene texto extraíble.")
+                    sin_texto.append(i)
             except Exception as e:
                 logging.warning(f"Error extrayendo texto de página {i + 1}: {e}")
 
-        contenido = "\n".join(textos).strip()
-        if not contenido:
-            raise ValueError("No se pudo extraer texto del PDF.")
-        return contenido
+    # Solo las páginas sin capa de texto pasan por OCR
+    if sin_texto:
+        for i, texto in _ocr_paginas(archivo, sin_texto).items():
+            if texto and texto.strip():
+                textos[i] = texto
+            else:
+                logging.warning(f"Página {i + 1} del PDF no tiene texto extraíble.")
+
+    contenido = "\n".join(t for t in textos if t).strip()
+    if not contenido:
+        raise ValueError("No se pudo extraer texto del PDF.")
+    return contenido
+
 
+def _ocr_imagen(png: bytes, idioma: str) -> str:
+    """OCR de una imagen PNG con Tesseract (se ejecuta en el pool de procesos)."""
+    import pytesseract
+    from PIL import Image
+    with Image.open(BytesIO(png)) as imagen:
+        return pytesseract.image_to_string(imagen, lang=idioma)
 
-def _procesar_docx(archivo) -> str:
-    doc = docx.Document(archivo)
-    return "\n".join(p.text for p in doc.paragraphs)
+
+def _obtener_pool_ocr() -> ProcessPoolExecutor:
+    global _pool_ocr
+    if _pool_ocr is None:
+        # spawn: los workers web tienen hilos, y fork con hilos activos no es seguro
+        _pool_ocr = ProcessPoolExecutor(max_workers=_CONFIG_OCR["procesos"],
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _pool_ocr
+
+
+def _leer_cache_ocr(clave: str) -> str | None:
+    carpeta = _CONFIG_OCR["directorio_cache"]
+    if not carpeta:
+        return None
+    try:
+        with open(os.path.join(carpeta, f"{clave}.txt"), encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
 
 
-def _procesar_excel(archivo) -> tuple[str, dict]:
+def _guardar_cache_ocr(clave: str, texto: str) -> None:
+    carpeta = _CONFIG_OCR["directorio_cache"]
+    if not carpeta:
+        return
+    ruta = os.path.join(carpeta, f"{clave}.txt")
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(texto)
+        os.replace(temporal, ruta)
+    except OSError as e:
+        logging.warning(f"No se pudo guardar OCR en caché: {e}")
+
+
+def _ocr_paginas(archivo, indices: list[int]) -> dict[int, str]:
+    """
+    Rasteriza con PyMuPDF las páginas indicadas y aplica OCR a las que no estén en caché.
+    La caché es por hash de la imagen rasterizada, así una nueva versión del PDF
+    solo repite el OCR de las páginas que cambiaron.
+
+    Returns:
+        dict índice de página -> texto (vacío si no hay OCR disponible).
+    """
+    if not _CONFIG_OCR["habilitado"]:
+        return {}
+    try:
+        import fitz  # PyMuPDF
+        import pytesseract  # noqa: F401
+    except ImportError as e:
+        logging.warning(f"OCR no disponible ({e}); se omiten {len(indices)} páginas escaneadas.")
+        return {}
+
+    if isinstance(archivo, (str, os.PathLike)):
+        with open(archivo, "rb") as f:
+            data = f.read()
+    else:
+        archivo.seek(0)
+        data = archivo.read()
+
+    dpi, idioma = _CONFIG_OCR["dpi"], _CONFIG_OCR["idioma"]
+    textos, pendientes = {}, {}
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        for i in indices:
+            png = doc[i].get_pixmap(dpi=dpi).tobytes("png")
+            clave = f"{hashlib.sha256(png).hexdigest()}-{idioma}"
+            en_cache = _leer_cache_ocr(clave)
+            if en_cache is not None:
+                textos[i] = en_cache
+            else:
+                pendientes[i] = (clave, png)
+
+    if not pendientes:
+        return textos
+
+    logging.info(f"OCR de {len(pendientes)} páginas ({len(textos)} desde caché)")
+    try:
+        if len(pendientes) == 1 or _CONFIG_OCR["procesos"] <= 1:
+            resultados = {i: _ocr_imagen(png, idioma) for i, (_, png) in pendientes.items()}
+        else:
+            pool = _obtener_pool_ocr()
+            futuros = {i: pool.submit(_ocr_imagen, png, idioma) for i, (_, png) in pendientes.items()}
+            resultados = {i: f.result() for i, f in futuros.items()}
+    except Exception as e:
+        logging.warning(f"Error ejecutando OCR: {e}")
+        return textos
+
+    for i, texto in resultados.items():
+        _guardar_cache_ocr(pendientes[i][0], texto)
+        textos[i] = texto
+    return textos
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_PARTES_CABECERA = re.compile(r"word/header\d*\.xml")
+_PARTES_PIE = re.compile(r"word/footer\d*\.xml")
+
+
+def _procesar_docx(archivo, max_filas: int | None = None) -> tuple[str, dict]:
+    """
+    Extrae el texto de un DOCX leyendo el XML en streaming (iterparse), sin construir
+    el modelo de python-docx: cuerpo, tablas (una línea por fila, celdas separadas
+    por tabulador), cabeceras y pies. La memoria no crece con el tamaño del documento.
+    """
+    with zipfile.ZipFile(archivo) as zf:
+        nombres = zf.namelist()
+        if "word/document.xml" not in nombres:
+            raise ValueError("El DOCX no contiene word/document.xml")
+        partes = (["word/document.xml"]
+                  + sorted(n for n in nombres if _PARTES_CABECERA.fullmatch(n))
+                  + sorted(n for n in nombres if _PARTES_PIE.fullmatch(n)))
+
+        lineas = []
+        for parte in partes:
+            with zf.open(parte) as xml:
+                for linea in _lineas_xml_docx(xml):
+                    lineas.append(linea)
+                    _comprobar_filas(len(lineas), max_filas, "El DOCX")
+
+    contenido = "\n".join(lineas)
+    return contenido, analizar_texto_contenido(contenido)
+
+
+def _texto_parrafo_docx(p) -> str:
+    trozos = []
+    for elem in p.iter(f"{_W}t", f"{_W}tab", f"{_W}br", f"{_W}cr"):
+        if elem.tag == f"{_W}t":
+            trozos.append(elem.text or "")
+        elif elem.tag == f"{_W}tab":
+            trozos.append("\t")
+        else:
+            trozos.append("\n")
+    return "".join(trozos)
+
+
+def _lineas_xml_docx(xml):
+    """Genera las líneas de texto (párrafos y filas de tabla) de una parte XML de WordprocessingML."""
+    from lxml import etree
+
+    celdas = []    # pila de celdas abiertas: cada una acumula sus párrafos
+    filas = []     # pila de filas abiertas: cada una acumula el texto de sus celdas
+    etiquetas = (f"{_W}p", f"{_W}tc", f"{_W}tr", f"{_W}tbl")
+
+    for evento, elem in etree.iterparse(xml, events=("start", "end"), tag=etiquetas):
+        tag = elem.tag
+        if evento == "start":
+            if tag == f"{_W}tc":
+                celdas.append([])
+            elif tag == f"{_W}tr":
+                filas.append([])
+            continue
+
+        if tag == f"{_W}p":
+            texto = _texto_parrafo_docx(elem)
+            if celdas:
+                celdas[-1].append(texto)
+            elif texto:
+                yield texto
+        elif tag == f"{_W}tc":
+            texto_celda = " ".join(t for t in celdas.pop() if t)
+            if filas:
+                filas[-1].append(texto_celda)
+        elif tag == f"{_W}tr":
+            texto_fila = "\t".join(filas.pop())
+            if celdas:
+                celdas[-1].append(texto_fila)  # tabla anidada dentro de una celda
+            elif texto_fila.strip():
+                yield texto_fila
+
+        # Libera lo ya procesado para que la memoria no crezca con el documento
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+def _procesar_excel(archivo, max_filas: int | None = None) -> tuple[str, dict]:
+    import pandas as pd
+
     xls = pd.ExcelFile(archivo)
     hojas = {}
     patrones = {}
 
     for nombre_hoja in xls.sheet_names:
-        df = xls.parse(nombre_hoja)
+        # Con límite se lee una fila de más para saber si lo supera sin cargar la hoja entera
+        df = xls.parse(nombre_hoja, nrows=max_filas + 1 if max_filas is not None else None)
+        _comprobar_filas(len(df), max_filas, f"La hoja '{nombre_hoja}'")
         hojas[nombre_hoja] = df.to_dict(orient='records')
         for k, v in analizar_excel_contenido(df).items():
             patrones[k] = patrones.get(k, False) or v
@@ -103,8 +357,11 @@ def _procesar_excel(archivo) -> tuple[str, dict]:
     return contenido, patrones
 
 
-def _procesar_csv(archivo) -> tuple[str, dict]:
-    df = pd.read_csv(archivo)
+def _procesar_csv(archivo, max_filas: int | None = None) -> tuple[str, dict]:
+    import pandas as pd
+
+    df = pd.read_csv(archivo, nrows=max_filas + 1 if max_filas is not None else None)
+    _comprobar_filas(len(df), max_filas, "El CSV")
     contenido = df.to_json(orient='records', force_ascii=False, date_format='iso')
     patrones = analizar_excel_contenido(df)
     return contenido, patrones
@@ -0,0 +1,124 @@
+# backend/app/utils/perfilado.py
+import os
+import cProfile
+import time
+from functools import wraps
+from pathlib import Path
+from uuid import uuid4
+
+from flask import request, session, current_app
+
+# Se activa con la cabecera "X-Perfilar: 1" o con ?perfilar=1 (solo administradores)
+CABECERA_PERFIL = "X-Perfilar"
+PARAMETRO_PERFIL = "perfilar"
+EXTENSION_PERFIL = ".prof"
+
+
+def _solicita_perfil() -> bool:
+    valor = request.headers.get(CABECERA_PERFIL) or request.args.get(PARAMETRO_PERFIL)
+    return bool(valor) and valor.lower() in ("1", "true", "si", "sí")
+
+
+def _es_admin() -> bool:
+    from ..models import Usuario
+    user_id = session.get("user_id")
+    if not user_id:
+        return False
+    usuario = Usuario.query.get(user_id)
+    return bool(usuario and usuario.is_admin)
+
+
+def directorio_perfiles() -> Path:
+    carpeta = Path(current_app.config.get("PERFILES_DIR") or os.path.join(current_app.instance_path, "perfiles"))
+    carpeta.mkdir(parents=True, exist_ok=True)
+    return carpeta
+
+
+def listar_perfiles() -> list[dict]:
+    """Devuelve los perfiles guardados, del más reciente al más antiguo."""
+    archivos = sorted(directorio_perfiles().glob(f"*{EXTENSION_PERFIL}"),
+                      key=lambda p: p.stat().st_mtime, reverse=True)
+    return [{
+        "nombre": p.name,
+        "tamano": p.stat().st_size,
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(p.stat().st_mtime)),
+    } for p in archivos]
+
+
+def _rotar_perfiles(carpeta: Path, maximo: int, logger) -> None:
+    archivos = sorted(carpeta.glob(f"*{EXTENSION_PERFIL}"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for viejo in archivos[maximo:]:
+        try:
+            viejo.unlink()
+        except OSError as e:
+            logger.warning(f"No se pudo eliminar perfil {viejo.name}: {e}")
+
+
+def _guardar_perfil(app, perfil: cProfile.Profile, carpeta: Path, nombre: str, duracion: float) -> bool:
+    try:
+        perfil.dump_stats(str(carpeta / nombre))
+        _rotar_perfiles(carpeta, int(app.config.get("PERFILES_MAX", 20)), app.logger)
+        app.logger.info(f"Perfil guardado: {nombre} ({duracion:.2f}s)")
+        return True
+    except OSError as e:
+        app.logger.error(f"No se pudo guardar el perfil {nombre}: {e}")
+        return False
+
+
+def _iterar_perfilado(iterable, perfil: cProfile.Profile):
+    """Recorre el cuerpo de una respuesta en streaming con el perfil activo en cada trozo."""
+    iterador = iter(iterable)
+    try:
+        while True:
+            perfil.enable()
+            try:
+                trozo = next(iterador)
+            except StopIteration:
+                return
+            finally:
+                perfil.disable()
+            yield trozo
+    finally:
+        cerrar = getattr(iterable, "close", None)
+        if cerrar is not None:
+            cerrar()
+
+
+def perfilable(f):
+    """
+    Permite perfilar una petición concreta con cProfile.
+
+    Si la petición no pide perfil, se llama a la vista directamente (sin coste extra).
+    Si lo pide un administrador, se guarda un archivo pstats en <instance>/perfiles
+    y se conservan solo los últimos PERFILES_MAX. En las respuestas en streaming el
+    perfil incluye también la generación del cuerpo y se guarda al terminar de enviarla.
+
+    cProfile solo ve el hilo de la petición: el trabajo que se hace en pools de hilos
+    (extracción de una subida con varios archivos) o en procesos aparte (extracción
+    aislada, OCR, lecturas de graficos-multiples) aparece como espera en el pool.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if not _solicita_perfil() or not _es_admin():
+            return f(*args, **kwargs)
+
+        app = current_app._get_current_object()
+        carpeta = directorio_perfiles()
+        nombre = f"{time.strftime('%Y%m%d-%H%M%S')}_{request.endpoint}_{uuid4().hex[:6]}{EXTENSION_PERFIL}"
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        try:
+            respuesta = current_app.make_response(perfil.runcall(f, *args, **kwargs))
+        except BaseException:
+            _guardar_perfil(app, perfil, carpeta, nombre, time.perf_counter() - inicio)
+            raise
+
+        if respuesta.is_streamed:
+            respuesta.response = _iterar_perfilado(respuesta.response, perfil)
+            respuesta.call_on_close(
+                lambda: _guardar_perfil(app, perfil, carpeta, nombre, time.perf_counter() - inicio))
+            respuesta.headers["X-Perfil"] = nombre
+        elif _guardar_perfil(app, perfil, carpeta, nombre, time.perf_counter() - inicio):
+            respuesta.headers["X-Perfil"] = nombre
+        return respuesta
+    return wrapper
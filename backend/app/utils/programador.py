@@ -0,0 +1,116 @@
+# backend/app/utils/programador.py
+"""
+Tareas programadas (APScheduler) con un único ejecutor por despliegue.
+
+Con varios workers (gunicorn/waitress) cada proceso importa la app, pero solo el
+que consigue el candado de archivo <instance>/scheduler.lock arranca el scheduler.
+Si ese proceso muere, el sistema operativo libera el candado y el siguiente
+worker que arranque lo toma.
+"""
+import os
+import atexit
+import logging
+from apscheduler.schedulers.background import BackgroundScheduler
+
+logger = logging.getLogger(__name__)
+
+_scheduler = None
+_candado = None  # se mantiene abierto mientras viva el proceso
+
+
+def _bloquear(archivo) -> None:
+    """Bloqueo exclusivo y no bloqueante; lanza OSError si otro proceso lo tiene."""
+    if os.name == "nt":
+        import msvcrt
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def adquirir_candado(ruta: str):
+    """Devuelve el archivo abierto si se obtuvo el candado, o None si ya lo tiene otro proceso."""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    archivo = open(ruta, "a+")
+    try:
+        _bloquear(archivo)
+    except OSError:
+        archivo.close()
+        return None
+    archivo.seek(0)
+    archivo.truncate()
+    archivo.write(str(os.getpid()))
+    archivo.flush()
+    return archivo
+
+
+def _tarea(app, funcion):
+    def ejecutar():
+        with app.app_context():
+            try:
+                funcion()
+            except Exception as e:
+                logger.error(f"Error en tarea programada {funcion.__name__}: {e}")
+    ejecutar.__name__ = funcion.__name__
+    return ejecutar
+
+
+def _registrar_tareas(app, scheduler: BackgroundScheduler) -> None:
+    from .limpieza_programada import limpiar_archivos_no_registrados
+    from .archivos_documentos import reclamar_pendientes
+    from .sesiones import purgar_sesiones_expiradas
+    from .subidas_fragmentadas import expirar_sesiones
+
+    scheduler.add_job(func=_tarea(app, reclamar_pendientes),
+                      trigger="interval", seconds=app.config.get("BORRADOS_INTERVALO_S", 60), id="borrados_pendientes")
+    scheduler.add_job(func=_tarea(app, limpiar_archivos_no_registrados),
+                      trigger="interval", days=app.config.get("LIMPIEZA_COMPLETA_DIAS", 30), id="limpieza_archivos")
+    scheduler.add_job(func=_tarea(app, expirar_sesiones),
+                      trigger="interval", hours=1, id="expirar_subidas")
+    if app.config.get("SESSION_TYPE") == "sqlalchemy":
+        scheduler.add_job(func=_tarea(app, purgar_sesiones_expiradas),
+                          trigger="interval", hours=1, id="purga_sesiones")
+
+
+def iniciar_scheduler_unico(app, ejecutar_ahora: bool = False):
+    """
+    Arranca el scheduler solo si este proceso obtiene el candado.
+
+    Returns:
+        BackgroundScheduler si este proceso es el ejecutor, None en caso contrario.
+    """
+    global _scheduler, _candado
+    if _scheduler is not None:
+        return _scheduler
+
+    ruta = app.config.get("SCHEDULER_LOCK") or os.path.join(app.instance_path, "scheduler.lock")
+    _candado = adquirir_candado(ruta)
+    if _candado is None:
+        logger.info(f"Scheduler no iniciado en PID {os.getpid()}: lo ejecuta otro proceso.")
+        return None
+
+    scheduler = BackgroundScheduler()
+    _registrar_tareas(app, scheduler)
+    if ejecutar_ahora:
+        for job in scheduler.get_jobs():
+            job.func()
+    scheduler.start()
+    _scheduler = scheduler
+    atexit.register(detener_scheduler)
+    logger.info(f"Scheduler iniciado en PID {os.getpid()}.")
+    return scheduler
+
+
+def detener_scheduler() -> None:
+    """Detiene el scheduler esperando a que terminen las tareas en curso y libera el candado."""
+    global _scheduler, _candado
+    if _scheduler is not None:
+        try:
+            _scheduler.shutdown(wait=True)
+        except Exception as e:
+            logger.warning(f"Error deteniendo scheduler: {e}")
+        _scheduler = None
+        logger.info("Scheduler detenido.")
+    if _candado is not None:
+        _candado.close()
+        _candado = None
@@ -0,0 +1,208 @@
+# backend/app/utils/recursos_frontend.py
+"""
+Recursos del frontend con huella, precomprimidos y cacheables indefinidamente.
+
+Al arrancar (o con `flask construir-frontend`) se copian los archivos de frontend/ a un
+directorio de compilación:
+- cada recurso (CSS, JS, imágenes...) como `nombre.<hash>.ext`, más `.gz` y `.br`
+  (brotli solo si el paquete está instalado) para los tipos de texto;
+- las páginas HTML con sus referencias a `/frontend/...` y `./...` reescritas a los
+  nombres con huella, también precomprimidas.
+Los nombres con huella se sirven con `Cache-Control: immutable`; las páginas y los
+nombres originales con `no-cache` (revalidan con ETag), así un despliegue nuevo se
+ve en la siguiente carga sin vaciar cachés.
+
+Tras compilar se borran los recursos con huella que ya no referencia ni el manifiesto
+nuevo ni el anterior: se conserva una generación para las páginas que ya estaban
+abiertas durante el despliegue.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import tempfile
+from pathlib import Path
+
+from flask import send_file
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # opcional: sin él solo se sirve gzip
+    brotli = None
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+EXCLUIDOS = {"old"}  # copias de respaldo que no se publican
+COMPRIMIBLES = {".css", ".js", ".html", ".json", ".webmanifest", ".svg", ".ico", ".txt"}
+_TAMANO_MINIMO_COMPRESION = 512
+
+_MANIFIESTO = "manifiesto.json"
+
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+
+class RecursosFrontend:
+    """Índice de recursos compilados: nombre original -> nombre con huella y variantes."""
+
+    def __init__(self, origen: Path, destino: Path):
+        self.origen = Path(origen)
+        self.destino = Path(destino)
+        self.huellas: dict[str, str] = {}   # "styles.css" -> "styles.3f2a9c1b0d4e.css"
+        self.inmutables: set[str] = set()   # nombres con huella servibles
+        self.paginas: set[str] = set()      # páginas HTML reescritas
+
+    # ---- compilación ----
+    def _escribir(self, ruta: Path, data: bytes) -> None:
+        """Escritura atómica (varios workers pueden compilar a la vez)."""
+        if ruta.exists() and ruta.stat().st_size == len(data) and ruta.read_bytes() == data:
+            return
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=ruta.parent, prefix=".tmp_")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, ruta)
+
+    def _escribir_con_variantes(self, relativo: str, data: bytes) -> None:
+        ruta = self.destino / relativo
+        self._escribir(ruta, data)
+        if ruta.suffix.lower() not in COMPRIMIBLES or len(data) < _TAMANO_MINIMO_COMPRESION:
+            return
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(gz) < len(data):
+            self._escribir(ruta.with_name(ruta.name + ".gz"), gz)
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            if len(br) < len(data):
+                self._escribir(ruta.with_name(ruta.name + ".br"), br)
+
+    def _reescribir_html(self, relativo: str, html: bytes) -> bytes:
+        """Sustituye `/frontend/x` y `./x` por `/frontend/<x con huella>`."""
+        texto = html.decode("utf-8")
+        base = Path(relativo).parent.as_posix()
+
+        def sustituir(m):
+            comilla, prefijo, nombre = m.group(1), m.group(2), m.group(3)
+            clave = nombre if prefijo == "/frontend/" else posixpath.normpath(posixpath.join(base, nombre))
+            if clave in self.huellas:
+                return f"{comilla}/frontend/{self.huellas[clave]}{comilla}"
+            return m.group(0)
+
+        texto = re.sub(r"""(["'])(/frontend/|\./)([^"'?#]+)\1""", sustituir, texto)
+        return texto.encode("utf-8")
+
+    def _leer_manifiesto(self) -> dict[str, str]:
+        try:
+            return json.loads((self.destino / _MANIFIESTO).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _podar(self, conservar: set[str]) -> int:
+        """Borra de destino lo que no está en `conservar` (ni sus variantes .gz/.br)."""
+        borrados = 0
+        for raiz, _, nombres in os.walk(self.destino):
+            for nombre in nombres:
+                ruta = Path(raiz) / nombre
+                relativo = ruta.relative_to(self.destino).as_posix()
+                base = relativo[:-3] if relativo.endswith((".gz", ".br")) else relativo
+                if nombre.startswith(".") or relativo == _MANIFIESTO or base in conservar:
+                    continue  # los temporales ".tmp_" pueden ser de otro worker compilando
+                try:
+                    ruta.unlink()
+                    borrados += 1
+                except FileNotFoundError:
+                    pass
+        return borrados
+
+    def construir(self) -> "RecursosFrontend":
+        anteriores = set(self._leer_manifiesto().values())
+        archivos = []
+        for raiz, dirs, nombres in os.walk(self.origen):
+            dirs[:] = [d for d in dirs if d not in EXCLUIDOS and not d.startswith(".")]
+            for nombre in nombres:
+                if not nombre.startswith("."):
+                    archivos.append((Path(raiz) / nombre).relative_to(self.origen).as_posix())
+
+        # Primero los recursos (las páginas necesitan sus huellas)
+        paginas = [a for a in archivos if a.endswith(".html")]
+        huellas = {}
+        for relativo in archivos:
+            if relativo.endswith(".html"):
+                continue
+            data = (self.origen / relativo).read_bytes()
+            huella = hashlib.sha256(data).hexdigest()[:12]
+            ruta = Path(relativo)
+            con_huella = ruta.with_name(f"{ruta.stem}.{huella}{ruta.suffix}").as_posix()
+            self._escribir_con_variantes(con_huella, data)
+            huellas[relativo] = con_huella
+        self.huellas = huellas
+        self.inmutables = set(huellas.values())
+
+        self.paginas = set(paginas)
+        for relativo in paginas:
+            data = self._reescribir_html(relativo, (self.origen / relativo).read_bytes())
+            self._escribir_con_variantes(relativo, data)
+
+        self._escribir(self.destino / _MANIFIESTO,
+                       json.dumps(huellas, indent=2, sort_keys=True).encode("utf-8"))
+        podados = self._podar(self.inmutables | self.paginas | anteriores)
+        logger.info(f"Frontend compilado: {len(huellas)} recursos, {len(paginas)} páginas en {self.destino}"
+                    f" ({podados} archivos obsoletos borrados)")
+        return self
+
+    # ---- servicio ----
+    def responder(self, nombre: str, accept_encoding: str = ""):
+        """
+        Respuesta para /frontend/<nombre> o una página; None si no existe en la compilación.
+        Elige la variante .br/.gz según Accept-Encoding.
+        """
+        if nombre in self.inmutables:
+            relativo, cache = nombre, CACHE_INMUTABLE
+        elif nombre in self.huellas:
+            relativo, cache = self.huellas[nombre], CACHE_REVALIDAR
+        elif nombre in self.paginas:
+            relativo, cache = nombre, CACHE_REVALIDAR
+        else:
+            return None
+
+        ruta = self.destino / relativo
+        tipo = mimetypes.guess_type(ruta.name)[0] or "application/octet-stream"
+        aceptadas = {c.split(";")[0].strip().lower() for c in (accept_encoding or "").split(",")
+                     if not c.replace(" ", "").endswith(";q=0")}
+        codificacion = None
+        for candidata, extension in (("br", ".br"), ("gzip", ".gz")):
+            variante = ruta.with_name(ruta.name + extension)
+            if candidata in aceptadas and variante.is_file():
+                ruta, codificacion = variante, candidata
+                break
+
+        respuesta = send_file(ruta, mimetype=tipo, download_name=Path(relativo).name,
+                              conditional=True, etag=True, max_age=None)
+        if codificacion:
+            respuesta.headers["Content-Encoding"] = codificacion
+        respuesta.headers["Vary"] = "Accept-Encoding"
+        respuesta.headers["Cache-Control"] = cache
+        return respuesta
+
+
+def construir_recursos(origen: Path, destino: Path) -> RecursosFrontend | None:
+    """Compila frontend/ en destino; si falla se sigue sirviendo frontend/ tal cual."""
+    try:
+        return RecursosFrontend(origen, destino).construir()
+    except Exception as e:
+        logger.warning(f"No se pudo compilar el frontend ({e}); se sirve sin huellas ni compresión.")
+        return None
+
+
+def registrar_comandos(app, origen: Path) -> None:
+    @app.cli.command("construir-frontend")
+    def construir_frontend():
+        """Compila frontend/ (huellas + gzip/brotli) en FRONTEND_COMPILADO_DIR."""
+        recursos = RecursosFrontend(origen, app.config["FRONTEND_COMPILADO_DIR"]).construir()
+        print(f"{len(recursos.huellas)} recursos y {len(recursos.paginas)} páginas en {recursos.destino}")
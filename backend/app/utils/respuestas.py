@@ -0,0 +1,90 @@
+# backend/app/utils/respuestas.py
+"""
+Respuestas JSON con msgspec (más rápido que el encoder de la stdlib que usa jsonify)
+y en streaming para listados y series grandes, sin construir el cuerpo completo en memoria.
+"""
+from itertools import islice
+
+import msgspec
+from flask import Response, stream_with_context
+
+TAMANO_BLOQUE = 1000
+
+
+class DocumentoResumen(msgspec.Struct):
+    """Elemento de GET /documentos."""
+    id: int
+    nombre: str
+    tipo: str
+    categoria: str
+    fecha: str
+
+
+class DocumentoDetalle(msgspec.Struct):
+    """Respuesta de GET /documentos/<id>."""
+    id: int
+    nombre: str
+    tipo: str
+    categoria: str
+    contenido: str | None
+    fecha: str
+
+
+def _enc_hook(obj):
+    # Tipos que msgspec no conoce (p. ej. Timestamp/Decimal de pandas): se serializan como texto
+    return str(obj)
+
+
+_encoder = msgspec.json.Encoder(enc_hook=_enc_hook)
+
+
+def codificar(obj) -> bytes:
+    return _encoder.encode(obj)
+
+
+def respuesta_json(obj, status: int = 200) -> Response:
+    """Equivalente a jsonify(obj) con msgspec."""
+    return Response(codificar(obj), status=status, mimetype="application/json")
+
+
+def _bloques(iterable, tamano: int):
+    iterador = iter(iterable)
+    while True:
+        bloque = list(islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+def _lista_en_bloques(items, tamano: int):
+    yield b"["
+    primero = True
+    for bloque in _bloques(items, tamano):
+        if not primero:
+            yield b","
+        yield b",".join(_encoder.encode(item) for item in bloque)
+        primero = False
+    yield b"]"
+
+
+def _objeto_en_bloques(pares, tamano: int):
+    yield b"{"
+    primero = True
+    for clave, valor in pares:
+        yield (b"" if primero else b",") + _encoder.encode(str(clave)) + b":"
+        if isinstance(valor, list):
+            yield from _lista_en_bloques(valor, tamano)
+        else:
+            yield _encoder.encode(valor)
+        primero = False
+    yield b"}"
+
+
+def lista_json_en_streaming(items, tamano_bloque: int = TAMANO_BLOQUE) -> Response:
+    """Respuesta con un array JSON generado bloque a bloque a partir de un iterable (p. ej. una query con yield_per)."""
+    return Response(stream_with_context(_lista_en_bloques(items, tamano_bloque)), mimetype="application/json")
+
+
+def objeto_json_en_streaming(pares, tamano_bloque: int = TAMANO_BLOQUE) -> Response:
+    """Respuesta con un objeto JSON generado a partir de pares (clave, valor); los valores lista se emiten por bloques."""
+    return Response(stream_with_context(_objeto_en_bloques(pares, tamano_bloque)), mimetype="application/json")
@@ -0,0 +1,149 @@
+# backend/app/utils/sesiones.py
+"""
+Backends de sesión intercambiables (Config.SESSION_TYPE):
+
+- "sqlalchemy": tabla `sessions` en la BD de la app (índice por expiración y purga periódica).
+  Las escrituras que no cambian nada se omiten; la caché de lectura en proceso
+  (SESSION_CACHE_TTL > 0) está desactivada por defecto porque cada worker tiene la suya:
+  un logout o una expiración en otro proceso no se vería hasta pasado el TTL.
+- "filesystem": comportamiento anterior de Flask-Session (un pickle por sesión en flask_session/).
+- "cookie": sesión firmada sin estado (la de Flask por defecto), sin almacenamiento en servidor.
+"""
+import logging
+import threading
+import time
+import warnings
+from collections import OrderedDict
+
+from flask_session import Session
+
+logger = logging.getLogger(__name__)
+
+
+class CacheSesiones:
+    """Caché LRU acotada con TTL para los datos de sesión leídos del almacén."""
+
+    def __init__(self, ttl: float, maximo: int):
+        self.ttl = ttl
+        self.maximo = maximo
+        self._datos = OrderedDict()  # store_id -> (datos, leido_en, escrito_en)
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, store_id):
+        """Entrada leída hace menos de `ttl` segundos (nunca si ttl <= 0)."""
+        with self._lock:
+            entrada = self._datos.get(store_id)
+            if entrada is None or time.monotonic() - entrada[1] >= self.ttl:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(store_id)
+            self.aciertos += 1
+            return entrada
+
+    def ultima(self, store_id):
+        """Últimos datos leídos o escritos por este proceso, sin mirar el TTL."""
+        with self._lock:
+            return self._datos.get(store_id)
+
+    def guardar(self, store_id, datos, escrito_en=None) -> None:
+        with self._lock:
+            anterior = self._datos.get(store_id)
+            if escrito_en is None:
+                escrito_en = anterior[2] if anterior else 0.0
+            self._datos[store_id] = (datos, time.monotonic(), escrito_en)
+            self._datos.move_to_end(store_id)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def quitar(self, store_id) -> None:
+        with self._lock:
+            self._datos.pop(store_id, None)
+
+
+def _envolver_con_cache(interfaz, cache: CacheSesiones, refresco_minimo: float) -> None:
+    """
+    Intercepta las operaciones de almacenamiento de la interfaz de Flask-Session:
+    - lecturas servidas desde la caché durante `ttl` segundos (con ttl <= 0 siempre del almacén);
+    - escrituras omitidas si los datos no cambiaron respecto a lo último leído y la expiración se renovó hace menos de `refresco_minimo`.
+    """
+    leer = interfaz._retrieve_session_data
+    escribir = interfaz._upsert_session
+    borrar = interfaz._delete_session
+
+    def _retrieve_session_data(store_id):
+        entrada = cache.obtener(store_id)
+        if entrada is not None:
+            return dict(entrada[0])
+        datos = leer(store_id)
+        if datos is not None:
+            cache.guardar(store_id, dict(datos))
+        return datos
+
+    def _upsert_session(session_lifetime, session, store_id):
+        datos = dict(session)
+        entrada = cache.ultima(store_id)
+        ahora = time.monotonic()
+        if entrada is not None and entrada[0] == datos and ahora - entrada[2] < refresco_minimo:
+            return
+        escribir(session_lifetime, session, store_id)
+        cache.guardar(store_id, datos, escrito_en=ahora)
+
+    def _delete_session(store_id):
+        cache.quitar(store_id)
+        borrar(store_id)
+
+    interfaz._retrieve_session_data = _retrieve_session_data
+    interfaz._upsert_session = _upsert_session
+    interfaz._delete_session = _delete_session
+    interfaz.cache_lectura = cache
+
+
+def _crear_indice_expiracion(app, interfaz, db) -> None:
+    modelo = getattr(interfaz, "sql_session_model", None)
+    if modelo is None:
+        return
+    from sqlalchemy import text
+    tabla = modelo.__table__.name
+    # IF NOT EXISTS: varios workers arrancan a la vez y checkfirst no es atómico
+    with app.app_context(), db.engine.begin() as conexion:
+        conexion.execute(text(f'CREATE INDEX IF NOT EXISTS "ix_{tabla}_expiry" ON "{tabla}" (expiry)'))
+
+
+def configurar_sesiones(app, db) -> None:
+    """Inicializa el backend de sesión indicado en SESSION_TYPE. Requiere db.init_app(app) previo."""
+    tipo = app.config.get("SESSION_TYPE", "sqlalchemy")
+    if tipo == "cookie":
+        # SecureCookieSessionInterface de Flask: firmada con SECRET_KEY, sin estado en servidor
+        logger.info("Sesiones: cookie firmada (sin almacenamiento en servidor)")
+        return
+
+    if tipo == "sqlalchemy":
+        app.config.setdefault("SESSION_SQLALCHEMY", db)
+        # Flask-Session declara la tabla en cada Session(app): con una segunda app
+        # (create_app reutilizable) se quita la declaración anterior del metadata
+        tabla = app.config.get("SESSION_SQLALCHEMY_TABLE", "sessions")
+        if tabla in db.metadata.tables:
+            db.metadata.remove(db.metadata.tables[tabla])
+    with warnings.catch_warnings():
+        # ...y SQLAlchemy avisa de que la clase Session del modelo se redefine
+        warnings.filterwarnings("ignore", message="This declarative base already contains a class")
+        Session(app)
+
+    if tipo == "sqlalchemy":
+        interfaz = app.session_interface
+        _crear_indice_expiracion(app, interfaz, db)
+        cache = CacheSesiones(ttl=float(app.config.get("SESSION_CACHE_TTL", 0)),
+                              maximo=int(app.config.get("SESSION_CACHE_MAX", 1024)))
+        _envolver_con_cache(interfaz, cache, float(app.config.get("SESSION_REFRESH_MIN", 60)))
+    logger.info(f"Sesiones: backend '{tipo}'")
+
+
+def purgar_sesiones_expiradas() -> None:
+    """Elimina de la tabla las sesiones expiradas (tarea programada). Requiere contexto de aplicación."""
+    from flask import current_app
+    purgar = getattr(current_app.session_interface, "_delete_expired_sessions", None)
+    if purgar is not None:
+        purgar()
+        logger.info("Sesiones expiradas purgadas.")
@@ -0,0 +1,227 @@
+# backend/app/utils/subidas_fragmentadas.py
+"""
+Subidas reanudables por partes, para archivos que superan MAX_CONTENT_LENGTH o
+conexiones que se cortan a mitad de subida.
+
+Protocolo (ver rutas /api/subidas en routes.py):
+    1. POST   /api/subidas                      {"nombre", "tamano"} -> id y tamano_parte
+    2. PUT    /api/subidas/<id>/partes/<n>      parte n (desde 0) con cabecera X-Checksum-SHA256
+    3. GET    /api/subidas/<id>                 bytes recibidos y siguiente parte (para reanudar)
+    4. POST   /api/subidas/<id>/finalizar       pasa el archivo completo por la ingesta normal
+
+Las partes se escriben en orden en <SUBIDAS_DIR>/<id>.parcial, siempre en el offset
+`recibido` que consta en la BD: una parte que llegó al disco pero no a la BD se
+sobrescribe al reintentarla. Reenviar una parte ya recibida con el mismo checksum no
+hace nada, así el cliente puede reintentar sin consultar antes el estado.
+
+El SHA-256 del archivo se calcula parte a parte en memoria del proceso; si la
+siguiente parte la recibe otro worker (o tras un reinicio) se recalcula leyendo el
+archivo al finalizar. Las sesiones sin actividad en SUBIDAS_EXPIRA_HORAS las borra
+la tarea programada `expirar_sesiones`.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import current_app
+
+from ..models import db, SesionSubida
+from .file_comparator import hash_file
+
+logger = logging.getLogger(__name__)
+
+EXTENSION = ".parcial"
+_RE_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+# id -> (bytes ya incluidos, hasher) de las sesiones cuyas partes recibe este proceso
+_hashes: dict[str, tuple[int, "hashlib._Hash"]] = {}
+_hashes_lock = threading.Lock()
+
+
+class ErrorSubida(Exception):
+    """Petición de subida por partes no válida; `estado` es el código HTTP a devolver."""
+
+    def __init__(self, mensaje: str, codigo: str, estado: int = 400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.codigo = codigo
+        self.estado = estado
+
+
+def ruta_parcial(directorio: str, id_: str) -> str:
+    return os.path.join(directorio, f"{id_}{EXTENSION}")
+
+
+def _bloquear(archivo) -> None:
+    """Bloqueo exclusivo (espera): serializa las partes de una sesión entre procesos."""
+    if os.name == "nt":
+        import msvcrt
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_LOCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+
+
+@contextmanager
+def _abrir_bloqueado(directorio: str, id_: str):
+    try:
+        archivo = open(ruta_parcial(directorio, id_), "r+b")
+    except FileNotFoundError:
+        raise ErrorSubida("Subida no encontrada o caducada", "SUBIDA_NO_ENCONTRADA", 404)
+    with archivo:
+        _bloquear(archivo)
+        yield archivo  # el candado se libera al cerrar
+
+
+def total_partes(sesion: SesionSubida) -> int:
+    return max(1, -(-sesion.tamano // sesion.tamano_parte))
+
+
+def estado(sesion: SesionSubida) -> dict:
+    recibidas = len(json.loads(sesion.partes))
+    return {
+        "id": sesion.id,
+        "nombre": sesion.nombre,
+        "tamano": sesion.tamano,
+        "tamano_parte": sesion.tamano_parte,
+        "recibido": sesion.recibido,
+        "siguiente_parte": recibidas,
+        "total_partes": total_partes(sesion),
+        "completa": sesion.recibido >= sesion.tamano,
+    }
+
+
+def crear(directorio: str, usuario_id, nombre: str, tipo: str, tamano: int,
+          tamano_parte: int, tamano_max: int) -> SesionSubida:
+    """Registra una sesión nueva y su archivo parcial vacío."""
+    if tamano <= 0:
+        raise ErrorSubida("El tamaño debe ser mayor que 0", "TAMANO_INVALIDO")
+    if tamano > tamano_max:
+        raise ErrorSubida(f"El archivo supera el máximo de {tamano_max} bytes", "ARCHIVO_DEMASIADO_GRANDE", 413)
+
+    os.makedirs(directorio, exist_ok=True)
+    ahora = time.time()
+    sesion = SesionSubida(id=uuid.uuid4().hex, usuario_id=usuario_id, nombre=nombre, tipo=tipo, tamano=tamano,
+                          tamano_parte=tamano_parte, recibido=0, partes="[]", creada=ahora, actualizada=ahora)
+    open(ruta_parcial(directorio, sesion.id), "wb").close()
+    db.session.add(sesion)
+    db.session.commit()
+    return sesion
+
+
+def obtener(id_: str, usuario_id) -> SesionSubida | None:
+    """Sesión `id_` si pertenece al usuario."""
+    return SesionSubida.query.filter_by(id=id_, usuario_id=usuario_id).first()
+
+
+def _actualizar_hash(id_: str, desde: int, datos: bytes, hasta: int) -> None:
+    with _hashes_lock:
+        actual = _hashes.get(id_)
+        if desde == 0:
+            hasher = hashlib.sha256()
+        elif actual is not None and actual[0] == desde:
+            hasher = actual[1]
+        else:
+            _hashes.pop(id_, None)  # faltan partes recibidas por otro proceso: se recalcula al final
+            return
+        hasher.update(datos)
+        _hashes[id_] = (hasta, hasher)
+
+
+def recibir_parte(sesion: SesionSubida, directorio: str, numero: int, datos: bytes, checksum: str) -> dict:
+    """
+    Añade la parte `numero` al archivo parcial y devuelve el estado de la sesión.
+
+    Raises:
+        ErrorSubida: checksum ausente o distinto, parte fuera de orden o de tamaño incorrecto.
+    """
+    checksum = (checksum or "").strip().lower()
+    if not _RE_SHA256.fullmatch(checksum):
+        raise ErrorSubida("Falta la cabecera X-Checksum-SHA256 (hex)", "CHECKSUM_REQUERIDO")
+    digest = hashlib.sha256(datos).hexdigest()
+    if digest != checksum:
+        raise ErrorSubida(f"La parte {numero} no coincide con su checksum", "CHECKSUM_INVALIDO")
+
+    with _abrir_bloqueado(directorio, sesion.id) as archivo:
+        db.session.refresh(sesion)  # otro proceso pudo añadir partes mientras se esperaba el candado
+        partes = json.loads(sesion.partes)
+        if numero < len(partes):
+            if partes[numero] == digest:
+                return estado(sesion)  # reintento de una parte ya guardada
+            raise ErrorSubida(f"La parte {numero} ya se recibió con otro contenido", "PARTE_DISTINTA", 409)
+        if numero > len(partes):
+            raise ErrorSubida(f"Se esperaba la parte {len(partes)}", "PARTE_FUERA_DE_ORDEN", 409)
+
+        esperado = min(sesion.tamano_parte, sesion.tamano - sesion.recibido)
+        if len(datos) != esperado:
+            raise ErrorSubida(f"La parte {numero} debe tener {esperado} bytes", "TAMANO_PARTE_INVALIDO")
+
+        desde = sesion.recibido
+        archivo.seek(desde)
+        archivo.write(datos)
+        archivo.truncate()
+        archivo.flush()
+        os.fsync(archivo.fileno())
+
+        partes.append(digest)
+        sesion.recibido = desde + len(datos)
+        sesion.partes = json.dumps(partes)
+        sesion.actualizada = time.time()
+        db.session.commit()
+        _actualizar_hash(sesion.id, desde, datos, sesion.recibido)
+    return estado(sesion)
+
+
+def sha256(sesion: SesionSubida, directorio: str) -> str:
+    """SHA-256 del archivo completo: el incremental si este proceso recibió todas las partes."""
+    with _hashes_lock:
+        actual = _hashes.get(sesion.id)
+        if actual is not None and actual[0] == sesion.recibido:
+            return actual[1].hexdigest()
+    with open(ruta_parcial(directorio, sesion.id), "rb") as f:
+        return hash_file(f)
+
+
+def descartar(sesion: SesionSubida, directorio: str) -> None:
+    """Borra la sesión y lo que quede de su archivo parcial."""
+    with _hashes_lock:
+        _hashes.pop(sesion.id, None)
+    db.session.delete(sesion)
+    db.session.commit()
+    try:
+        os.remove(ruta_parcial(directorio, sesion.id))
+    except FileNotFoundError:
+        pass
+
+
+def expirar_sesiones() -> None:
+    """
+    Borra las sesiones sin partes nuevas en SUBIDAS_EXPIRA_HORAS y los archivos
+    parciales huérfanos igual de antiguos (tarea programada). Requiere contexto de aplicación.
+    """
+    directorio = current_app.config["SUBIDAS_DIR"]
+    limite = time.time() - float(current_app.config.get("SUBIDAS_EXPIRA_HORAS", 24)) * 3600
+
+    caducadas = SesionSubida.query.filter(SesionSubida.actualizada < limite).all()
+    for sesion in caducadas:
+        descartar(sesion, directorio)
+
+    huerfanos = 0
+    if os.path.isdir(directorio):
+        vivas = {id_ for (id_,) in db.session.query(SesionSubida.id)}
+        for entrada in os.scandir(directorio):
+            id_ = entrada.name[:-len(EXTENSION)] if entrada.name.endswith(EXTENSION) else None
+            if id_ and id_ not in vivas and entrada.stat().st_mtime < limite:
+                try:
+                    os.remove(entrada.path)
+                    huerfanos += 1
+                except OSError as e:
+                    logger.warning(f"No se pudo borrar {entrada.name}: {e}")
+    if caducadas or huerfanos:
+        logger.info(f"Subidas por partes: {len(caducadas)} sesiones caducadas, {huerfanos} archivos huérfanos")
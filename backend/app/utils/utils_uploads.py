@@ -7,30 +7,40 @@ from flask import abort
 # Extensiones permitidas (minimiza superficie)
 ALLOWED_EXTS = {".pdf", ".docx", ".xlsx", ".csv"}
 
-# Opcional: si instalas python-magic (mejor validación de tipo real)
-import magic
+# Opcional: si instalas python-magic (mejor validación de tipo real); se importa en la primera subida
 def sniff_mime(file_bytes: bytes) -> str:
+    import magic
     return magic.from_buffer(file_bytes, mime=True) or ""
 
-def ensure_allowed_and_name(file_storage, allowed_exts=ALLOWED_EXTS) -> tuple[str, bytes]:
-    """Valida que exista archivo, que tenga extensión permitida y devuelve (nombre_nuevo, bytes)."""
-    if not file_storage or not file_storage.filename:
+def ensure_allowed_name(filename: str, allowed_exts=ALLOWED_EXTS) -> tuple[str, str]:
+    """Valida nombre y extensión; devuelve (nombre_seguro, extensión con punto)."""
+    if not filename:
         abort(400, "Archivo requerido")
 
-    original = secure_filename(file_storage.filename)
+    original = secure_filename(filename)
     ext = Path(original).suffix.lower()
     if ext not in allowed_exts:
         abort(400, f"Extensión no permitida: {ext}")
+    return original, ext
 
-    # Lee el contenido en memoria (si el tamaño lo permite; Flask aplica MAX_CONTENT_LENGTH)
-    data = file_storage.read()
-    
+def check_mime(ext: str, data: bytes) -> None:
+    """Comprueba que el contenido real corresponde a la extensión (aborta con 400 si no)."""
     mime = sniff_mime(data)
     if ext == ".pdf" and mime != "application/pdf": abort(400, "Tipo de archivo PDF inválido")
     if ext == ".csv" and mime not in {"text/csv", "application/vnd.ms-excel"}: abort(400, "CSV inválido")
     if ext == ".xlsx" and mime not in {"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}: abort(400, "XLSX inválido")
     if ext == ".docx" and mime not in {"application/vnd.openxmlformats-officedocument.wordprocessingml.document"}: abort(400, "DOCX inválido")
 
+def ensure_allowed_and_name(file_storage, allowed_exts=ALLOWED_EXTS) -> tuple[str, bytes]:
+    """Valida que exista archivo, que tenga extensión permitida y devuelve (nombre_nuevo, bytes)."""
+    if not file_storage:
+        abort(400, "Archivo requerido")
+    _, ext = ensure_allowed_name(file_storage.filename, allowed_exts)
+
+    # Lee el contenido en memoria (si el tamaño lo permite; Flask aplica MAX_CONTENT_LENGTH)
+    data = file_storage.read()
+    check_mime(ext, data)
+
     new_name = f"{uuid4().hex}{ext}"  # evita colisiones y traversal por nombre
     return new_name, data
 
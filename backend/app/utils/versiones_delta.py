@@ -0,0 +1,129 @@
+# backend/app/utils/versiones_delta.py
+"""
+Almacenamiento del texto extraído como deltas entre versiones de un mismo grupo.
+
+Cada nueva versión guarda, en lugar del texto completo, las operaciones (copiar tramo
+de la versión base / insertar texto) comprimidas con zlib. Cada DELTA_KEYFRAME_CADA
+versiones se guarda una versión completa (keyframe) para acotar la reconstrucción.
+
+El texto se trocea por líneas y también entre registros JSON ("},"), porque el
+contenido de XLSX/CSV es un único JSON sin saltos de línea.
+"""
+import re
+import json
+import zlib
+from collections import Counter
+from difflib import SequenceMatcher
+from sqlalchemy.orm import object_session
+
+_SEPARADORES = re.compile(r"(?<=\n)|(?<=\},)")
+
+# Si el delta no ahorra al menos esta fracción frente al texto comprimido, se guarda keyframe
+_AHORRO_MINIMO = 0.2
+# Pares de trozos iguales entre los tramos centrales a partir de los que no se calcula el
+# delta: es lo que hace cuadrático a SequenceMatcher con filas repetidas (~1 M ≈ 0,4 s)
+_MAX_COMPARACIONES = 1_000_000
+
+
+def _trocear(texto: str) -> list[str]:
+    return [t for t in _SEPARADORES.split(texto) if t]
+
+
+def _comparaciones(medio_a: list[str], medio_b: list[str]) -> int:
+    cuenta_b = Counter(medio_b)
+    return sum(n * cuenta_b[trozo] for trozo, n in Counter(medio_a).items())
+
+
+def crear_delta(base: str, nuevo: str) -> bytes | None:
+    """
+    Codifica `nuevo` como operaciones sobre `base`: ["c", desde, hasta] copia trozos, ["i", texto] inserta.
+
+    El prefijo y el sufijo comunes se copian sin comparar; solo el tramo central pasa por
+    SequenceMatcher, que sin autojunk es cuadrático en los trozos repetidos: si el tramo
+    supera _MAX_COMPARACIONES devuelve None y la versión se guarda como keyframe.
+    """
+    a, b = _trocear(base), _trocear(nuevo)
+    inicio = 0
+    while inicio < len(a) and inicio < len(b) and a[inicio] == b[inicio]:
+        inicio += 1
+    fin = 0
+    while fin < len(a) - inicio and fin < len(b) - inicio and a[-1 - fin] == b[-1 - fin]:
+        fin += 1
+    medio_a, medio_b = a[inicio:len(a) - fin], b[inicio:len(b) - fin]
+
+    if _comparaciones(medio_a, medio_b) > _MAX_COMPARACIONES:
+        return None
+
+    operaciones = [["c", 0, inicio]] if inicio else []
+    for op, i1, i2, j1, j2 in SequenceMatcher(None, medio_a, medio_b, autojunk=False).get_opcodes():
+        if op == "equal":
+            operaciones.append(["c", inicio + i1, inicio + i2])
+        elif op in ("replace", "insert"):
+            operaciones.append(["i", "".join(medio_b[j1:j2])])
+    if fin:
+        operaciones.append(["c", len(a) - fin, len(a)])
+    return zlib.compress(json.dumps(operaciones, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def aplicar_delta(base: str, delta: bytes) -> str:
+    a = _trocear(base)
+    partes = []
+    for operacion in json.loads(zlib.decompress(delta).decode("utf-8")):
+        if operacion[0] == "c":
+            partes.extend(a[operacion[1]:operacion[2]])
+        else:
+            partes.append(operacion[1])
+    return "".join(partes)
+
+
+def reconstruir_contenido(doc) -> str | None:
+    """Sigue la cadena delta_base_id hasta el keyframe y aplica los deltas en orden."""
+    sesion = object_session(doc)
+    cadena = []
+    actual = doc
+    while actual.contenido_delta is not None:
+        cadena.append(actual)
+        actual = sesion.get(type(doc), actual.delta_base_id)
+        if actual is None:
+            raise ValueError(f"Versión base ausente para el documento {cadena[-1].id}")
+    texto = actual._contenido or ""
+    for version in reversed(cadena):
+        texto = aplicar_delta(texto, version.contenido_delta)
+    return texto
+
+
+def asignar_contenido(doc, texto: str | None, base, keyframe_cada: int) -> None:
+    """
+    Guarda `texto` en `doc` como delta respecto a `base` (la versión anterior) o como keyframe
+    si no hay base, si la cadena alcanzó `keyframe_cada` o si el delta no compensa (o es
+    demasiado caro de calcular).
+    `base` debe tener id (hacer flush antes si es nueva).
+    """
+    profundidad = (base.delta_profundidad or 0) + 1 if base is not None else 0
+    if texto is None or base is None or base.id is None or keyframe_cada <= 1 or profundidad >= keyframe_cada:
+        doc.contenido = texto
+        return
+
+    texto_base = base.contenido or ""
+    delta = crear_delta(texto_base, texto)
+    if delta is None or len(delta) > (1 - _AHORRO_MINIMO) * len(zlib.compress(texto.encode("utf-8"), 6)):
+        doc.contenido = texto
+        return
+
+    doc._contenido = None
+    doc.contenido_delta = delta
+    doc.delta_base_id = base.id
+    doc.delta_profundidad = profundidad
+    doc._texto_cache = texto
+
+
+def materializar_dependientes(doc) -> None:
+    """Convierte en keyframe las versiones que usan `doc` como base (antes de borrarlo o reemplazarlo)."""
+    sesion = object_session(doc)
+    if sesion is None or doc.id is None:
+        return
+    dependientes = sesion.query(type(doc)).filter_by(delta_base_id=doc.id).all()
+    for dependiente in dependientes:
+        dependiente.contenido = dependiente.contenido
+    if dependientes:
+        sesion.flush()  # antes de borrar/reescribir `doc`, que es su base
@@ -0,0 +1,321 @@
+# backend/app/utils/vistas_previas.py
+"""
+Vistas previas precalculadas: miniaturas de las páginas de un PDF (PyMuPDF) y el DOCX
+convertido una sola vez a HTML saneado.
+
+Se guardan en disco por hash de contenido, en <VISTAS_PREVIAS_DIR>/<hash[:2]>/<hash>-<VERSION>/:
+    meta.json          {"tipo": "pdf"|"docx", "paginas": n}
+    p<n>-<ancho>.jpg   miniatura de la página n (desde 1) con ese ancho en píxeles
+    documento.html     fragmento HTML del DOCX
+
+Al subir un documento se generan en segundo plano las primeras VISTAS_PREVIAS_PAGINAS
+páginas a cada ancho de VISTAS_PREVIAS_ANCHOS; lo que falte (documentos anteriores,
+páginas posteriores) se genera la primera vez que se pide. Como la ruta depende solo
+del hash, el mismo contenido tiene siempre la misma URL y se puede cachear como inmutable.
+
+La generación corre en el pool de extracción aislada (extraccion_aislada.ejecutar), con
+su límite de tiempo y memoria: un PDF malformado no bloquea ni tumba el worker web.
+
+El HTML se construye emitiendo solo etiquetas propias (p, h1-h6, strong, em, u, ul/li,
+table) con el texto escapado: nada del marcado del DOCX llega al navegador.
+"""
+import html
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from . import extraccion_aislada
+
+logger = logging.getLogger(__name__)
+
+# Cambiar si cambia el formato de las vistas previas: invalida las generadas
+VERSION = "1"
+TIPOS = ("pdf", "docx")
+CALIDAD_JPEG = 80
+MAX_HTML_BYTES = 2 * 1024 * 1024
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_RE_TITULO = re.compile(r"(?:heading|t[ií]tulo|encabezado)\s*(\d)", re.IGNORECASE)
+_RE_LISTA = re.compile(r"list|vi[ñn]eta", re.IGNORECASE)
+_RE_HASH = re.compile(r"[0-9a-f]{64}")
+
+_pool = None
+_pool_lock = threading.Lock()
+_locks: dict[str, list] = {}  # hash -> [Lock, usos]; se quita al dejar de usarse
+
+
+def hash_valido(hash_: str) -> bool:
+    return bool(_RE_HASH.fullmatch(hash_ or ""))
+
+
+def directorio(base: str, hash_: str) -> str:
+    return os.path.join(base, hash_[:2], f"{hash_}-{VERSION}")
+
+
+@contextmanager
+def _bloqueo(hash_: str):
+    # Evita renderizar dos veces lo mismo si coinciden la tarea de fondo y una petición
+    with _pool_lock:
+        entrada = _locks.setdefault(hash_, [threading.Lock(), 0])
+        entrada[1] += 1
+    try:
+        with entrada[0]:
+            yield
+    finally:
+        with _pool_lock:
+            entrada[1] -= 1
+            if not entrada[1]:
+                del _locks[hash_]
+
+
+def _escribir(ruta: str, datos: bytes) -> None:
+    """Escritura atómica: un lector nunca ve un archivo a medias."""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def leer_meta(base: str, hash_: str) -> dict | None:
+    try:
+        with open(os.path.join(directorio(base, hash_), "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _guardar_meta(base: str, hash_: str, meta: dict) -> None:
+    _escribir(os.path.join(directorio(base, hash_), "meta.json"), json.dumps(meta).encode())
+
+
+def ruta_miniatura(base: str, hash_: str, pagina: int, ancho: int) -> str:
+    return os.path.join(directorio(base, hash_), f"p{pagina}-{ancho}.jpg")
+
+
+def ruta_html(base: str, hash_: str) -> str:
+    return os.path.join(directorio(base, hash_), "documento.html")
+
+
+# ==== PDF ====
+
+def _abrir_pdf(origen):
+    import fitz  # PyMuPDF; diferido: solo al generar vistas previas
+    if isinstance(origen, (bytes, bytearray)):
+        return fitz.open(stream=bytes(origen), filetype="pdf")
+    return fitz.open(origen, filetype="pdf")
+
+
+def _renderizar(pdf, pagina: int, ancho: int) -> bytes:
+    import fitz
+    hoja = pdf[pagina - 1]
+    zoom = ancho / max(hoja.rect.width, 1)
+    pix = hoja.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    return pix.tobytes("jpeg", jpg_quality=CALIDAD_JPEG)
+
+
+def _generar_pdf(origen, base: str, hash_: str, paginas: list[int], anchos) -> dict:
+    with _abrir_pdf(origen) as pdf:
+        meta = {"tipo": "pdf", "paginas": pdf.page_count}
+        for pagina in paginas:
+            if not 1 <= pagina <= pdf.page_count:
+                continue
+            for ancho in anchos:
+                ruta = ruta_miniatura(base, hash_, pagina, ancho)
+                if not os.path.exists(ruta):
+                    _escribir(ruta, _renderizar(pdf, pagina, ancho))
+    _guardar_meta(base, hash_, meta)
+    return meta
+
+
+# ==== DOCX ====
+
+def _activo(rpr, etiqueta: str) -> bool:
+    elem = rpr.find(f"{_W}{etiqueta}") if rpr is not None else None
+    if elem is None:
+        return False
+    return elem.get(f"{_W}val", "true").lower() not in ("0", "false", "none")
+
+
+def _html_runs(p) -> str:
+    trozos = []
+    for run in p.iter(f"{_W}r"):
+        texto = []
+        for elem in run:
+            if elem.tag == f"{_W}t":
+                texto.append(html.escape(elem.text or ""))
+            elif elem.tag == f"{_W}tab":
+                texto.append("&emsp;")
+            elif elem.tag in (f"{_W}br", f"{_W}cr"):
+                texto.append("<br>")
+        contenido = "".join(texto)
+        if not contenido:
+            continue
+        rpr = run.find(f"{_W}rPr")
+        for etiqueta, html_tag in (("b", "strong"), ("i", "em"), ("u", "u")):
+            if _activo(rpr, etiqueta):
+                contenido = f"<{html_tag}>{contenido}</{html_tag}>"
+        trozos.append(contenido)
+    return "".join(trozos)
+
+
+def _html_parrafo(p) -> tuple[str, str]:
+    """(tipo de bloque: "p", "h1".."h6" o "li", html interior)."""
+    ppr = p.find(f"{_W}pPr")
+    estilo = ppr.find(f"{_W}pStyle") if ppr is not None else None
+    nombre = (estilo.get(f"{_W}val") or "") if estilo is not None else ""
+    titulo = _RE_TITULO.search(nombre)
+    if titulo:
+        return f"h{min(max(int(titulo.group(1)), 1), 6)}", _html_runs(p)
+    if nombre.lower() in ("title", "titulo", "título"):
+        return "h1", _html_runs(p)
+    if (ppr is not None and ppr.find(f"{_W}numPr") is not None) or _RE_LISTA.search(nombre):
+        return "li", _html_runs(p)
+    return "p", _html_runs(p)
+
+
+def _html_tabla(tbl) -> str:
+    filas = []
+    for tr in tbl.iterchildren(f"{_W}tr"):
+        celdas = []
+        for tc in tr.iterchildren(f"{_W}tc"):
+            partes = [_html_tabla(hijo) if hijo.tag == f"{_W}tbl" else _html_runs(hijo)
+                      for hijo in tc.iterchildren(f"{_W}p", f"{_W}tbl")]
+            celdas.append("<td>" + "<br>".join(p for p in partes if p) + "</td>")
+        filas.append("<tr>" + "".join(celdas) + "</tr>")
+    return "<table>" + "".join(filas) + "</table>"
+
+
+def docx_a_html(origen) -> str:
+    """
+    Convierte el cuerpo de un DOCX (ruta, bytes o archivo) a un fragmento HTML saneado,
+    leyendo word/document.xml en streaming. Se corta en MAX_HTML_BYTES.
+    """
+    from io import BytesIO
+    from lxml import etree  # diferido
+
+    if isinstance(origen, (bytes, bytearray)):
+        origen = BytesIO(origen)
+    bloques, tamano, lista_abierta = [], 0, False
+    with zipfile.ZipFile(origen) as zf, zf.open("word/document.xml") as xml:
+        for _, elem in etree.iterparse(xml, events=("end",), tag=(f"{_W}p", f"{_W}tbl")):
+            padre = elem.getparent()
+            if padre is None or padre.tag != f"{_W}body":
+                continue  # párrafos de tablas: se convierten con su tabla
+            if elem.tag == f"{_W}tbl":
+                tipo, bloque = "table", _html_tabla(elem)
+            else:
+                tipo, interior = _html_parrafo(elem)
+                bloque = f"<{tipo}>{interior}</{tipo}>" if interior or tipo == "p" else ""
+            if tipo == "li" and not lista_abierta:
+                bloque, lista_abierta = "<ul>" + bloque, True
+            elif tipo != "li" and lista_abierta:
+                bloque, lista_abierta = "</ul>" + bloque, False
+            bloques.append(bloque)
+            tamano += len(bloque)
+
+            elem.clear()
+            while elem.getprevious() is not None:
+                del padre[0]
+            if tamano > MAX_HTML_BYTES:
+                bloques.append("<p><em>(Vista previa truncada)</em></p>")
+                break
+    if lista_abierta:
+        bloques.append("</ul>")
+    return "".join(bloques)
+
+
+def _generar_docx(origen, base: str, hash_: str) -> dict:
+    ruta = ruta_html(base, hash_)
+    if not os.path.exists(ruta):
+        _escribir(ruta, docx_a_html(origen).encode("utf-8"))
+    meta = {"tipo": "docx", "paginas": None}
+    _guardar_meta(base, hash_, meta)
+    return meta
+
+
+# ==== API ====
+
+def _generar(origen, tipo: str, base: str, hash_: str, paginas: list[int], anchos) -> dict:
+    """Se ejecuta en el trabajador aislado."""
+    if tipo == "pdf":
+        return _generar_pdf(origen, base, hash_, paginas, anchos)
+    return _generar_docx(origen, base, hash_)
+
+
+def generar(origen, tipo: str, base: str, hash_: str, paginas: list[int], anchos) -> dict:
+    """
+    Genera (lo que falte de) la vista previa de un contenido y devuelve su meta.
+    `origen` es la ruta del archivo o sus bytes; `paginas` solo aplica a PDF.
+
+    Raises:
+        ExtraccionFallida: el trabajador aislado superó su tiempo o memoria, o falló.
+    """
+    if tipo not in TIPOS:
+        raise ValueError(f"Sin vista previa para '{tipo}'")
+    with _bloqueo(hash_):
+        return extraccion_aislada.ejecutar(_generar, origen, tipo, base, hash_, list(paginas), tuple(anchos))
+
+
+def _generar_en_segundo_plano(origen, tipo, base, hash_, paginas, anchos) -> None:
+    try:
+        generar(origen, tipo, base, hash_, paginas, anchos)
+    except Exception:
+        logger.exception(f"No se pudo generar la vista previa de {hash_[:12]}")
+
+
+def programar(origen, tipo: str, base: str, hash_: str, paginas: int, anchos, hilos: int = 1) -> None:
+    """Encola la generación tras una subida (no retrasa la respuesta)."""
+    global _pool
+    if tipo not in TIPOS:
+        return
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, hilos), thread_name_prefix="vistas-previas")
+    _pool.submit(_generar_en_segundo_plano, origen, tipo, base, hash_, list(range(1, paginas + 1)), tuple(anchos))
+
+
+def obtener_meta(origen_fn, tipo: str, base: str, hash_: str, paginas: int, anchos) -> dict:
+    """Meta de la vista previa; si no existe (documento anterior) la genera desde `origen_fn()`."""
+    meta = leer_meta(base, hash_)
+    if meta is None:
+        meta = generar(origen_fn(), tipo, base, hash_, list(range(1, paginas + 1)), anchos)
+    return meta
+
+
+def obtener_miniatura(origen_fn, base: str, hash_: str, pagina: int, ancho: int) -> str:
+    """
+    Ruta de la miniatura; se genera si falta.
+
+    Raises:
+        LookupError: si la página no existe en el PDF.
+    """
+    ruta = ruta_miniatura(base, hash_, pagina, ancho)
+    if os.path.exists(ruta):
+        return ruta
+    meta = leer_meta(base, hash_)
+    if meta is not None and not 1 <= pagina <= (meta.get("paginas") or 0):
+        raise LookupError(f"El documento no tiene página {pagina}")
+    generar(origen_fn(), "pdf", base, hash_, [pagina], (ancho,))
+    if not os.path.exists(ruta):
+        raise LookupError(f"El documento no tiene página {pagina}")
+    return ruta
+
+
+def obtener_html(origen_fn, base: str, hash_: str) -> str:
+    """Ruta del HTML del DOCX; se genera si falta."""
+    ruta = ruta_html(base, hash_)
+    if not os.path.exists(ruta):
+        generar(origen_fn(), "docx", base, hash_, [], ())
+    return ruta
@@ -0,0 +1,105 @@
+"""
+Tiempo de arranque de la app (lo que paga cada worker, comando CLI o test).
+
+Lanza un intérprete nuevo con `python -X importtime` que importa el paquete, llama a
+create_app() y responde a un POST /api/login, y muestra:
+- el tiempo acumulado de importación y los módulos más caros;
+- el tiempo total hasta la primera respuesta (informativo: incluye create_all, compilar
+  el frontend y el disco, que varían mucho entre máquinas);
+- si se importó alguna librería pesada que debería cargarse solo al usarla.
+
+Sale con código 1 si la mediana del tiempo de importación supera el presupuesto o se
+importa una librería pesada, así puede usarse como comprobación en CI:
+
+    python benchmarks/arranque.py --presupuesto-ms 1500
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Solo deben cargarse al extraer, graficar o clasificar
+PESADAS = ("pandas", "numpy", "pdfplumber", "fitz", "lxml", "docx", "openpyxl", "magic", "pytesseract")
+
+PROGRAMA = """
+import time
+inicio = time.perf_counter()
+from app import create_app
+app = create_app()
+respuesta = app.test_client().post("/api/login", json={"email": "nadie@example.com", "password": "x"})
+assert respuesta.status_code in (400, 401), respuesta.status_code
+print(f"TOTAL_MS={(time.perf_counter() - inicio) * 1000:.1f}")
+"""
+
+
+def medir() -> tuple[float, list[tuple[str, int, int]]]:
+    """Devuelve (ms hasta la primera respuesta, [(módulo, profundidad, µs acumulados), ...])."""
+    with tempfile.TemporaryDirectory() as tmp:
+        entorno = dict(os.environ,
+                       DATABASE_URL=f"sqlite:///{tmp}/arranque.db",
+                       FRONTEND_COMPILADO_DIR=os.path.join(tmp, "frontend"),
+                       PYTHONDONTWRITEBYTECODE="")
+        proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", PROGRAMA],
+                                 cwd=BACKEND, env=entorno, capture_output=True, text=True)
+    if proceso.returncode != 0:
+        print(proceso.stderr[-3000:])
+        raise SystemExit(f"La app no arrancó (código {proceso.returncode})")
+
+    total = next(float(l.split("=")[1]) for l in proceso.stdout.splitlines() if l.startswith("TOTAL_MS="))
+    modulos = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        partes = linea[len("import time:"):].split("|")
+        try:
+            propio, acumulado = int(partes[0]), int(partes[1])
+        except ValueError:
+            continue  # cabecera
+        crudo = partes[2].rstrip()
+        profundidad = (len(crudo) - len(crudo.lstrip()) - 1) // 2  # 0 = importado directamente
+        modulos.append((crudo.strip(), profundidad, acumulado))
+    return total, modulos
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--presupuesto-ms", type=float, default=float(os.environ.get("ARRANQUE_PRESUPUESTO_MS", 1500)),
+                        help="Máximo de importación de los módulos (mediana de las repeticiones)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    medidas = [medir() for _ in range(args.repeticiones)]
+    totales = sorted(t for t, _ in medidas)
+    importaciones = sorted(sum(acumulado for _, profundidad, acumulado in modulos if profundidad == 0) / 1000
+                           for _, modulos in medidas)
+    mediana = importaciones[len(importaciones) // 2]
+    _, modulos = medidas[0]
+
+    print(f"Importación: {', '.join(f'{t:.0f}' for t in importaciones)} ms "
+          f"(mediana {mediana:.0f} ms, presupuesto {args.presupuesto_ms:.0f} ms)")
+    print("Más caros (acumulado):")
+    for nombre, _, acumulado in sorted(modulos, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"  {acumulado / 1000:8.1f} ms  {nombre}")
+
+    cargadas = sorted({nombre for nombre, _, _ in modulos if nombre in PESADAS})
+    print(f"\nHasta la primera respuesta: {', '.join(f'{t:.0f}' for t in totales)} ms "
+          f"(mediana {totales[len(totales) // 2]:.0f} ms)")
+
+    fallos = []
+    if cargadas:
+        fallos.append(f"librerías pesadas importadas al arrancar: {', '.join(cargadas)}")
+    if mediana > args.presupuesto_ms:
+        fallos.append(f"importación de {mediana:.0f} ms > presupuesto de {args.presupuesto_ms:.0f} ms")
+    for fallo in fallos:
+        print(f"✗ {fallo}")
+    if not fallos:
+        print("✓ Dentro del presupuesto")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
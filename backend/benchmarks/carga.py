@@ -0,0 +1,56 @@
+"""
+Prueba de carga sencilla: peticiones/segundo contra un servidor en marcha.
+
+Uso (arrancar antes el servidor con distinto número de workers):
+    WEB_CONCURRENCY=1 gunicorn -c gunicorn.conf.py wsgi:app
+    python benchmarks/carga.py --url http://localhost:5000/api/registration-status --clientes 32 --segundos 10
+    WEB_CONCURRENCY=4 gunicorn -c gunicorn.conf.py wsgi:app
+    python benchmarks/carga.py ...
+"""
+import argparse
+import threading
+import time
+import urllib.request
+import urllib.error
+
+
+def trabajador(url: str, fin: float, latencias: list, errores: list):
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=30) as r:
+                r.read()
+            latencias.append(time.perf_counter() - inicio)
+        except (urllib.error.URLError, OSError) as e:
+            errores.append(str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5000/api/registration-status")
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--segundos", type=float, default=10)
+    args = parser.parse_args()
+
+    latencias, errores = [], []
+    fin = time.perf_counter() + args.segundos
+    hilos = [threading.Thread(target=trabajador, args=(args.url, fin, latencias, errores))
+             for _ in range(args.clientes)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    total = time.perf_counter() - inicio
+
+    latencias.sort()
+    n = len(latencias)
+    print(f"URL: {args.url}  clientes: {args.clientes}")
+    print(f"Peticiones OK: {n}  errores: {len(errores)}  duración: {total:.1f}s")
+    print(f"Peticiones/s: {n / total:.1f}")
+    if n:
+        print(f"Latencia p50: {latencias[n // 2] * 1000:.1f} ms  p95: {latencias[int(n * 0.95) - 1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
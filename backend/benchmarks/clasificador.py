@@ -0,0 +1,112 @@
+"""
+Clasificador TF-IDF + lineal (utils/clasificador) frente a `categorizar` (palabras clave).
+
+Por defecto genera un corpus etiquetado sintético: cada categoría tiene su vocabulario,
+pero los documentos usan sobre todo sinónimos que las reglas no conocen y comparten
+ruido común, como pasa con los documentos reales que acaban en "General". Con --bd se
+usa la base de datos de la app (DATABASE_URL) con sus categorías guardadas.
+
+Entrena con el 80 %, y en el 20 % restante mide documentos/s y exactitud de:
+palabras clave, modelo solo y modelo con respaldo de palabras bajo el umbral.
+
+    python benchmarks/clasificador.py --documentos 5000
+    python benchmarks/clasificador.py --bd
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.categorize import categorizar
+from app.utils.clasificador import entrenar, clasificar_lote
+
+VOCABULARIO = {
+    "Inventario": (["inventario", "stock"], ["equipos", "activos", "serie", "modelo", "ubicación", "cantidad", "marca"]),
+    "Reporte": (["reporte", "informe"], ["resultados", "trimestre", "indicadores", "resumen", "tendencia", "meta"]),
+    "Finanzas": (["factura", "balance"], ["pago", "proveedor", "importe", "presupuesto", "cuenta", "impuesto", "iva"]),
+    "Legal": (["contrato", "cláusula"], ["partes", "obligaciones", "vigencia", "arrendamiento", "rescisión", "notario"]),
+    "Sistemas y Servidores": (["hostname", "firewall"], ["servidor", "linux", "puerto", "dns", "gateway", "máscara", "rack"]),
+    "Politicas y Controles": (["auditoría", "iso"], ["cumplimiento", "evidencia", "hallazgo", "responsable", "revisión", "norma"]),
+}
+RUIDO = ["empresa", "documento", "fecha", "área", "versión", "página", "total", "nombre", "general", "datos", "proceso"]
+
+
+def generar_corpus(n: int, semilla: int = 0):
+    rng = random.Random(semilla)
+    documentos, etiquetas = [], []
+    categorias = list(VOCABULARIO)
+    for i in range(n):
+        categoria = rng.choice(categorias)
+        claves, sinonimos = VOCABULARIO[categoria]
+        palabras = [rng.choice(sinonimos) for _ in range(rng.randint(2, 8))]
+        palabras += [rng.choice(RUIDO) for _ in range(rng.randint(20, 80))]
+        if rng.random() < 0.3:  # solo algunos documentos usan las palabras de las reglas
+            palabras += rng.sample(claves, 1)
+        if rng.random() < 0.5:  # y muchos mencionan términos de otra categoría
+            otra = rng.choice(categorias)
+            palabras += [rng.choice(VOCABULARIO[otra][1]) for _ in range(rng.randint(1, 5))]
+        rng.shuffle(palabras)
+        if categoria == "Sistemas y Servidores":
+            palabras += [f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}" for _ in range(rng.randint(0, 5))]
+        documentos.append((f"archivo_{i}.docx", " ".join(palabras), {}))
+        etiquetas.append(categoria)
+    return documentos, etiquetas
+
+
+def cargar_bd():
+    from app import create_app
+    from app.models import Documento
+    app = create_app()
+    with app.app_context():
+        filas = Documento.query.filter(Documento.categoria != "General").all()
+        return [(d.nombre, d.contenido or "", {}) for d in filas], [d.categoria for d in filas]
+
+
+def medir(nombre: str, funcion, documentos, etiquetas):
+    inicio = time.perf_counter()
+    predichas = funcion(documentos)
+    duracion = time.perf_counter() - inicio
+    exactitud = sum(p == e for p, e in zip(predichas, etiquetas)) / max(len(etiquetas), 1)
+    generales = sum(p == "General" for p in predichas) / max(len(predichas), 1)
+    print(f"{nombre:32} {len(documentos) / duracion:12,.0f} docs/s   exactitud {exactitud:6.1%}   'General' {generales:6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documentos", type=int, default=5000)
+    parser.add_argument("--bd", action="store_true", help="Usar los documentos de la base de datos")
+    parser.add_argument("--umbral", type=float, default=0.6)
+    args = parser.parse_args()
+
+    documentos, etiquetas = cargar_bd() if args.bd else generar_corpus(args.documentos)
+    corte = int(len(documentos) * 0.8)
+    ent_docs, ent_etiq = documentos[:corte], etiquetas[:corte]
+    prueba_docs, prueba_etiq = documentos[corte:], etiquetas[corte:]
+
+    inicio = time.perf_counter()
+    modelo, metricas = entrenar(ent_docs, ent_etiq)
+    print(f"Entrenamiento: {len(ent_docs)} documentos en {time.perf_counter() - inicio:.1f}s "
+          f"(validación: exactitud {metricas.get('exactitud', 0):.1%}, temperatura {metricas.get('temperatura')})\n")
+
+    medir("palabras clave (1 a 1)", lambda docs: [categorizar(n, t, p) for n, t, p in docs], prueba_docs, prueba_etiq)
+    medir("modelo (lote)", lambda docs: [r["categoria"] for r in clasificar_lote(docs, modelo, 0.0)],
+          prueba_docs, prueba_etiq)
+    medir(f"modelo + palabras (<{args.umbral})",
+          lambda docs: [r["categoria"] for r in clasificar_lote(docs, modelo, args.umbral)], prueba_docs, prueba_etiq)
+
+    # Calibración: confianza media frente a acierto real por tramo
+    resultados = clasificar_lote(prueba_docs, modelo, 0.0)
+    print("\nCalibración (confianza -> acierto):")
+    for bajo, alto in ((0.0, 0.5), (0.5, 0.7), (0.7, 0.9), (0.9, 1.01)):
+        tramo = [(r, e) for r, e in zip(resultados, prueba_etiq) if bajo <= r["confianza"] < alto]
+        if tramo:
+            media = sum(r["confianza"] for r, _ in tramo) / len(tramo)
+            acierto = sum(r["categoria"] == e for r, e in tramo) / len(tramo)
+            print(f"  [{bajo:.1f}, {min(alto, 1.0):.1f}): {len(tramo):5} docs, confianza media {media:.2f}, acierto {acierto:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Rendimiento concurrente de SQLite: configuración por defecto vs pragmas/pool de utils/base_datos.py.
+
+Varios hilos simulan subidas (INSERT + COMMIT de una fila tipo Documento con ~50 KB de
+contenido) y otros el listado de /documentos (SELECT proyectado), contra un archivo temporal.
+
+    python benchmarks/concurrencia_db.py --escritores 4 --lectores 8 --segundos 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+CONTENIDO = "x" * 50_000
+
+
+def preparar(engine):
+    with engine.begin() as c:
+        c.execute(text("CREATE TABLE documentos (id INTEGER PRIMARY KEY, nombre TEXT, tipo TEXT, "
+                       "contenido TEXT, categoria TEXT, fecha_subida TEXT)"))
+
+
+def escritor(engine, fin, contadores):
+    while time.perf_counter() < fin:
+        try:
+            with engine.begin() as c:
+                c.execute(text("INSERT INTO documentos (nombre, tipo, contenido, categoria, fecha_subida) "
+                               "VALUES ('a.pdf', 'pdf', :c, 'General', '2025-01-01')"), {"c": CONTENIDO})
+            contadores["subidas"] += 1
+        except OperationalError:
+            contadores["bloqueos"] += 1
+
+
+def lector(engine, fin, contadores):
+    while time.perf_counter() < fin:
+        try:
+            with engine.connect() as c:
+                c.execute(text("SELECT id, nombre, tipo, categoria, fecha_subida FROM documentos "
+                               "ORDER BY id DESC LIMIT 500")).fetchall()
+            contadores["listados"] += 1
+        except OperationalError:
+            contadores["bloqueos"] += 1
+
+
+def medir(nombre, crear_engine, args):
+    with tempfile.TemporaryDirectory() as carpeta:
+        engine = crear_engine(f"sqlite:///{os.path.join(carpeta, 'bench.db')}")
+        preparar(engine)
+        contadores = {"subidas": 0, "listados": 0, "bloqueos": 0}
+        fin = time.perf_counter() + args.segundos
+        hilos = ([threading.Thread(target=escritor, args=(engine, fin, contadores)) for _ in range(args.escritores)] +
+                 [threading.Thread(target=lector, args=(engine, fin, contadores)) for _ in range(args.lectores)])
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        engine.dispose()
+    print(f"{nombre:<10} subidas/s: {contadores['subidas'] / args.segundos:8.1f}  "
+          f"listados/s: {contadores['listados'] / args.segundos:8.1f}  "
+          f"'database is locked': {contadores['bloqueos']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--escritores", type=int, default=4)
+    parser.add_argument("--lectores", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=10)
+    args = parser.parse_args()
+
+    from app.config import Config
+    from app.utils.base_datos import opciones_motor, registrar_pragmas_sqlite
+
+    medir("antes", create_engine, args)
+
+    config = {k: getattr(Config, k) for k in dir(Config) if k.isupper()}
+
+    def motor_configurado(url):
+        engine = create_engine(url, **opciones_motor({**config, "SQLALCHEMY_DATABASE_URI": url}))
+        registrar_pragmas_sqlite(engine, config)
+        return engine
+
+    medir("después", motor_configurado, args)
+
+
+if __name__ == "__main__":
+    main()
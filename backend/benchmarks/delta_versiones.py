@@ -0,0 +1,139 @@
+"""
+Ahorro de espacio y latencia de lectura del almacenamiento por deltas (utils/versiones_delta.py).
+
+Genera un corpus de grupos versionados tipo inventario XLSX (JSON de registros, como
+_procesar_excel) y tipo texto (PDF/DOCX), donde cada versión cambia unas pocas filas.
+Compara el tamaño guardando el texto completo en cada versión frente a lo que guarda
+asignar_contenido (deltas, keyframes cada K versiones o cuando el delta no compensa),
+y mide cuánto cuesta guardar y reconstruir cada versión. El corpus de filas repetidas
+comprueba que el diff no se dispara (acaba en keyframes).
+
+    python benchmarks/delta_versiones.py --versiones 50 --filas 20000 --keyframe 10
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.versiones_delta import aplicar_delta, asignar_contenido
+
+
+class Version:
+    """Lo que asignar_contenido usa de Documento, sin base de datos."""
+
+    def __init__(self, id_):
+        self.id = id_
+        self._contenido = None
+        self.contenido_delta = None
+        self.delta_base_id = None
+        self.delta_profundidad = 0
+        self._texto_cache = None
+
+    @property
+    def contenido(self):  # asignar_contenido deja el texto memoizado en las versiones delta
+        return self._contenido if self.contenido_delta is None else self._texto_cache
+
+    @contenido.setter
+    def contenido(self, valor):
+        self._contenido = valor
+        self.contenido_delta = None
+        self.delta_base_id = None
+        self.delta_profundidad = 0
+        self._texto_cache = None
+
+
+def corpus_inventario(versiones: int, filas: int):
+    rng = random.Random(1)
+    registros = [{"Codigo": f"INV-{i:06d}", "Equipo": f"Servidor {i}", "IP": f"10.0.{i // 250}.{i % 250}",
+                  "Ubicacion": rng.choice(["CPD1", "CPD2", "Oficina"]), "Cantidad": rng.randint(1, 9)}
+                 for i in range(filas)]
+    for _ in range(versiones):
+        yield json.dumps({"Hoja1": registros}, ensure_ascii=False, default=str)
+        for _ in range(rng.randint(1, 20)):
+            registros[rng.randrange(filas)]["Cantidad"] = rng.randint(1, 99)
+        registros.append({"Codigo": f"INV-{len(registros):06d}", "Equipo": "Nuevo", "IP": "10.9.9.9",
+                          "Ubicacion": "CPD1", "Cantidad": 1})
+
+
+def corpus_texto(versiones: int, filas: int):
+    rng = random.Random(2)
+    lineas = [f"Párrafo {i}: lineamientos de seguridad y control interno número {i}.\n" for i in range(filas)]
+    for _ in range(versiones):
+        yield "".join(lineas)
+        lineas[rng.randrange(len(lineas))] = f"Párrafo modificado {rng.random()}\n"
+        lineas.insert(rng.randrange(len(lineas)), "Nueva cláusula.\n")
+
+
+def corpus_repetido(versiones: int, filas: int):
+    rng = random.Random(3)
+    lineas = [f"Equipo {rng.randrange(5)};OK\n" for _ in range(filas)]
+    for _ in range(versiones):
+        yield "".join(lineas)
+        lineas[0] = lineas[-1] = f"Equipo {rng.randrange(5)};KO\n"  # sin prefijo/sufijo común
+
+
+def reconstruir(versiones, version):
+    cadena = []
+    while version.contenido_delta is not None:
+        cadena.append(version)
+        version = versiones[version.delta_base_id]
+    texto = version._contenido or ""
+    for v in reversed(cadena):
+        texto = aplicar_delta(texto, v.contenido_delta)
+    return texto
+
+
+def medir(nombre, textos, keyframe):
+    completo = 0
+    almacenado = 0
+    versiones = {}
+    escrituras = []
+    base = None
+    for texto in textos:
+        completo += len(texto.encode("utf-8"))
+        version = Version(len(versiones) + 1)
+        inicio = time.perf_counter()
+        asignar_contenido(version, texto, base, keyframe)
+        escrituras.append(time.perf_counter() - inicio)
+        if version.contenido_delta is not None:
+            almacenado += len(version.contenido_delta)
+        else:
+            almacenado += len(texto.encode("utf-8"))
+        versiones[version.id] = version
+        base = version
+
+    latencias = []
+    for i, version in enumerate(versiones.values()):
+        inicio = time.perf_counter()
+        texto = reconstruir(versiones, version)
+        latencias.append(time.perf_counter() - inicio)
+        assert texto == textos[i], f"{nombre}: la versión {version.id} no se reconstruye igual"
+    latencias.sort()
+    escrituras.sort()
+    keyframes = sum(v.contenido_delta is None for v in versiones.values())
+
+    print(f"{nombre}: {len(versiones)} versiones ({keyframes} keyframes)")
+    print(f"  texto completo en cada versión: {completo / 1e6:8.2f} MB")
+    print(f"  deltas + keyframes cada {keyframe}:   {almacenado / 1e6:8.2f} MB  ({completo / max(almacenado, 1):.1f}x menos)")
+    print(f"  escritura p50: {escrituras[len(escrituras) // 2] * 1000:.1f} ms  máx: {escrituras[-1] * 1000:.1f} ms")
+    print(f"  lectura p50: {latencias[len(latencias) // 2] * 1000:.1f} ms  máx: {latencias[-1] * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--versiones", type=int, default=50)
+    parser.add_argument("--filas", type=int, default=20000)
+    parser.add_argument("--keyframe", type=int, default=10)
+    args = parser.parse_args()
+
+    medir("Inventario XLSX (JSON)", list(corpus_inventario(args.versiones, args.filas)), args.keyframe)
+    medir("Texto PDF/DOCX", list(corpus_texto(args.versiones, args.filas)), args.keyframe)
+    medir("Filas repetidas", list(corpus_repetido(args.versiones, args.filas)), args.keyframe)
+
+
+if __name__ == "__main__":
+    main()
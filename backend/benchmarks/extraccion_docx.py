@@ -0,0 +1,90 @@
+"""
+Extractor DOCX en streaming (utils/ocr._procesar_docx) frente a python-docx.
+
+Genera un DOCX grande con párrafos y tablas de inventario (hostname / IP / equipo),
+y mide el tiempo de cada extractor, el pico de memoria residente (en un proceso hijo,
+para contar también la memoria de lxml) y si las IPs de las tablas aparecen en el texto.
+
+    python benchmarks/extraccion_docx.py --parrafos 20000 --filas 20000
+"""
+import argparse
+import io
+import os
+import sys
+import multiprocessing
+import resource
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import docx
+
+from app.utils.ocr import _procesar_docx
+
+
+def generar(parrafos: int, filas: int) -> bytes:
+    documento = docx.Document()
+    documento.sections[0].header.paragraphs[0].text = "Inventario de red - confidencial"
+    for i in range(parrafos):
+        documento.add_paragraph(f"Párrafo {i}: procedimiento de control interno y lineamientos de seguridad.")
+    tabla = documento.add_table(rows=filas + 1, cols=3)
+    tabla.cell(0, 0).text, tabla.cell(0, 1).text, tabla.cell(0, 2).text = "hostname", "ip", "equipo"
+    for i in range(1, filas + 1):
+        fila = tabla.rows[i].cells
+        fila[0].text, fila[1].text, fila[2].text = f"srv{i}", f"10.{i // 65536}.{(i // 256) % 256}.{i % 256}", "Servidor"
+    buffer = io.BytesIO()
+    documento.save(buffer)
+    return buffer.getvalue()
+
+
+def con_python_docx(data: bytes) -> str:
+    return "\n".join(p.text for p in docx.Document(io.BytesIO(data)).paragraphs)
+
+
+def con_python_docx_y_tablas(data: bytes) -> str:
+    documento = docx.Document(io.BytesIO(data))
+    lineas = [p.text for p in documento.paragraphs]
+    for tabla in documento.tables:
+        for fila in tabla.rows:
+            lineas.append("\t".join(celda.text for celda in fila.cells))
+    return "\n".join(lineas)
+
+
+def con_streaming(data: bytes) -> str:
+    return _procesar_docx(io.BytesIO(data))[0]
+
+
+def _hijo(funcion, data, cola):
+    antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    texto = funcion(data)
+    duracion = time.perf_counter() - inicio
+    despues = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cola.put((duracion, (despues - antes) / 1024, len(texto), "10.0.0.1" in texto))
+
+
+def medir(nombre, funcion, data):
+    cola = multiprocessing.Queue()
+    proceso = multiprocessing.Process(target=_hijo, args=(funcion, data, cola))
+    proceso.start()
+    duracion, pico_mb, caracteres, ips = cola.get()
+    proceso.join()
+    print(f"{nombre:<22} {duracion:7.2f} s  +{pico_mb:7.1f} MB RSS  "
+          f"{caracteres / 1e6:5.1f} MB de texto  IPs de tablas: {'sí' if ips else 'no'}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parrafos", type=int, default=20000)
+    parser.add_argument("--filas", type=int, default=20000)
+    args = parser.parse_args()
+
+    data = generar(args.parrafos, args.filas)
+    print(f"DOCX de prueba: {len(data) / 1e6:.1f} MB")
+    medir("python-docx", con_python_docx, data)
+    medir("python-docx + tablas", con_python_docx_y_tablas, data)
+    medir("streaming", con_streaming, data)
+
+
+if __name__ == "__main__":
+    main()
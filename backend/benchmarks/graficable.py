@@ -0,0 +1,112 @@
+"""
+Validador de graficables por muestra (utils/es_graficable) frente a la lectura completa.
+
+Genera un corpus de CSV/XLSX (grandes, sin columna numérica, sin etiquetas, de una fila,
+con la hoja graficable al final, con fechas...) y, opcionalmente, añade los .csv/.xlsx de
+los directorios indicados. Para cada archivo compara el veredicto con muestra y con la
+hoja completa (GRAFICABLE_MUESTRA_FILAS=0) y mide el tiempo de ambos.
+
+    python benchmarks/graficable.py --filas 200000 [directorio ...]
+
+Sale con código 1 si algún veredicto difiere. El caso que la muestra no puede ver es
+un valor de texto que aparece solo después de las primeras N filas en una hoja sin otra
+columna de texto; si el corpus real lo contiene, subir GRAFICABLE_MUESTRA_FILAS.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from app.utils.es_graficable import evaluar_graficable, MUESTRA_FILAS
+
+
+def _csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode()
+
+
+def _xlsx(hojas: dict) -> bytes:
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for nombre, df in hojas.items():
+            df.to_excel(writer, sheet_name=nombre, index=False)
+    return buffer.getvalue()
+
+
+def generar_corpus(filas: int) -> dict:
+    rango = range(filas)
+    serie = pd.DataFrame({"region": [f"R{i % 17}" for i in rango], "ventas": [i * 1.5 for i in rango]})
+    solo_numeros = pd.DataFrame({"anio": list(rango), "valor": [i * 2 for i in rango]})
+    solo_texto = pd.DataFrame({"nombre": [f"n{i}" for i in rango], "ciudad": ["Lima"] * filas})
+    fechas = pd.DataFrame({"fecha": pd.date_range("2020-01-01", periods=min(filas, 5000), freq="D"),
+                           "temperatura": [20.0] * min(filas, 5000)})
+    huecos = serie.copy()
+    huecos["vacia"] = None
+    return {
+        "serie.csv": _csv(serie),
+        "solo_numeros.csv": _csv(solo_numeros),
+        "solo_texto.csv": _csv(solo_texto),
+        "una_fila.csv": _csv(serie.head(1)),
+        "una_columna.csv": _csv(serie[["ventas"]]),
+        "columna_vacia.csv": _csv(huecos),
+        "serie.xlsx": _xlsx({"Datos": serie.head(50000)}),
+        "graficable_al_final.xlsx": _xlsx({"Portada": solo_texto.head(20), "Notas": solo_numeros.head(20000),
+                                           "Datos": serie.head(20000)}),
+        "ninguna_hoja.xlsx": _xlsx({"A": solo_numeros.head(20000), "B": solo_texto.head(20000)}),
+        "fechas.xlsx": _xlsx({"Clima": fechas}),
+    }
+
+
+def cargar_directorios(directorios: list[str]) -> dict:
+    corpus = {}
+    for directorio in directorios:
+        for raiz, _, archivos in os.walk(directorio):
+            for nombre in archivos:
+                if nombre.lower().endswith((".csv", ".xlsx")):
+                    ruta = os.path.join(raiz, nombre)
+                    with open(ruta, "rb") as f:
+                        corpus[ruta] = f.read()
+    return corpus
+
+
+def medir(data: bytes, extension: str, muestra: int):
+    inicio = time.perf_counter()
+    veredicto = evaluar_graficable(data, extension, muestra)
+    return veredicto["graficable"], time.perf_counter() - inicio
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directorios", nargs="*")
+    parser.add_argument("--filas", type=int, default=200000)
+    parser.add_argument("--muestra", type=int, default=MUESTRA_FILAS)
+    args = parser.parse_args()
+
+    corpus = generar_corpus(args.filas)
+    corpus.update(cargar_directorios(args.directorios))
+
+    diferencias = 0
+    total_completo = total_muestra = 0.0
+    print(f"{'archivo':40} {'completo':>9} {'muestra':>9} {'t completo':>11} {'t muestra':>10}")
+    for nombre, data in corpus.items():
+        extension = os.path.splitext(nombre)[1].lower()
+        completo, t_completo = medir(data, extension, 0)
+        muestra, t_muestra = medir(data, extension, args.muestra)
+        total_completo += t_completo
+        total_muestra += t_muestra
+        marca = "" if completo == muestra else "  <-- DIFERENTE"
+        diferencias += completo != muestra
+        print(f"{os.path.basename(nombre)[:40]:40} {str(completo):>9} {str(muestra):>9} "
+              f"{t_completo * 1000:9.1f}ms {t_muestra * 1000:8.1f}ms{marca}")
+
+    print(f"\nTotal: completo {total_completo:.2f}s, muestra {total_muestra:.2f}s "
+          f"({total_completo / max(total_muestra, 1e-9):.1f}x); {diferencias} veredictos distintos")
+    return 1 if diferencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
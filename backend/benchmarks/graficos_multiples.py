@@ -0,0 +1,83 @@
+"""
+Lectura de /api/graficos-multiples: secuencial frente al pool de GRAFICOS_PROCESOS.
+
+Genera N libros XLSX/CSV (la mitad de cada tipo) con varias hojas/columnas, pide dos
+hojas de cada uno y mide el tiempo hasta la última serie. Con --presupuesto se
+comprueba además que lo que no termina a tiempo vuelve como TIEMPO_AGOTADO.
+
+    python benchmarks/graficos_multiples.py --documentos 12 --filas 20000 --procesos 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from app.utils import graficos
+
+
+def generar(directorio: str, documentos: int, filas: int) -> list[dict]:
+    df = pd.DataFrame({"etiqueta": [f"e{i}" for i in range(filas)],
+                       "valor": range(filas), "otro": [i * 0.5 for i in range(filas)]})
+    lista = []
+    for i in range(documentos):
+        if i % 2:
+            ruta = os.path.join(directorio, f"libro{i}.csv")
+            df.to_csv(ruta, index=False)
+            lista.append({"nombre": f"libro{i}.csv", "ruta": ruta, "tipo": "csv", "hojas": ["valor", "otro"]})
+        else:
+            ruta = os.path.join(directorio, f"libro{i}.xlsx")
+            with pd.ExcelWriter(ruta, engine="openpyxl") as writer:
+                for hoja in ("Ventas", "Costes", "Resumen"):
+                    df.to_excel(writer, sheet_name=hoja, index=False)
+            lista.append({"nombre": f"libro{i}.xlsx", "ruta": ruta, "tipo": "xlsx", "hojas": ["Ventas", "Costes"]})
+    return lista
+
+
+def secuencial(documentos: list[dict]) -> tuple[float, list]:
+    """Como el endpoint antes del pool: un archivo detrás de otro en el mismo proceso."""
+    inicio = time.perf_counter()
+    series = [s for d in documentos for s in graficos.leer_series(d["ruta"], d["tipo"], d["nombre"], d["hojas"])]
+    return time.perf_counter() - inicio, series
+
+
+def medir(documentos: list[dict], procesos: int, presupuesto: float) -> tuple[float, list]:
+    inicio = time.perf_counter()
+    series = list(graficos.series_en_paralelo(documentos, procesos, presupuesto))
+    return time.perf_counter() - inicio, series
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documentos", type=int, default=12)
+    parser.add_argument("--filas", type=int, default=20000)
+    parser.add_argument("--procesos", type=int, default=4)
+    parser.add_argument("--presupuesto", type=float, default=0, help="Probar también con este presupuesto (s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        documentos = generar(tmp, args.documentos, args.filas)
+        duracion_secuencial, esperadas = secuencial(documentos)
+        graficos._obtener_pool(args.procesos).submit(int).result()  # arranque de los procesos fuera de la medida
+        paralelo, series = medir(documentos, args.procesos, 3600)
+        print(f"{len(documentos)} documentos, {len(esperadas)} series")
+        print(f"  secuencial:             {duracion_secuencial:6.2f} s")
+        print(f"  pool ({args.procesos} procesos):      {paralelo:6.2f} s  ({duracion_secuencial / paralelo:.1f}x)")
+        if series != esperadas:
+            print("✗ Las series en paralelo no coinciden con las secuenciales")
+            return 1
+
+        if args.presupuesto:
+            duracion, parciales = medir(documentos, args.procesos, args.presupuesto)
+            agotadas = sum(1 for _, s in parciales if s and s[0].get("error_code") == "TIEMPO_AGOTADO")
+            print(f"  presupuesto {args.presupuesto:g} s: respuesta en {duracion:.2f} s, "
+                  f"{len(parciales) - agotadas} series completas, {agotadas} entradas agotadas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
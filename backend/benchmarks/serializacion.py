@@ -0,0 +1,61 @@
+"""
+jsonify (encoder de la stdlib, cuerpo completo en memoria) frente a utils/respuestas.py
+(msgspec + streaming por bloques) para un listado de 100k documentos y una serie de 100k puntos.
+
+Mide el tiempo hasta consumir el cuerpo completo y el pico de memoria (tracemalloc).
+
+    python benchmarks/serializacion.py --filas 100000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask, jsonify
+
+from app.utils.respuestas import DocumentoResumen, lista_json_en_streaming, objeto_json_en_streaming
+
+
+def filas_documentos(n):
+    for i in range(n):
+        yield (i, f"documento_{i}.xlsx", "xlsx", "Inventario", "2025-08-01")
+
+
+def serie(n):
+    return [{"Equipo": f"srv-{i}", "Cantidad": float(i % 97)} for i in range(n)]
+
+
+def medir(nombre, app, construir):
+    with app.test_request_context():
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        respuesta = construir()
+        total = sum(len(trozo) for trozo in respuesta.response)
+        duracion = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(f"{nombre:<34} {duracion * 1000:8.1f} ms  pico {pico / 1e6:7.1f} MB  ({total / 1e6:.1f} MB de JSON)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=100_000)
+    args = parser.parse_args()
+    n = args.filas
+    app = Flask(__name__)
+
+    medir("listado  jsonify", app, lambda: jsonify([
+        {"id": f[0], "nombre": f[1], "tipo": f[2], "categoria": f[3], "fecha": f[4]} for f in filas_documentos(n)]))
+    medir("listado  msgspec + streaming", app, lambda: lista_json_en_streaming(
+        DocumentoResumen(id=f[0], nombre=f[1], tipo=f[2], categoria=f[3], fecha=f[4]) for f in filas_documentos(n)))
+
+    medir("serie    jsonify", app, lambda: jsonify({"inventario.xlsx - Hoja1": serie(n)}))
+    medir("serie    msgspec + streaming", app, lambda: objeto_json_en_streaming(
+        iter([("inventario.xlsx - Hoja1", serie(n))])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compara el coste por petición de los backends de sesión (filesystem, sqlalchemy, cookie).
+
+Monta una app Flask mínima con el mismo `configurar_sesiones` que usa create_app,
+inicia sesión una vez y mide N peticiones autenticadas que leen la sesión
+(como hacen proteger_todas_rutas y login_required).
+
+    python benchmarks/sesiones.py --peticiones 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from datetime import timedelta
+from flask import Flask, session, jsonify
+from flask_sqlalchemy import SQLAlchemy
+
+from app.utils.sesiones import configurar_sesiones
+
+
+def crear_app(tipo: str, carpeta: str) -> Flask:
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY="bench",
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(carpeta, f'{tipo}.db')}",
+        SESSION_TYPE=tipo,
+        SESSION_FILE_DIR=os.path.join(carpeta, "flask_session"),
+        SESSION_SQLALCHEMY_TABLE="sessions",
+        PERMANENT_SESSION_LIFETIME=timedelta(minutes=15),
+    )
+    db = SQLAlchemy()
+    db.init_app(app)
+    configurar_sesiones(app, db)
+
+    @app.route("/login")
+    def login():
+        session.permanent = True
+        session["user_id"] = 1
+        return jsonify(ok=True)
+
+    @app.route("/protegida")
+    def protegida():
+        if "user_id" not in session:
+            return jsonify(error="No autorizado"), 401
+        return jsonify(ok=True)
+
+    return app
+
+
+def medir(tipo: str, peticiones: int) -> float:
+    with tempfile.TemporaryDirectory() as carpeta:
+        app = crear_app(tipo, carpeta)
+        cliente = app.test_client()
+        cliente.get("/login")
+        for _ in range(50):  # calentamiento
+            cliente.get("/protegida")
+        inicio = time.perf_counter()
+        for _ in range(peticiones):
+            r = cliente.get("/protegida")
+            assert r.status_code == 200, r.status_code
+        return (time.perf_counter() - inicio) / peticiones
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--peticiones", type=int, default=2000)
+    args = parser.parse_args()
+
+    base = None
+    for tipo in ("filesystem", "sqlalchemy", "cookie"):
+        t = medir(tipo, args.peticiones)
+        base = base or t
+        print(f"{tipo:<11} {t * 1e6:8.1f} µs/petición  ({base / t:4.1f}x vs filesystem)")
+
+
+if __name__ == "__main__":
+    main()
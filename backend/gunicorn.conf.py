@@ -0,0 +1,33 @@
+# Configuración de gunicorn:  gunicorn -c gunicorn.conf.py wsgi:app
+import os
+import multiprocessing
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# Con threads > 1 gunicorn usa workers gthread. El control de admisión (utils/admision.py)
+# limita por worker: con un solo hilo cada worker atiende una petición y nunca hay cola.
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))  # extracciones largas (PDF/XLSX)
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = 50
+
+# Carga la app (pandas, pdfplumber, ...) una sola vez en el master y la comparte por copy-on-write
+preload_app = True
+
+
+def post_fork(server, worker):
+    from wsgi import app
+    from app import db
+    from app.utils.programador import iniciar_scheduler_unico
+
+    # Las conexiones abiertas en el master no deben compartirse entre procesos
+    with app.app_context():
+        db.engine.dispose()
+
+    iniciar_scheduler_unico(app)
+
+
+def worker_exit(server, worker):
+    from app.utils.programador import detener_scheduler
+    detener_scheduler()
@@ -1,34 +1,22 @@
 import os
 import logging
-from apscheduler.schedulers.background import BackgroundScheduler
 from app import create_app
-from app.utils.limpieza_programada import limpiar_archivos_no_registrados
+from app.utils.programador import iniciar_scheduler_unico
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def tarea_segura():
-    try:
-        limpiar_archivos_no_registrados()
-    except Exception as e:
-        logger.error(f"Error en tarea programada: {e}")
-
-def iniciar_scheduler():
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(func=tarea_segura, trigger="interval", days=7)
-    scheduler.start()
-    logger.info("Scheduler iniciado para limpieza programada cada 7 días.")
-    return scheduler
-
-app = create_app()
+# Los procesos "spawn" (extracción aislada, OCR, graficos-multiples) reimportan este
+# módulo como __mp_main__: no deben construir otra app (frontend, create_all, índices...)
+if __name__ != "__mp_main__":
+    app = create_app()
 
 if __name__ == "__main__":
+    # Servidor de desarrollo. En producción usar wsgi.py (waitress) o gunicorn -c gunicorn.conf.py wsgi:app
     # Evita doble arranque con el reloader
     is_main = os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug
     if is_main:
-        with app.app_context():
-            tarea_segura()
-            iniciar_scheduler()
+        iniciar_scheduler_unico(app, ejecutar_ahora=True)
 
     debug_mode = os.getenv("FLASK_DEBUG", "False").lower() in ("true", "1", "t")
     app.run(debug=debug_mode)
@@ -0,0 +1,32 @@
+"""
+Punto de entrada WSGI para producción.
+
+- gunicorn (Linux):  gunicorn -c gunicorn.conf.py wsgi:app
+- waitress (Windows/Linux):  python wsgi.py   (hilos, WAITRESS_THREADS)
+
+El scheduler de limpieza no se arranca al importar este módulo: lo arranca
+cada worker tras el fork (ver gunicorn.conf.py) y solo uno gana el candado.
+"""
+import os
+import logging
+from app import create_app
+
+logging.basicConfig(level=logging.INFO)
+
+# Con `python wsgi.py`, los procesos "spawn" (extracción aislada, OCR, graficos-multiples)
+# reimportan este módulo como __mp_main__: no deben construir otra app
+if __name__ != "__mp_main__":
+    app = create_app()
+
+if __name__ == "__main__":
+    from waitress import serve
+    from app.utils.programador import iniciar_scheduler_unico, detener_scheduler
+
+    iniciar_scheduler_unico(app)
+    try:
+        serve(app,
+              host=os.getenv("HOST", "0.0.0.0"),
+              port=int(os.getenv("PORT", 5000)),
+              threads=int(os.getenv("WAITRESS_THREADS", 8)))
+    finally:
+        detener_scheduler()
@@ -368,9 +368,9 @@ async function cargarDocumentos(categoria = "todas") {
 
         if (!esXlsxOCsv) {
           if (esDocx) {
-            botonVer = `<button onclick="window.open('${API_BASE_URL}/ver_docx?nombre=${encodeURIComponent(doc.nombre)}', '_blank')">Ver</button">`;
+            botonVer = `<button onclick="window.open('${API_BASE_URL}/ver_docx?id=${doc.id}&nombre=${encodeURIComponent(doc.nombre)}', '_blank')">Ver</button">`;
           } else {
-            botonVer = `<button onclick="window.open('${API_BASE_URL_8000}/preview.html?nombre=${encodeURIComponent(doc.nombre)}', '_blank')">Ver</button>`;
+            botonVer = `<button onclick="window.open('${API_BASE_URL_8000}/preview.html?id=${doc.id}&nombre=${encodeURIComponent(doc.nombre)}', '_blank')">Ver</button>`;
           }
         }
 